@@ -0,0 +1,75 @@
+"""
+Benchmark du moteur de propositions sans LLM (llm/heuristic.py)
+
+Mesure la latence de HeuristicProposer.propose sur les exemples puis sur
+des DataFrames synthétiques larges et longs, et affiche les propositions
+retenues pour les exemples. Objectif: moins de 50 ms par appel.
+
+Usage:
+    python benchmarks/bench_heuristic.py --rows 100000 2000000 --columns 80 --repeat 5
+"""
+
+import argparse
+import statistics
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+from utils.data_loader import load_csv, get_dataframe_info  # noqa: E402
+from llm.heuristic import HeuristicProposer  # noqa: E402
+
+
+QUESTIONS = {
+    "example1_housing.csv": "Quels facteurs influencent le prix ?",
+    "example2_sales.csv": "Quelles catégories vendent le plus ?",
+    "example3_climate.csv": "Comment la température varie selon la saison ?",
+}
+
+
+def synthetic(rows: int, columns: int, rng: np.random.Generator) -> pd.DataFrame:
+    """Trois quarts de colonnes numériques, un quart de catégorielles (10 modalités)"""
+    n_categorical = columns // 4
+    data = {f"mesure_{i}": rng.normal(size=rows) for i in range(columns - n_categorical)}
+    data.update({f"groupe_{i}": rng.choice(list("abcdefghij"), rows) for i in range(n_categorical)})
+    return pd.DataFrame(data)
+
+
+def measure(proposer: HeuristicProposer, df, df_info, question: str, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        proposer.propose(df, df_info, question)
+        timings.append(proposer.last_elapsed_ms)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 2_000_000])
+    parser.add_argument("--columns", type=int, default=80)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    proposer = HeuristicProposer()
+    print(f"{'jeu de données':<28} {'médiane':>9}")
+    for filename, question in QUESTIONS.items():
+        df = load_csv(str(ROOT / "examples" / filename))
+        df_info = get_dataframe_info(df)
+        print(f"{filename:<28} {measure(proposer, df, df_info, question, args.repeat):>7.1f}ms")
+        for prop in proposer.propose(df, df_info, question):
+            print(f"    {prop['type']:<13} {prop['x_axis']} / {prop['y_axis']}: {prop['rationale']}")
+
+    rng = np.random.default_rng(0)
+    for rows in args.rows:
+        df = synthetic(rows, args.columns, rng)
+        df_info = get_dataframe_info(df)
+        label = f"synthétique {rows} x {args.columns}"
+        print(f"{label:<28} {measure(proposer, df, df_info, 'distribution de mesure_3', args.repeat):>7.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
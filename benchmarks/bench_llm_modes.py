@@ -0,0 +1,105 @@
+"""
+Benchmark des modes d'analyse: un appel (CombinedAnalyzer) contre deux
+appels successifs (DataVizAnalyzer + VizProposer)
+
+Pour chaque exemple et chaque question, mesure la latence de bout en bout,
+le délai avant la première proposition et la validité des propositions
+(part des 3 propositions fournies par le LLM qui passent la validation,
+sans fallback). Le cache des réponses est désactivé; Ollama doit tourner.
+
+Usage:
+    python benchmarks/bench_llm_modes.py --repeat 3 --url http://localhost:11434
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+from utils.data_loader import load_csv, get_dataframe_info  # noqa: E402
+from llm.analyzer import DataVizAnalyzer  # noqa: E402
+from llm.combined import CombinedAnalyzer  # noqa: E402
+from llm.viz_proposer import VizProposer  # noqa: E402
+
+
+QUESTIONS = {
+    "example1_housing.csv": [
+        "Quels facteurs influencent le prix ?",
+        "Comment se répartissent les surfaces par quartier ?",
+    ],
+    "example2_sales.csv": [
+        "Quelles catégories vendent le plus ?",
+        "Comment évoluent les ventes par région ?",
+    ],
+    "example3_climate.csv": [
+        "Quelle ville est la plus chaude ?",
+        "Y a-t-il un lien entre humidité et précipitations ?",
+    ],
+}
+
+
+def run_two_calls(url: str, question: str, df, df_info) -> dict:
+    analyzer = DataVizAnalyzer(url)
+    proposer = VizProposer(url)
+    start = time.perf_counter()
+    analysis = analyzer.analyze_question(question, df, df_info, use_cache=False)
+    first = None
+    for _ in proposer.stream_proposals(question, df_info, analysis, use_cache=False):
+        first = first or time.perf_counter() - start
+    return {
+        "seconds": time.perf_counter() - start,
+        "first": first,
+        "valid": proposer.last_valid_count,
+        "fallback": analyzer.last_fallback or proposer.last_fallback,
+    }
+
+
+def run_combined(url: str, question: str, df, df_info) -> dict:
+    combined = CombinedAnalyzer(url)
+    start = time.perf_counter()
+    first = None
+    for _ in combined.stream(question, df_info, use_cache=False):
+        first = first or time.perf_counter() - start
+    return {
+        "seconds": time.perf_counter() - start,
+        "first": first,
+        "valid": combined.last_valid_count,
+        "fallback": combined.last_fallback,
+    }
+
+
+MODES = {"deux-appels": run_two_calls, "un-appel": run_combined}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:11434")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--modes", nargs="+", default=list(MODES), choices=list(MODES))
+    args = parser.parse_args()
+
+    results = {mode: [] for mode in args.modes}
+    for filename, questions in QUESTIONS.items():
+        df = load_csv(str(ROOT / "examples" / filename))
+        df_info = get_dataframe_info(df)
+        for question in questions:
+            for _ in range(args.repeat):
+                for mode in args.modes:
+                    results[mode].append(MODES[mode](args.url, question, df, df_info))
+
+    print(f"{'mode':<12} {'appels':>6} {'médiane':>9} {'moyenne':>9} {'1re prop.':>10} {'validité':>9} {'fallback':>9}")
+    for mode, runs in results.items():
+        seconds = [r["seconds"] for r in runs]
+        firsts = [r["first"] for r in runs if r["first"] is not None]
+        validity = sum(r["valid"] for r in runs) / (3 * len(runs))
+        fallbacks = sum(r["fallback"] for r in runs) / len(runs)
+        print(f"{mode:<12} {len(runs):>6} {statistics.median(seconds):>8.2f}s {statistics.mean(seconds):>8.2f}s "
+              f"{statistics.median(firsts) if firsts else float('nan'):>9.2f}s {validity:>9.0%} {fallbacks:>9.0%}")
+
+
+if __name__ == "__main__":
+    main()
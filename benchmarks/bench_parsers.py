@@ -0,0 +1,143 @@
+"""
+Benchmark des backends de parsing CSV (utils/parsers.py)
+
+Génère des fichiers synthétiques de la forme des exemples (immobilier,
+ventes, climat) puis mesure, pour chaque backend, le débit en lignes/s
+et la mémoire résidente maximale. Chaque mesure tourne dans un processus
+séparé pour que le pic de RSS d'un backend ne pollue pas les autres.
+
+Usage:
+    python benchmarks/bench_parsers.py --rows 1000000 10000000 50000000
+"""
+
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from utils.parsers import PARSER_BACKENDS  # noqa: E402
+from utils.sniffer import sniff_csv  # noqa: E402
+
+
+WRITE_CHUNK_ROWS = 1_000_000
+
+
+def make_chunk(shape: str, n: int, rng: np.random.Generator) -> pd.DataFrame:
+    """Morceau synthétique de n lignes ayant les colonnes de l'exemple"""
+    if shape == "housing":
+        return pd.DataFrame({
+            "price": rng.integers(80_000, 1_500_000, n),
+            "surface": rng.integers(12, 250, n),
+            "rooms": rng.integers(1, 8, n),
+            "quartier": rng.choice(["Marais", "Belleville", "Montmartre", "Bastille", "Oberkampf", "Passy"], n),
+            "year_built": rng.integers(1850, 2024, n),
+            "balcony": rng.integers(0, 2, n),
+            "parking": rng.integers(0, 2, n),
+        })
+    if shape == "sales":
+        return pd.DataFrame({
+            "date": pd.Timestamp("2020-01-01") + pd.to_timedelta(rng.integers(0, 1800, n), unit="D"),
+            "category": rng.choice(["Electronics", "Clothing", "Home", "Sports"], n),
+            "sales": rng.integers(1_000, 90_000, n),
+            "quantity": rng.integers(1, 500, n),
+            "region": rng.choice(["North", "South", "East", "West"], n),
+            "customer_type": rng.choice(["B2B", "B2C"], n),
+        })
+    if shape == "climate":
+        return pd.DataFrame({
+            "date": pd.Timestamp("2020-01-01") + pd.to_timedelta(rng.integers(0, 1800, n), unit="D"),
+            "city": rng.choice(["Paris", "Lyon", "Marseille", "Lille", "Nantes"], n),
+            "temperature": rng.normal(14, 8, n).round(1),
+            "precipitation": rng.exponential(5, n).round(1),
+            "humidity": rng.integers(20, 100, n),
+            "wind_speed": rng.integers(0, 80, n),
+            "season": rng.choice(["Winter", "Spring", "Summer", "Fall"], n),
+        })
+    raise ValueError(f"Forme inconnue: {shape}")
+
+
+def write_file(path: Path, shape: str, rows: int, seed: int = 0):
+    """Écrit le fichier par morceaux pour ne pas tout garder en mémoire"""
+    rng = np.random.default_rng(seed)
+    with open(path, "w", newline="") as f:
+        for start in range(0, rows, WRITE_CHUNK_ROWS):
+            chunk = make_chunk(shape, min(WRITE_CHUNK_ROWS, rows - start), rng)
+            chunk.to_csv(f, index=False, header=(start == 0))
+
+
+def peak_rss_mb() -> float:
+    """
+    Pic de mémoire résidente du processus
+
+    VmHWM est remis à zéro par exec, contrairement à ru_maxrss qui hérite
+    du pic du processus parent.
+    """
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_worker(backend: str, path: str):
+    """Mesure dans le processus courant et affiche le résultat en JSON"""
+    dialect = sniff_csv(path)
+    start = time.perf_counter()
+    df = PARSER_BACKENDS[backend](path, dialect)
+    elapsed = time.perf_counter() - start
+    print(json.dumps({"rows": len(df), "seconds": elapsed, "peak_rss_mb": peak_rss_mb()}))
+
+
+def measure(backend: str, path: Path) -> dict:
+    output = subprocess.run(
+        [sys.executable, __file__, "--worker", backend, str(path)],
+        check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000_000, 10_000_000, 50_000_000])
+    parser.add_argument("--shapes", nargs="+", default=["housing", "sales", "climate"])
+    parser.add_argument("--backends", nargs="+", default=sorted(PARSER_BACKENDS))
+    parser.add_argument("--dir", type=Path, default=None, help="Répertoire des fichiers générés")
+    parser.add_argument("--worker", nargs=2, metavar=("BACKEND", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(*args.worker)
+        return
+
+    workdir = args.dir or Path(tempfile.mkdtemp(prefix="bench_parsers_"))
+    workdir.mkdir(parents=True, exist_ok=True)
+
+    print(f"{'forme':<8} {'lignes':>11} {'taille':>9} {'backend':<8} {'lignes/s':>12} {'RSS max':>9}")
+    for shape in args.shapes:
+        for rows in args.rows:
+            path = workdir / f"{shape}_{rows}.csv"
+            if not path.exists():
+                write_file(path, shape, rows)
+            size_mb = path.stat().st_size / 1024 ** 2
+
+            for backend in args.backends:
+                result = measure(backend, path)
+                rate = result["rows"] / result["seconds"]
+                print(f"{shape:<8} {rows:>11,} {size_mb:>7.0f}Mo {backend:<8} "
+                      f"{rate:>12,.0f} {result['peak_rss_mb']:>7.0f}Mo")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Benchmark de la réduction des traces volumineuses (visualization/reduction.py)
+
+Pour chaque template, et pour des figures plotly.express (traces WebGL
+dès 1000 lignes), construit la figure sur un DataFrame synthétique et
+compare la taille du JSON envoyé au navigateur avec et sans réduction,
+ainsi que le temps ajouté par la réduction.
+
+Usage:
+    python benchmarks/bench_reduction.py --rows 100000 2000000 --max-points 20000
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+from utils.data_loader import get_dataframe_info  # noqa: E402
+from llm.templates import render_template  # noqa: E402
+from visualization.reduction import reduce_figure, reduction_notes  # noqa: E402
+
+
+PROPOSALS = [
+    {"type": "scatter_plot", "x_axis": "mesure", "y_axis": "cible"},
+    {"type": "scatter_plot", "x_axis": "mesure", "y_axis": "cible", "color": "groupe"},
+    {"type": "histogram", "x_axis": "mesure", "y_axis": "count"},
+    {"type": "box_plot", "x_axis": "groupe", "y_axis": "cible"},
+    {"type": "line_chart", "x_axis": "instant", "y_axis": "cible"},
+]
+
+# Figures telles que le code du LLM les écrit souvent (Scattergl, une barre par ligne)
+PX_FIGURES = {
+    "px.scatter": lambda df: px.scatter(df, x="mesure", y="cible"),
+    "px.scatter + couleur": lambda df: px.scatter(df, x="mesure", y="cible", color="groupe"),
+    "px.line": lambda df: px.line(df, x="instant", y="cible"),
+    # Une barre par ligne, comme le code par défaut de CodeGenerator
+    "px.bar": lambda df: px.bar(df, x="instant", y="cible"),
+    "px.bar (catégories)": lambda df: px.bar(df, x="groupe", y="cible"),
+}
+
+
+def synthetic(rows: int, rng: np.random.Generator) -> pd.DataFrame:
+    mesure = rng.normal(size=rows)
+    return pd.DataFrame({
+        "mesure": mesure,
+        "cible": 2 * mesure + rng.normal(size=rows),
+        "groupe": rng.choice(list("abcde"), rows),
+        "instant": np.arange(rows, dtype=float),
+    })
+
+
+def build(code: str, df: pd.DataFrame):
+    namespace = {}
+    exec(code, namespace)
+    return namespace["create_figure"](df)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 2_000_000])
+    parser.add_argument("--max-points", type=int, default=20_000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'lignes':>9} {'proposition':<26} {'JSON brut':>10} {'JSON réduit':>12} {'réduction':>10}")
+    for rows in args.rows:
+        df = synthetic(rows, rng)
+        df_info = get_dataframe_info(df)
+        figures = [
+            (proposal["type"] + (" + couleur" if proposal.get("color") else ""),
+             lambda df, proposal=proposal: build(render_template({**proposal, "title": "bench"}, df_info), df))
+            for proposal in PROPOSALS
+        ] + list(PX_FIGURES.items())
+        for label, make_figure in figures:
+            fig = make_figure(df)
+            raw = len(fig.to_json())
+            start = time.perf_counter()
+            reduced = reduce_figure(fig, args.max_points)
+            elapsed = (time.perf_counter() - start) * 1000
+            print(f"{rows:>9} {label:<26} {raw / 1e6:>8.1f}Mo {len(reduced.to_json()) / 1e6:>10.2f}Mo "
+                  f"{elapsed:>8.0f}ms")
+            for note in reduction_notes(reduced):
+                print(f"{'':>10} {note}")
+
+
+if __name__ == "__main__":
+    main()
@@ -10,25 +10,112 @@ from pathlib import Path
 # Ajouter src au path
 sys.path.insert(0, str(Path(__file__).parent))
 
-from utils.data_loader import load_csv, get_dataframe_info
+from utils.data_loader import load_csv, load_csv_cached, load_csv_chunked, get_dataframe_info
+from utils.cache import get_default_cache
+from utils.incremental import IncrementalDataset
+from utils.local_source import open_local_dataset, list_local_datasets, get_data_root
+from utils.profiler import dataset_fingerprint
 from utils.validator import validate_dataframe
 from llm.analyzer import DataVizAnalyzer
 from llm.viz_proposer import VizProposer
-from llm.code_generator import CodeGenerator
-from visualization.plotter import VisualizationPlotter
+from llm.combined import CombinedAnalyzer
+from llm.heuristic import HeuristicProposer, heuristic_analysis
+from llm.client import get_client
+from llm.cache import get_response_cache
+from llm.fingerprint import question_fingerprint, get_result_store
+from llm.models import get_model_manager, STAGE_MODELS
+from llm.schemas import get_parse_stats
+from llm.templates import get_template_stats
+from visualization.pregen import Pregenerator, proposal_key
+from visualization.memo import get_visualization_memo
+from visualization.sandbox import get_sandbox, sandbox_enabled
+from visualization.reduction import reduction_notes
 from visualization.export import export_figure_to_bytes
 
 
 st.set_page_config(page_title="Data Viz LLM - Mistral Local", page_icon="📊", layout="wide")
 
+# Au-delà de cette taille, le CSV est lu par morceaux et l'app travaille sur un échantillon.
+# Doit rester sous server.maxUploadSize (.streamlit/config.toml, 200 Mo par défaut)
+STREAMING_THRESHOLD_BYTES = 100 * 1024 * 1024
+
+# Analyse + propositions: un seul appel au LLM, ou deux appels successifs
+ANALYSIS_MODES = ["Un appel (analyse + propositions)", "Deux appels", "Sans LLM (statistiques)"]
+
+# Modèle commun quand les étapes sont unifiées (évite de recharger un second modèle)
+UNIFIED_MODEL = STAGE_MODELS["proposal"]
+
 
 def init_session():
     """Init session state"""
-    for key in ['df', 'df_info', 'analysis', 'proposals', 'selected_proposal', 'final_figure']:
+    for key in ['df', 'df_info', 'dataset', 'local_dataset', 'analysis', 'proposals', 'selected_proposal', 'final_figure', 'final_png', 'from_cache', 'prompt_tokens', 'dataset_key', 'upload_key', 'incremental', 'append_key', 'local_rows']:
         if key not in st.session_state:
             st.session_state[key] = None
 
 
+def use_dataframe(df):
+    """Dataset en mémoire (exemple ou upload), auquel on peut ajouter des lignes"""
+    st.session_state.df = df
+    st.session_state.dataset = None
+    st.session_state.local_dataset = None
+    st.session_state.incremental = IncrementalDataset(df)
+
+
+def get_pregenerator(ollama_url, sandbox=None, unified_model=None):
+    """Pré-générateur de la session (recréé si l'URL Ollama, le mode d'exécution ou le modèle change)"""
+    pregen = st.session_state.get('pregen')
+    if (pregen is None or pregen.base_url != ollama_url or pregen.sandbox is not sandbox
+            or pregen.unified_model != unified_model):
+        if pregen is not None:
+            pregen.shutdown()
+        pregen = Pregenerator(ollama_url, sandbox=sandbox, unified_model=unified_model)
+        st.session_state.pregen = pregen
+    return pregen
+
+
+def current_df():
+    """DataFrame complet: les lots ajoutés ne sont concaténés qu'à la première utilisation"""
+    incremental = st.session_state.incremental
+    if incremental is not None and incremental.n_appends:
+        return incremental.df
+    return st.session_state.df
+
+
+def plot_source(proposal):
+    """Données à tracer pour une proposition (chargées à la demande pour un dataset serveur ou complété)"""
+    local_dataset = st.session_state.local_dataset
+    if local_dataset is None:
+        incremental = st.session_state.incremental
+        if incremental is not None and incremental.n_appends:
+            return lambda: incremental.df
+        return st.session_state.df
+    # Dataset complet, limité aux colonnes de la proposition
+    used = [proposal.get(k) for k in ('x_axis', 'y_axis', 'color')]
+    used = [c for c in used if c in local_dataset.columns]
+    return lambda: local_dataset.read(columns=used or None)
+
+
+def current_dataset_key():
+    """Empreinte des données tracées: fichiers serveur (sans les lire), dataset complété ou DataFrame chargé"""
+    local_dataset = st.session_state.local_dataset
+    if local_dataset is not None:
+        return local_dataset.fingerprint
+    incremental = st.session_state.incremental
+    if incremental is not None:
+        # Empreinte chaînée lot par lot: rien n'est rehaché
+        return incremental.key
+    return dataset_fingerprint(st.session_state.df)
+
+
+def render_proposal_card(prop):
+    """Carte d'une proposition de visualisation"""
+    st.subheader(f"Option {prop['id']}")
+    st.write(f"**{prop['type']}**")
+    st.write(f"📊 {prop['title']}")
+    st.write(f"X: {prop['x_axis']}")
+    st.write(f"Y: {prop['y_axis']}")
+
+
 def main():
     init_session()
     
@@ -41,6 +128,65 @@ def main():
         ollama_url = st.text_input("URL Ollama", value="http://localhost:11434")
         st.success("✅ Mistral local (pas de clé API)")
         st.info("Assurez-vous qu'Ollama est lancé:\n```bash\nollama serve\nollama run mistral\n```")
+
+        cache_stats = get_default_cache().stats()
+        st.caption(f"Cache datasets: {cache_stats['hits']} hits / {cache_stats['misses']} misses")
+        if cache_stats['write_errors']:
+            st.caption(f"Mise en cache impossible ({cache_stats['write_errors']}x): {cache_stats['last_write_error']}")
+        # Modèles chargés en arrière-plan dès le démarrage, maintenus en mémoire.
+        # Le manager est partagé par le processus: le choix du modèle reste dans la session
+        model_manager = get_model_manager(ollama_url)
+        unified = st.checkbox("Un seul modèle pour toutes les étapes", value=False, key="unified")
+        unified_model = UNIFIED_MODEL if unified else None
+        model_manager.preload_async(model_manager.models(unified_model))
+        for model, latency in model_manager.stats().items():
+            cold, warm = latency['cold_median_ms'], latency['warm_median_ms']
+            st.caption(
+                f"{model}: à froid {f'{cold / 1000:.1f}s' if cold else '-'}, "
+                f"à chaud {f'{warm / 1000:.1f}s' if warm else '-'}"
+            )
+        if model_manager.last_preload_error:
+            st.caption(f"Préchargement impossible (nouvel essai au prochain rerun): {model_manager.last_preload_error}")
+        
+        # Code du LLM exécuté hors du serveur, avec limites de temps CPU et de mémoire.
+        # Réglage du serveur (DATAVIZ_SANDBOX), pas de l'utilisateur
+        sandbox = get_sandbox() if sandbox_enabled() else None
+        if sandbox is None:
+            st.caption("⚠️ Code du LLM exécuté dans le processus du serveur (DATAVIZ_SANDBOX=0)")
+        pregen = get_pregenerator(ollama_url, sandbox, unified_model)
+        if sandbox is not None:
+            sandbox_stats = sandbox.stats()
+            if sandbox_stats['runs']:
+                st.caption(
+                    f"Exécutions isolées: {sandbox_stats['runs']}, dont {sandbox_stats['timeouts']} "
+                    f"hors délai et {sandbox_stats['memory_errors']} hors mémoire"
+                )
+        analysis_mode = st.radio("Mode d'analyse", ANALYSIS_MODES)
+        use_llm_cache = st.checkbox("Réutiliser les réponses du LLM (cache)", value=True)
+        llm_cache_stats = get_response_cache().stats()
+        st.caption(f"Cache LLM: {llm_cache_stats['hits']} hits / {llm_cache_stats['misses']} misses")
+        client_stats = get_client(ollama_url).stats()
+        st.caption(
+            f"Ollama: {client_stats['requests']} requêtes sur "
+            f"{client_stats['connections']} connexion(s), {client_stats['reuse_rate']:.0%} réutilisées"
+        )
+        memo_stats = get_visualization_memo().stats()
+        if memo_stats['hits'] + memo_stats['misses']:
+            st.caption(
+                f"Visualisations mémorisées: {memo_stats['figures']} figure(s), "
+                f"{memo_stats['hit_rate']:.0%} servies sans exécution"
+            )
+        template_stats = get_template_stats().stats()
+        if template_stats['hits'] + template_stats['misses']:
+            st.caption(
+                f"Code par template: {template_stats['hits']}/{template_stats['hits'] + template_stats['misses']} "
+                f"({template_stats['hit_rate']:.0%}) sans appel au LLM"
+            )
+        for name, parse in get_parse_stats().stats().items():
+            st.caption(
+                f"JSON {name}: {parse['failure_rate']:.0%} invalides, {parse['repaired']} réparés, "
+                f"{parse['failed']} perdus ({parse['wasted_ms'] / 1000:.1f}s de génération)"
+            )
     
     # 1. Upload CSV
     st.header("1️⃣ Données")
@@ -49,28 +195,116 @@ def main():
     col1, col2, col3 = st.columns(3)
     with col1:
         if st.button("Exemple: Immobilier"):
-            st.session_state.df = pd.read_csv("examples/example1_housing.csv")
+            use_dataframe(load_csv_cached("examples/example1_housing.csv", compact=True))
     with col2:
         if st.button("Exemple: Ventes"):
-            st.session_state.df = pd.read_csv("examples/example2_sales.csv")
+            use_dataframe(load_csv_cached("examples/example2_sales.csv", compact=True))
     with col3:
         if st.button("Exemple: Climat"):
-            st.session_state.df = pd.read_csv("examples/example3_climate.csv")
+            use_dataframe(load_csv_cached("examples/example3_climate.csv", compact=True))
     
-    if uploaded:
-        st.session_state.df = load_csv(uploaded)
+    # Fichiers déjà présents sur le serveur (sous DATA_ROOT uniquement): pas de copie via le navigateur
+    data_root = get_data_root()
+    server_paths = list_local_datasets(data_root) if data_root is not None else []
+    if server_paths:
+        server_path = st.selectbox(
+            "Ou dataset sur le serveur (CSV, Parquet ou répertoire partitionné)", server_paths, index=None
+        )
+        if server_path and st.button("Ouvrir"):
+            try:
+                local_dataset = open_local_dataset(server_path, root=data_root)
+                st.session_state.df = local_dataset.preview()
+                # Compté une fois à l'ouverture (parcours complet pour un CSV)
+                st.session_state.local_rows = local_dataset.count_rows()
+                st.session_state.local_dataset = local_dataset
+                st.session_state.dataset = None
+                st.session_state.incremental = None
+            except Exception as e:
+                st.error(f"❌ {e}")
+    
+    # Un même upload n'est lu qu'une fois, pas à chaque rerun
+    upload_key = (uploaded.file_id, uploaded.size) if uploaded else None
+    if uploaded and upload_key != st.session_state.upload_key:
+        if uploaded.size > STREAMING_THRESHOLD_BYTES:
+            # Gros fichier: lecture par morceaux, profil exact + échantillon de travail
+            st.session_state.dataset = load_csv_chunked(uploaded)
+            st.session_state.df = st.session_state.dataset.sample
+            st.session_state.local_dataset = None
+            st.session_state.incremental = None
+        else:
+            use_dataframe(load_csv_cached(uploaded, compact=True))
+        st.session_state.upload_key = upload_key
     
     if st.session_state.df is not None:
-        is_valid, errors = validate_dataframe(st.session_state.df)
-        if not is_valid:
-            st.error("❌ " + ", ".join(errors))
-            st.stop()
+        incremental = st.session_state.incremental
+        # Lignes ajoutées: déjà validées lot par lot, le dataset complet n'est pas reparcouru
+        if incremental is None or not incremental.n_appends:
+            is_valid, errors = validate_dataframe(st.session_state.df)
+            if not is_valid:
+                st.error("❌ " + ", ".join(errors))
+                st.stop()
+        
+        dataset = st.session_state.dataset
+        local_dataset = st.session_state.local_dataset
+        if dataset is not None:
+            st.session_state.df_info = dataset.get_info()
+            st.success(f"✅ {dataset.shape[0]} lignes, {dataset.shape[1]} colonnes")
+            st.info(f"Fichier volumineux: échantillon de travail de {len(st.session_state.df)} lignes")
+        elif local_dataset is not None:
+            st.session_state.df_info = get_dataframe_info(st.session_state.df)
+            st.success(f"✅ {st.session_state.local_rows} lignes, {len(local_dataset.columns)} colonnes")
+            st.info(
+                f"Fichier serveur: profil calculé sur les {len(st.session_state.df)} premières lignes, "
+                "seules les colonnes utilisées sont lues pour la visualisation"
+            )
+        elif incremental is not None:
+            # Profil exact au chargement, mis à jour à partir des seuls lots ajoutés
+            st.session_state.df_info = incremental.get_info()
+            n_rows, n_cols = st.session_state.df_info["shape"]
+            st.success(f"✅ {n_rows} lignes, {n_cols} colonnes")
+            if incremental.n_appends:
+                st.caption(f"{incremental.n_appends} lot(s) ajouté(s) depuis le chargement")
+            
+            with st.expander("➕ Ajouter des lignes"):
+                batch_file = st.file_uploader("CSV des nouvelles lignes (mêmes colonnes)", type=['csv'], key="append_upload")
+                append_key = (batch_file.file_id, batch_file.size) if batch_file else None
+                if batch_file and append_key != st.session_state.append_key:
+                    st.session_state.append_key = append_key
+                    try:
+                        appended, errors = incremental.append(load_csv(batch_file))
+                    except (TypeError, ValueError) as e:
+                        appended, errors = False, [str(e)]
+                    if appended:
+                        # st.session_state.df garde les données chargées: concaténation à la demande (current_df)
+                        st.rerun()
+                    st.error("❌ Lot rejeté: " + ", ".join(errors))
+        else:
+            st.session_state.df_info = get_dataframe_info(st.session_state.df)
+            st.success(f"✅ {st.session_state.df.shape[0]} lignes, {st.session_state.df.shape[1]} colonnes")
         
-        st.session_state.df_info = get_dataframe_info(st.session_state.df)
-        st.success(f"✅ {st.session_state.df.shape[0]} lignes, {st.session_state.df.shape[1]} colonnes")
+        # Nouveau dataset: les figures mémorisées de l'ancien ne serviront plus
+        dataset_key = current_dataset_key()
+        if st.session_state.dataset_key not in (None, dataset_key):
+            get_visualization_memo().invalidate(dataset_key=st.session_state.dataset_key)
+        st.session_state.dataset_key = dataset_key
         
         with st.expander("Aperçu"):
             st.dataframe(st.session_state.df.head())
+
+            sniff = st.session_state.df.attrs.get("sniff")
+            if sniff:
+                st.caption(
+                    f"Lecture: encodage {sniff['encoding']}, séparateur {sniff['delimiter']!r}, "
+                    f"décimale {sniff['decimal']!r} (détecté en {sniff['elapsed_ms']:.1f} ms)"
+                )
+
+            compaction = st.session_state.df.attrs.get("compaction")
+            if compaction:
+                st.caption(
+                    f"Mémoire: {compaction['memory_before'] / 1024:.0f} Ko → "
+                    f"{compaction['memory_after'] / 1024:.0f} Ko "
+                    f"({len(compaction['conversions'])} colonnes compactées)"
+                )
         
         # 2. Question
         st.header("2️⃣ Problématique")
@@ -82,15 +316,102 @@ def main():
             else:
                 with st.spinner("Analyse en cours..."):
                     try:
-                        analyzer = DataVizAnalyzer(ollama_url)
-                        st.session_state.analysis = analyzer.analyze_question(
-                            question, st.session_state.df, st.session_state.df_info
-                        )
+                        # Les préparations de l'analyse précédente sont abandonnées
+                        pregen.cancel()
+                        combined_mode = analysis_mode == ANALYSIS_MODES[0]
+                        offline_mode = analysis_mode == ANALYSIS_MODES[2]
+                        # Réponse statistique immédiate: mode hors ligne, ou aperçu pendant que le LLM répond
+                        heuristic = HeuristicProposer()
+                        instant = heuristic.propose(current_df(), st.session_state.df_info, question)
                         
-                        proposer = VizProposer(ollama_url)
-                        st.session_state.proposals = proposer.propose_visualizations(
-                            question, st.session_state.df_info, st.session_state.analysis
-                        )
+                        if offline_mode:
+                            st.session_state.analysis = heuristic_analysis(instant)
+                            st.session_state.proposals = instant
+                            st.session_state.from_cache = False
+                            st.session_state.prompt_tokens = None
+                            for prop in instant:
+                                pregen.submit(
+                                    prop, st.session_state.df_info, plot_source(prop),
+                                    use_cache=use_llm_cache, dataset_key=dataset_key
+                                )
+                        else:
+                            if combined_mode:
+                                combined = CombinedAnalyzer(ollama_url, model=unified_model)
+                                models = ("combined", combined.model)
+                            else:
+                                analyzer = DataVizAnalyzer(ollama_url, model=unified_model)
+                                proposer = VizProposer(ollama_url, model=unified_model)
+                                models = (analyzer.model, proposer.model)
+                            # Même schéma + même question: résultat déjà validé, sans appel au LLM
+                            fingerprint = question_fingerprint(st.session_state.df_info, question, *models)
+                            stored = get_result_store().get(fingerprint) if use_llm_cache else None
+                        
+                            if stored is not None:
+                                st.session_state.analysis = stored["analysis"]
+                                st.session_state.proposals = stored["proposals"]
+                                st.session_state.from_cache = True
+                                for prop in stored["proposals"]:
+                                    pregen.submit(
+                                        prop, st.session_state.df_info, plot_source(prop),
+                                        use_cache=use_llm_cache, dataset_key=dataset_key
+                                    )
+                            else:
+                                # Chaque carte s'affiche dès que sa proposition est complète
+                                streaming_area = st.empty()
+                                proposals = []
+                                with streaming_area.container():
+                                    st.header("3️⃣ Propositions")
+                                    card_slots = [col.empty() for col in st.columns(3)]
+                                    # Aperçu statistique, remplacé carte par carte par les propositions du LLM
+                                    for slot, prop in zip(card_slots, instant):
+                                        with slot.container():
+                                            render_proposal_card(prop)
+                                            st.caption(f"Aperçu statistique ({heuristic.last_elapsed_ms:.0f} ms)")
+                                    
+                                    if combined_mode:
+                                        proposal_stream = combined.stream(
+                                            question, st.session_state.df_info, use_cache=use_llm_cache,
+                                            df=current_df()
+                                        )
+                                    else:
+                                        st.session_state.analysis = analyzer.analyze_question(
+                                            question, current_df(), st.session_state.df_info,
+                                            use_cache=use_llm_cache
+                                        )
+                                        proposal_stream = proposer.stream_proposals(
+                                            question, st.session_state.df_info, st.session_state.analysis,
+                                            use_cache=use_llm_cache, df=current_df()
+                                        )
+                                    for prop in proposal_stream:
+                                        # Code, figure et miniature préparés pendant que les suivantes arrivent
+                                        pregen.submit(
+                                            prop, st.session_state.df_info, plot_source(prop),
+                                            use_cache=use_llm_cache, dataset_key=dataset_key
+                                        )
+                                        with card_slots[len(proposals)].container():
+                                            render_proposal_card(prop)
+                                        proposals.append(prop)
+                                # Les cartes définitives (avec bouton) sont rendues à l'étape 3
+                                streaming_area.empty()
+                                st.session_state.proposals = proposals
+                            
+                                if combined_mode:
+                                    st.session_state.analysis = combined.last_analysis
+                                    st.session_state.from_cache = combined.last_from_cache
+                                    st.session_state.prompt_tokens = [combined.last_prompt_tokens]
+                                    fallback = combined.last_fallback
+                                    llm_count = combined.last_valid_count
+                                else:
+                                    st.session_state.from_cache = analyzer.last_from_cache and proposer.last_from_cache
+                                    st.session_state.prompt_tokens = [analyzer.last_prompt_tokens, proposer.last_prompt_tokens]
+                                    fallback = analyzer.last_fallback or proposer.last_fallback
+                                    llm_count = proposer.last_valid_count
+                                # Réutilisé pour tout dataset de même schéma: seulement si tout vient du LLM
+                                # (les propositions statistiques de complément dépendent des valeurs)
+                                if not fallback and llm_count >= len(proposals):
+                                    get_result_store().put(
+                                        fingerprint, st.session_state.analysis, st.session_state.proposals
+                                    )
                         
                         st.success("✅ 3 propositions générées")
                     except Exception as e:
@@ -100,15 +421,26 @@ def main():
         # 3. Propositions
         if st.session_state.proposals:
             st.header("3️⃣ Propositions")
+            if st.session_state.from_cache:
+                st.caption("⚡ Analyse et propositions servies depuis le cache")
+            elif st.session_state.prompt_tokens:
+                tokens = [t for t in st.session_state.prompt_tokens if t]
+                st.caption(
+                    "Prompt: " + " + ".join(
+                        f"{t['actual'] if t['actual'] is not None else '~' + str(t['estimated'])} tokens"
+                        for t in tokens
+                    )
+                )
             
             cols = st.columns(3)
             for idx, prop in enumerate(st.session_state.proposals[:3]):
                 with cols[idx]:
-                    st.subheader(f"Option {prop['id']}")
-                    st.write(f"**{prop['type']}**")
-                    st.write(f"📊 {prop['title']}")
-                    st.write(f"X: {prop['x_axis']}")
-                    st.write(f"Y: {prop['y_axis']}")
+                    render_proposal_card(prop)
+                    ready = pregen.get(prop, dataset_key)
+                    if ready is not None and ready.thumbnail:
+                        st.image(ready.thumbnail)
+                    elif ready is not None and ready.error:
+                        st.caption("⚠️ Préparation impossible, visualisation de secours")
                     
                     if st.button(f"Sélectionner", key=f"sel_{idx}"):
                         st.session_state.selected_proposal = prop
@@ -120,48 +452,61 @@ def main():
             
             with st.spinner("Génération..."):
                 try:
-                    generator = CodeGenerator(ollama_url)
-                    code = generator.generate_plot_code(
-                        st.session_state.selected_proposal,
-                        st.session_state.df_info
-                    )
-                    
-                    plotter = VisualizationPlotter()
-                    fig = plotter.execute_plot_code(code, st.session_state.df)
+                    # Déjà préparée en arrière-plan ou mémorisée le plus souvent: résultat immédiat
+                    proposal = st.session_state.selected_proposal
+                    regenerate = st.session_state.pop('regenerate', False)
+                    result = pregen.submit(
+                        proposal, st.session_state.df_info, plot_source(proposal),
+                        use_cache=use_llm_cache and not regenerate, dataset_key=dataset_key
+                    ).result()
+                    if result.error:
+                        st.warning(f"Visualisation de secours ({result.error})")
+                    elif result.from_memo:
+                        st.caption("⚡ Visualisation mémorisée (ni génération ni exécution)")
+                    elif result.from_template:
+                        st.caption("⚡ Code issu d'un template (sans appel au LLM)")
+                    elif result.from_cache:
+                        st.caption("⚡ Code servi depuis le cache")
+                    fig = result.figure
+                    notes = reduction_notes(fig)
+                    if notes:
+                        st.caption("Affichage allégé côté serveur: " + "; ".join(notes))
                     
-                    if fig is None:
-                        fig = plotter.create_fallback_visualization(
-                            st.session_state.df,
-                            st.session_state.selected_proposal['x_axis'],
-                            st.session_state.selected_proposal['y_axis'],
-                            st.session_state.selected_proposal['title']
-                        )
-                    
-                    st.session_state.final_figure = fig
+                    if fig is not st.session_state.final_figure:
+                        st.session_state.final_figure = fig
+                        # Export PNG une seule fois par figure, pas à chaque rerun
+                        try:
+                            st.session_state.final_png = export_figure_to_bytes(fig)
+                        except:
+                            st.session_state.final_png = None
                 except Exception as e:
                     st.error(f"Erreur: {e}")
             
             if st.session_state.final_figure:
                 st.plotly_chart(st.session_state.final_figure, use_container_width=True)
                 
-                try:
-                    img_bytes = export_figure_to_bytes(st.session_state.final_figure)
-                    if img_bytes:
-                        st.download_button(
-                            "⬇️ Télécharger PNG",
-                            data=img_bytes,
-                            file_name="visualization.png",
-                            mime="image/png",
-                            type="primary"
-                        )
-                except:
-                    pass
+                if st.session_state.final_png:
+                    st.download_button(
+                        "⬇️ Télécharger PNG",
+                        data=st.session_state.final_png,
+                        file_name="visualization.png",
+                        mime="image/png",
+                        type="primary"
+                    )
                 
-                if st.button("🔄 Nouvelle analyse"):
-                    for key in ['analysis', 'proposals', 'selected_proposal', 'final_figure']:
-                        st.session_state[key] = None
-                    st.rerun()
-
+                col_regen, col_new = st.columns(2)
+                with col_regen:
+                    # Invalidation explicite: nouveau code (sans cache LLM) et nouvelle figure
+                    if st.button("🔁 Régénérer"):
+                        get_visualization_memo().invalidate(proposal_key=proposal_key(proposal))
+                        pregen.discard(proposal, dataset_key)
+                        st.session_state.regenerate = True
+                        st.rerun()
+                with col_new:
+                    if st.button("🔄 Nouvelle analyse"):
+                        for key in ['analysis', 'proposals', 'selected_proposal', 'final_figure', 'final_png', 'from_cache', 'prompt_tokens']:
+                            st.session_state[key] = None
+                        st.rerun()
 
 if __name__ == "__main__":
     main()
@@ -2,29 +2,44 @@
 Analyse de problématique via Ollama Mistral (Local)
 """
 
-import requests
 import pandas as pd
-import json
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+
+from .client import OllamaClient, get_client
+from .models import get_model_manager
+from .prompt_builder import PromptBuilder, prompt_tokens
+from .schemas import analysis_schema, generate_structured
 
 
 class DataVizAnalyzer:
     """Analyseur avec Ollama Mistral local"""
     
-    def __init__(self, base_url: str = "http://localhost:11434"):
+    def __init__(self, base_url: str = "http://localhost:11434", client: Optional[OllamaClient] = None, model: Optional[str] = None):
         self.base_url = base_url
-        self.model = "mistral"
+        # Modèle de l'étape, ou modèle unique si toutes les étapes sont unifiées
+        self.model = model or get_model_manager(base_url).model_for("analysis")
+        self.client = client or get_client(base_url)
+        # Vrai si la dernière réponse vient du cache
+        self.last_from_cache = False
+        # Vrai si le dernier résultat est le repli par défaut (LLM indisponible...)
+        self.last_fallback = False
+        self.prompt_builder = PromptBuilder()
+        # Tokens du dernier prompt (estimation et compte d'Ollama)
+        self.last_prompt_tokens: Optional[Dict[str, Optional[int]]] = None
     
-    def analyze_question(self, question: str, df: pd.DataFrame, df_info: Dict[str, Any]) -> Dict[str, Any]:
-        """Analyse la question avec Mistral local"""
+    def analyze_question(self, question: str, df: pd.DataFrame, df_info: Dict[str, Any], use_cache: bool = True) -> Dict[str, Any]:
+        """Analyse la question avec Mistral local (use_cache=False force un nouvel appel)"""
+        self.last_from_cache = False
+        self.last_fallback = False
         
+        columns = self.prompt_builder.columns(df_info, question)
         prompt = f"""Analyse cette problématique et ce dataset.
 
 PROBLÉMATIQUE: "{question}"
 
 COLONNES:
-Numériques: {', '.join(df_info.get('numeric_columns', []))}
-Catégorielles: {', '.join(df_info.get('categorical_columns', []))}
+Numériques: {', '.join(columns.numeric)}
+Catégorielles: {', '.join(columns.categorical)}{columns.note()}
 
 Réponds en JSON uniquement:
 {{
@@ -33,24 +48,24 @@ Réponds en JSON uniquement:
   "suggested_focus": "Description courte"
 }}"""
         
+        self.last_prompt_tokens = prompt_tokens(prompt)
         try:
-            response = requests.post(
-                f"{self.base_url}/api/generate",
-                json={"model": self.model, "prompt": prompt, "stream": False},
-                timeout=30
+            result = generate_structured(
+                self.client, self.model, prompt, analysis_schema(columns.included),
+                "analysis", use_cache=use_cache
             )
-            content = response.json()["response"]
-            
-            # Extraire le JSON de la réponse
-            start = content.find('{')
-            end = content.rfind('}') + 1
-            if start != -1 and end != 0:
-                content = content[start:end]
-            
-            return json.loads(content)
-        except:
-            return {
-                "analytical_goal": "exploration",
-                "key_variables": df_info["columns"][:3],
-                "suggested_focus": "Analyse exploratoire"
-            }
+            self.last_from_cache = result.from_cache
+            self.last_prompt_tokens = prompt_tokens(prompt, result.generation.metadata)
+            return result.value
+        except Exception:
+            # LLM indisponible, ou réponse non conforme même après réparation
+            self.last_fallback = True
+            return self._get_default_analysis(df_info)
+    
+    def _get_default_analysis(self, df_info: Dict[str, Any]) -> Dict[str, Any]:
+        """Analyse par défaut (LLM indisponible ou réponse illisible)"""
+        return {
+            "analytical_goal": "exploration",
+            "key_variables": df_info["columns"][:3],
+            "suggested_focus": "Analyse exploratoire"
+        }
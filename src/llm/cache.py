@@ -0,0 +1,176 @@
+"""
+Cache disque des réponses du LLM
+Clé = modèle + prompt + options de génération, stockage SQLite, TTL et éviction LRU
+"""
+
+import hashlib
+import json
+import sqlite3
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+
+DEFAULT_CACHE_PATH = Path(tempfile.gettempdir()) / "dataviz_cache" / "llm_responses.sqlite"
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+DEFAULT_MAX_BYTES = 64 * 1024 ** 2
+
+
+def response_key(model: str, prompt: str, options: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Empreinte d'une requête de génération
+
+    Args:
+        model: Nom du modèle
+        prompt: Prompt complet
+        options: Options de génération (température, format...)
+
+    Returns:
+        Empreinte hexadécimale
+    """
+    payload = json.dumps(
+        {"model": model, "prompt": prompt, "options": options or {}},
+        sort_keys=True, ensure_ascii=False, default=str,
+    )
+    return hashlib.blake2b(payload.encode(), digest_size=20).hexdigest()
+
+
+class ResponseCache:
+    """Cache LRU borné en taille de réponses texte, avec expiration"""
+
+    def __init__(
+        self,
+        path: Optional[Path] = None,
+        ttl_seconds: Optional[float] = DEFAULT_TTL_SECONDS,
+        max_bytes: int = DEFAULT_MAX_BYTES
+    ):
+        """
+        Args:
+            path: Fichier SQLite (défaut: temp/dataviz_cache/llm_responses.sqlite)
+            ttl_seconds: Durée de validité d'une réponse (None: illimitée)
+            max_bytes: Taille maximale cumulée des réponses
+        """
+        self.path = Path(path) if path else DEFAULT_CACHE_PATH
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Une connexion partagée entre les threads de Streamlit, protégée par le verrou
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                response TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created REAL NOT NULL,
+                accessed REAL NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Lit une réponse du cache
+
+        Returns:
+            Texte de la réponse ou None si absente ou expirée
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, created FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is not None and self.ttl_seconds is not None and now - row[1] > self.ttl_seconds:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                row = None
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            # Mise à jour de la date d'accès pour l'ordre LRU
+            self._conn.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+            self.hits += 1
+            return row[0]
+
+    def put(self, key: str, model: str, response: str):
+        """Stocke une réponse, puis applique la limite de taille"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model, response, len(response.encode()), now, now),
+            )
+            self._evict()
+
+    def _evict(self):
+        """Supprime les entrées expirées puis les moins récemment utilisées au-delà de max_bytes"""
+        if self.ttl_seconds is not None:
+            cursor = self._conn.execute(
+                "DELETE FROM responses WHERE created < ?", (time.time() - self.ttl_seconds,)
+            )
+            self.evictions += max(cursor.rowcount, 0)
+
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        for key, size in self._conn.execute(
+            "SELECT key, size FROM responses ORDER BY accessed"
+        ).fetchall():
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+            self.evictions += 1
+
+    def delete(self, key: str):
+        """Supprime une réponse"""
+        with self._lock:
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+
+    def clear(self):
+        """Vide le cache"""
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Compteurs du cache
+
+        Returns:
+            Dictionnaire hits, misses, evictions, entries, size_bytes, hit_rate
+        """
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": entries,
+            "size_bytes": size,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+_default_cache: Optional[ResponseCache] = None
+
+
+def get_response_cache() -> ResponseCache:
+    """Cache partagé par tout le processus"""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = ResponseCache()
+    return _default_cache
@@ -0,0 +1,314 @@
+"""
+Client HTTP partagé pour Ollama
+Une session requests par serveur: pool de connexions keep-alive et retries
+"""
+
+import json
+import threading
+import time
+import requests
+from dataclasses import dataclass, field
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from .cache import ResponseCache, get_response_cache, response_key
+
+
+DEFAULT_BASE_URL = "http://localhost:11434"
+DEFAULT_POOL_SIZE = 4
+DEFAULT_CONNECT_TIMEOUT = 5.0
+DEFAULT_READ_TIMEOUT = 30.0
+DEFAULT_RETRIES = 2
+DEFAULT_BACKOFF = 0.5
+# Erreurs transitoires: serveur en cours de démarrage ou surchargé
+RETRY_STATUSES = (429, 502, 503, 504)
+
+
+@dataclass
+class Generation:
+    """Réponse d'un appel /api/generate"""
+    text: str
+    model: str
+    from_cache: bool = False
+    elapsed_ms: float = 0.0
+    # Champs renvoyés par Ollama (durées, nombre de tokens...)
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+
+class GenerationStream:
+    """
+    Réponse streamée: itérable de morceaux de texte
+
+    text, metadata et elapsed_ms sont complets une fois le flux épuisé.
+    """
+
+    def __init__(self, model: str, chunks: Iterator[str], from_cache: bool = False):
+        self.model = model
+        self.from_cache = from_cache
+        self.text = ""
+        self.metadata: Dict[str, Any] = {}
+        self.elapsed_ms = 0.0
+        self._chunks = chunks
+
+    def __iter__(self) -> Iterator[str]:
+        start = time.perf_counter()
+        for chunk in self._chunks:
+            self.text += chunk
+            yield chunk
+        self.elapsed_ms = (time.perf_counter() - start) * 1000
+
+
+class OllamaClient:
+    """Client Ollama avec pool de connexions, timeouts et retries"""
+
+    def __init__(
+        self,
+        base_url: str = DEFAULT_BASE_URL,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+        read_timeout: float = DEFAULT_READ_TIMEOUT,
+        retries: int = DEFAULT_RETRIES,
+        backoff_factor: float = DEFAULT_BACKOFF,
+        cache: Optional[ResponseCache] = None
+    ):
+        """
+        Args:
+            base_url: URL du serveur Ollama
+            pool_size: Connexions conservées ouvertes (appels concurrents)
+            connect_timeout: Délai d'établissement de la connexion (s)
+            read_timeout: Délai de réponse du modèle (s)
+            retries: Nouvelles tentatives sur erreur transitoire
+            backoff_factor: Attente entre tentatives: backoff * 2^(n-1) s
+            cache: Cache des réponses (défaut: cache disque partagé)
+        """
+        self.base_url = base_url.rstrip('/')
+        self.cache = cache if cache is not None else get_response_cache()
+        self.timeout: Tuple[float, float] = (connect_timeout, read_timeout)
+
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=0,  # une génération interrompue n'est pas rejouée
+            status=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=frozenset({"GET", "POST"}),
+            raise_on_status=False,
+        )
+        self._adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("http://", self._adapter)
+        self.session.mount("https://", self._adapter)
+
+        # Durée de maintien en mémoire du modèle côté Ollama (ex: "30m"),
+        # hors clé de cache: elle ne change pas la réponse
+        self.keep_alive: Optional[str] = None
+        # Appelés après chaque génération servie par Ollama (pas par le cache)
+        self.listeners: List[Callable[[Generation], None]] = []
+
+        self._lock = threading.Lock()
+        self._calls = 0
+        self._errors = 0
+        self._listener_errors = 0
+        self.last_listener_error: Optional[str] = None
+
+    def _payload(self, model: str, prompt: str, stream: bool, options: Dict[str, Any]) -> Dict[str, Any]:
+        payload = {"model": model, "prompt": prompt, "stream": stream, **options}
+        if self.keep_alive is not None:
+            payload.setdefault("keep_alive", self.keep_alive)
+        return payload
+
+    def _notify(self, generation: Generation):
+        for listener in self.listeners:
+            try:
+                listener(generation)
+            except Exception as e:
+                with self._lock:
+                    self._listener_errors += 1
+                    self.last_listener_error = f"{type(e).__name__}: {e}"
+
+    def post(self, path: str, payload: Dict[str, Any], timeout: Optional[float] = None, **kwargs) -> requests.Response:
+        """
+        POST JSON sur l'API Ollama
+
+        Args:
+            path: Chemin de l'endpoint (ex: "/api/generate")
+            payload: Corps JSON
+            timeout: Délai de réponse (s), remplace read_timeout
+
+        Returns:
+            Réponse HTTP (statut vérifié)
+        """
+        timeout = (self.timeout[0], timeout) if timeout is not None else self.timeout
+        with self._lock:
+            self._calls += 1
+        try:
+            response = self.session.post(f"{self.base_url}{path}", json=payload, timeout=timeout, **kwargs)
+            response.raise_for_status()
+            return response
+        except requests.RequestException:
+            with self._lock:
+                self._errors += 1
+            raise
+
+    def _cached(self, key: str, validate: Optional[Callable[[str], bool]]) -> Optional[str]:
+        """Réponse en cache, si elle est (toujours) valide; une réponse invalide est supprimée"""
+        cached = self.cache.get(key)
+        if cached is not None and validate is not None and not validate(cached):
+            self.cache.delete(key)
+            return None
+        return cached
+
+    def _store(self, key: str, model: str, text: str, validate: Optional[Callable[[str], bool]]):
+        """Met en cache une réponse, seulement si elle est valide"""
+        if validate is None or validate(text):
+            self.cache.put(key, model, text)
+
+    def generate(
+        self,
+        model: str,
+        prompt: str,
+        use_cache: bool = True,
+        validate: Optional[Callable[[str], bool]] = None,
+        **options
+    ) -> Generation:
+        """
+        Génération non streamée, servie par le cache si possible
+
+        Args:
+            model: Nom du modèle Ollama
+            prompt: Prompt complet
+            use_cache: Lire et alimenter le cache des réponses
+            validate: Contrôle de la réponse: seules les réponses valides
+                sont mises en cache (et servies depuis le cache)
+            **options: Champs supplémentaires de /api/generate (options,
+                format, system...), inclus dans la clé de cache
+
+        Returns:
+            Generation
+        """
+        start = time.perf_counter()
+        key = response_key(model, prompt, options)
+
+        if use_cache:
+            cached = self._cached(key, validate)
+            if cached is not None:
+                return Generation(cached, model, from_cache=True,
+                                  elapsed_ms=(time.perf_counter() - start) * 1000)
+
+        payload = self._payload(model, prompt, False, options)
+        data = self.post("/api/generate", payload).json()
+        text = data.pop("response")
+
+        if use_cache:
+            self._store(key, model, text, validate)
+
+        generation = Generation(text, model, elapsed_ms=(time.perf_counter() - start) * 1000, metadata=data)
+        self._notify(generation)
+        return generation
+
+    def stream_generate(
+        self,
+        model: str,
+        prompt: str,
+        use_cache: bool = True,
+        validate: Optional[Callable[[str], bool]] = None,
+        **options
+    ) -> "GenerationStream":
+        """
+        Génération streamée (flux NDJSON d'Ollama)
+
+        Le texte complet est mis en cache en fin de flux; un hit du cache
+        est renvoyé en un seul morceau. Même clé de cache que generate().
+
+        Args:
+            model: Nom du modèle Ollama
+            prompt: Prompt complet
+            use_cache: Lire et alimenter le cache des réponses
+            validate: Contrôle du texte complet (voir generate)
+            **options: Champs supplémentaires de /api/generate
+
+        Returns:
+            GenerationStream, à itérer pour obtenir les morceaux
+        """
+        key = response_key(model, prompt, options)
+        cached = self._cached(key, validate) if use_cache else None
+        if cached is not None:
+            return GenerationStream(model, iter([cached]), from_cache=True)
+
+        def chunks() -> Iterator[str]:
+            start = time.perf_counter()
+            payload = self._payload(model, prompt, True, options)
+            with self.post("/api/generate", payload, stream=True) as response:
+                for line in response.iter_lines():
+                    if not line:
+                        continue
+                    data = json.loads(line)
+                    if data.get("error"):
+                        raise requests.RequestException(data["error"])
+                    token = data.pop("response", "")
+                    if token:
+                        yield token
+                    if data.get("done"):
+                        stream.metadata = data
+                        break
+            if use_cache:
+                self._store(key, model, stream.text, validate)
+            self._notify(Generation(stream.text, model, elapsed_ms=(time.perf_counter() - start) * 1000,
+                                    metadata=stream.metadata))
+
+        stream = GenerationStream(model, chunks())
+        return stream
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Réutilisation des connexions
+
+        Returns:
+            Dictionnaire calls, errors, listener_errors, requests (tentatives
+            comprises), connections (connexions TCP ouvertes), reused et reuse_rate
+        """
+        requests_sent = connections = 0
+        pools = self._adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is not None:
+                requests_sent += pool.num_requests
+                connections += pool.num_connections
+
+        reused = max(requests_sent - connections, 0)
+        return {
+            "calls": self._calls,
+            "errors": self._errors,
+            "listener_errors": self._listener_errors,
+            "requests": requests_sent,
+            "connections": connections,
+            "reused": reused,
+            "reuse_rate": reused / requests_sent if requests_sent else 0.0,
+        }
+
+    def close(self):
+        self.session.close()
+
+
+_clients: Dict[str, OllamaClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(base_url: str = DEFAULT_BASE_URL, **kwargs) -> OllamaClient:
+    """
+    Client partagé par tout le processus pour un serveur donné
+
+    Args:
+        base_url: URL du serveur Ollama
+        **kwargs: Options d'OllamaClient, utilisées à la première création
+
+    Returns:
+        OllamaClient
+    """
+    key = base_url.rstrip('/')
+    with _clients_lock:
+        if key not in _clients:
+            _clients[key] = OllamaClient(key, **kwargs)
+        return _clients[key]
@@ -2,35 +2,50 @@
 Génération de code Plotly via Ollama Mistral
 """
 
-import requests
 import re
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+
+from .client import OllamaClient, get_client
+from .models import get_model_manager
+from .templates import render_template
 
 
 class CodeGenerator:
     """Générateur de code avec Mistral local"""
     
-    def __init__(self, base_url: str = "http://localhost:11434"):
+    def __init__(self, base_url: str = "http://localhost:11434", client: Optional[OllamaClient] = None, model: Optional[str] = None):
         self.base_url = base_url
-        self.model = "mistral-opt"
+        # Modèle de l'étape, ou modèle unique si toutes les étapes sont unifiées
+        self.model = model or get_model_manager(base_url).model_for("code")
+        self.client = client or get_client(base_url)
+        # Vrai si la dernière réponse vient du cache
+        self.last_from_cache = False
+        # Vrai si le dernier code vient d'un template (sans appel au LLM)
+        self.last_from_template = False
+        # Vrai si le dernier code est le code par défaut (LLM indisponible)
+        self.last_fallback = False
     
-    def generate_plot_code(self, proposal: Dict[str, Any], df_info: Dict[str, Any]) -> str:
-        """Génère le code Plotly"""
+    def generate_plot_code(self, proposal: Dict[str, Any], df_info: Dict[str, Any], use_cache: bool = True) -> str:
+        """
+        Génère le code Plotly (use_cache=False force un nouvel appel)
+        
+        Le LLM n'est appelé que si aucun template (llm.templates) ne
+        couvre la proposition.
+        """
+        self.last_from_cache = False
+        self.last_from_template = False
+        self.last_fallback = False
+        
+        code = render_template(proposal, df_info)
+        if code is not None:
+            self.last_from_template = True
+            return code
         
         viz_type = proposal.get('type', 'bar_chart')
         title = proposal.get('title', 'Visualisation')
         x_axis = proposal.get('x_axis')
         y_axis = proposal.get('y_axis')
         
-        # Pour les cas simples, utiliser directement le fallback
-        if y_axis == 'count' or viz_type == 'histogram':
-            return self._get_histogram_code(x_axis, title)
-        
-        # Détecter si besoin d'agrégation
-        categorical_cols = df_info.get('categorical_columns', [])
-        if x_axis in categorical_cols and y_axis != 'count':
-            return self._get_aggregation_code(x_axis, y_axis, title, viz_type)
-        
         # Essayer avec Mistral
         prompt = f"""Génère du code Python avec Plotly.
 
@@ -47,15 +62,13 @@ Code requis:
 Réponds UNIQUEMENT avec le code Python, sans markdown."""
         
         try:
-            response = requests.post(
-                f"{self.base_url}/api/generate",
-                json={"model": self.model, "prompt": prompt, "stream": False},
-                timeout=30
-            )
-            content = response.json()["response"]
+            generation = self.client.generate(self.model, prompt, use_cache=use_cache)
+            self.last_from_cache = generation.from_cache
+            content = generation.text
             code = self._extract_code(content)
             return code
         except:
+            self.last_fallback = True
             return self._get_default_code(x_axis, y_axis, title, viz_type)
     
     def _extract_code(self, content: str) -> str:
@@ -64,51 +77,6 @@ Réponds UNIQUEMENT avec le code Python, sans markdown."""
         content = re.sub(r'```\n?', '', content)
         return content.strip()
     
-    def _get_histogram_code(self, x: str, title: str) -> str:
-        """Code pour un histogram"""
-        return f'''import plotly.graph_objects as go
-
-def create_figure(df):
-    df_clean = df[['{x}']].dropna()
-    
-    fig = go.Figure()
-    fig.add_trace(go.Histogram(x=df_clean['{x}']))
-    
-    fig.update_layout(
-        title='{title}',
-        xaxis_title='{x}',
-        yaxis_title='Count',
-        template='plotly_white'
-    )
-    return fig
-'''
-    
-    def _get_aggregation_code(self, x: str, y: str, title: str, viz_type: str) -> str:
-        """Code pour agrégation (moyenne par catégorie)"""
-        trace_type = "Bar" if viz_type == "bar_chart" else "Scatter"
-        
-        return f'''import plotly.graph_objects as go
-
-def create_figure(df):
-    # Agrégation: moyenne de {y} par {x}
-    df_agg = df.groupby('{x}')['{y}'].mean().reset_index()
-    
-    fig = go.Figure()
-    fig.add_trace(go.{trace_type}(
-        x=df_agg['{x}'], 
-        y=df_agg['{y}'],
-        marker_color='steelblue'
-    ))
-    
-    fig.update_layout(
-        title='{title}',
-        xaxis_title='{x}',
-        yaxis_title='Moyenne de {y}',
-        template='plotly_white'
-    )
-    return fig
-'''
-    
     def _get_default_code(self, x: str, y: str, title: str, viz_type: str) -> str:
         """Code par défaut"""
         if viz_type == 'scatter_plot':
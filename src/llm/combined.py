@@ -0,0 +1,126 @@
+"""
+Analyse et propositions en un seul appel au LLM
+Alternative aux deux appels successifs DataVizAnalyzer + VizProposer
+"""
+
+import pandas as pd
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+
+from .analyzer import DataVizAnalyzer
+from .client import OllamaClient, get_client
+from .models import get_model_manager
+from .prompt_builder import ColumnContext, prompt_tokens
+from .schemas import combined_schema, conforms
+from .viz_proposer import VizProposer
+
+
+class CombinedAnalyzer:
+    """Objectif, variables clés et 3 propositions dans une seule réponse structurée"""
+    
+    def __init__(self, base_url: str = "http://localhost:11434", client: Optional[OllamaClient] = None, model: Optional[str] = None):
+        self.base_url = base_url
+        # Modèle de l'étape, ou modèle unique si toutes les étapes sont unifiées
+        self.model = model or get_model_manager(base_url).model_for("combined")
+        self.client = client or get_client(base_url)
+        # Validation et fallbacks partagés avec le mode en deux appels
+        self.analyzer = DataVizAnalyzer(base_url, client=self.client, model=self.model)
+        self.proposer = VizProposer(base_url, client=self.client, model=self.model)
+        self.last_analysis: Optional[Dict[str, Any]] = None
+    
+    @property
+    def last_from_cache(self) -> bool:
+        return self.proposer.last_from_cache
+    
+    @property
+    def last_fallback(self) -> bool:
+        return self.proposer.last_fallback or self.analyzer.last_fallback
+    
+    @property
+    def last_valid_count(self) -> int:
+        return self.proposer.last_valid_count
+    
+    @property
+    def last_prompt_tokens(self) -> Optional[Dict[str, Optional[int]]]:
+        return self.proposer.last_prompt_tokens
+    
+    def stream(
+        self,
+        question: str,
+        df_info: Dict[str, Any],
+        use_cache: bool = True,
+        df: Optional[pd.DataFrame] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Propositions validées émises au fil de la génération
+        
+        L'analyse, placée avant les propositions dans la réponse, est
+        disponible dans last_analysis une fois le flux épuisé.
+        
+        Yields:
+            Propositions (3 au plus)
+        """
+        self.last_analysis = None
+        self.analyzer.last_fallback = False
+        columns = self.proposer.prompt_builder.columns(df_info, question)
+        prompt = self._build_prompt(question, columns)
+        schema = combined_schema(columns.included)
+        self.proposer.last_prompt_tokens = prompt_tokens(prompt)
+        
+        yield from self.proposer.validate_stream(
+            lambda: self.client.stream_generate(
+                self.model, prompt, use_cache=use_cache, validate=conforms(schema), format=schema
+            ),
+            df_info, schema=schema, name="combined", use_cache=use_cache, question=question, df=df
+        )
+        
+        self.last_analysis = self._parse_analysis(self.proposer.last_structured, df_info)
+    
+    def analyze_and_propose(
+        self,
+        question: str,
+        df_info: Dict[str, Any],
+        use_cache: bool = True,
+        df: Optional[pd.DataFrame] = None
+    ) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+        """
+        Analyse la question et propose 3 visualisations en un appel
+        
+        Returns:
+            Tuple (analysis, proposals)
+        """
+        proposals = list(self.stream(question, df_info, use_cache=use_cache, df=df))
+        return self.last_analysis, proposals
+    
+    def _parse_analysis(self, result: Optional[Dict[str, Any]], df_info: Dict[str, Any]) -> Dict[str, Any]:
+        """Champs d'analyse de la réponse validée, analyse par défaut sinon"""
+        if result is None:
+            self.analyzer.last_fallback = True
+            return self.analyzer._get_default_analysis(df_info)
+        return {
+            "analytical_goal": result["analytical_goal"],
+            "key_variables": result["key_variables"],
+            "suggested_focus": result["suggested_focus"],
+        }
+    
+    def _build_prompt(self, question: str, columns: ColumnContext) -> str:
+        return f"""Analyse cette problématique puis propose 3 visualisations DIFFÉRENTES.
+
+PROBLÉMATIQUE: "{question}"
+COLONNES NUMÉRIQUES: {', '.join(columns.numeric)}
+COLONNES CATÉGORIELLES: {', '.join(columns.categorical)}{columns.note()}
+
+Types disponibles: bar_chart, scatter_plot, histogram, box_plot, line_chart (x temporel)
+
+IMPORTANT: Pour chaque visualisation, x_axis et y_axis doivent être des noms de colonnes valides (pas null, pas "None").
+
+Réponds en JSON uniquement:
+{{
+  "analytical_goal": "comparison ou trend_analysis ou distribution ou correlation",
+  "key_variables": ["var1", "var2"],
+  "suggested_focus": "Description courte",
+  "proposals": [
+    {{"id": 1, "type": "scatter_plot", "title": "Titre 1", "x_axis": "colonne1", "y_axis": "colonne2", "color": null, "rationale": "Pourquoi"}},
+    {{"id": 2, "type": "bar_chart", "title": "Titre 2", "x_axis": "colonne3", "y_axis": "colonne4", "color": null, "rationale": "Raison"}},
+    {{"id": 3, "type": "histogram", "title": "Titre 3", "x_axis": "colonne5", "y_axis": "count", "color": null, "rationale": "Raison"}}
+  ]
+}}"""
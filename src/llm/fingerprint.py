@@ -0,0 +1,115 @@
+"""
+Empreinte schéma + question
+Permet de réutiliser analyses et propositions validées d'un upload à l'autre
+"""
+
+import hashlib
+import json
+import re
+import unicodedata
+from typing import Any, Dict, Optional
+
+from .cache import DEFAULT_CACHE_PATH, ResponseCache
+
+
+DEFAULT_STORE_PATH = DEFAULT_CACHE_PATH.with_name("llm_results.sqlite")
+DEFAULT_STORE_TTL_SECONDS = 30 * 24 * 3600
+
+# Champs de df_info lus par les prompts et par la validation des propositions;
+# le contenu des lignes, lui, n'est jamais envoyé au LLM
+SCHEMA_FIELDS = ("columns", "numeric_columns", "categorical_columns")
+
+
+def normalize_question(question: str) -> str:
+    """
+    Forme canonique d'une question: minuscules, sans accents, espaces
+    et ponctuation finale normalisés
+    """
+    text = unicodedata.normalize("NFKD", question)
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    text = re.sub(r"\s+", " ", text.lower()).strip()
+    return text.rstrip(" ?!.;:")
+
+
+def schema_fingerprint(df_info: Dict[str, Any]) -> str:
+    """
+    Empreinte du schéma décrit par df_info
+
+    Args:
+        df_info: Informations retournées par get_dataframe_info
+
+    Returns:
+        Empreinte hexadécimale (change dès qu'une colonne est ajoutée,
+        renommée ou change de type de visualisation)
+    """
+    schema = {name: [str(col) for col in df_info.get(name, [])] for name in SCHEMA_FIELDS}
+    payload = json.dumps(schema, sort_keys=True, ensure_ascii=False)
+    return hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+
+
+def question_fingerprint(df_info: Dict[str, Any], question: str, *models: str) -> str:
+    """
+    Empreinte schéma + question normalisée + modèles utilisés
+
+    Args:
+        df_info: Informations retournées par get_dataframe_info
+        question: Problématique saisie
+        *models: Modèles ayant produit le résultat
+
+    Returns:
+        Empreinte hexadécimale
+    """
+    payload = json.dumps(
+        [schema_fingerprint(df_info), normalize_question(question), list(models)],
+        ensure_ascii=False,
+    )
+    return hashlib.blake2b(payload.encode(), digest_size=20).hexdigest()
+
+
+class ResultStore:
+    """
+    Résultats (analyse + propositions validées) indexés par empreinte
+
+    Stockage sur disque partagé par tous les utilisateurs du serveur.
+    Un schéma modifié donne une autre empreinte: les anciens résultats ne
+    sont plus servis et finissent évincés (TTL / LRU).
+    """
+
+    def __init__(self, cache: Optional[ResponseCache] = None):
+        """
+        Args:
+            cache: Stockage clé -> texte (défaut: fichier llm_results.sqlite)
+        """
+        self.cache = cache or ResponseCache(DEFAULT_STORE_PATH, ttl_seconds=DEFAULT_STORE_TTL_SECONDS)
+
+    def get(self, fingerprint: str) -> Optional[Dict[str, Any]]:
+        """
+        Returns:
+            Dictionnaire {"analysis", "proposals"} ou None
+        """
+        content = self.cache.get(fingerprint)
+        if content is None:
+            return None
+        try:
+            return json.loads(content)
+        except json.JSONDecodeError:
+            return None
+
+    def put(self, fingerprint: str, analysis: Dict[str, Any], proposals: Any):
+        """Mémorise une analyse et ses propositions validées"""
+        content = json.dumps({"analysis": analysis, "proposals": proposals}, ensure_ascii=False, default=str)
+        self.cache.put(fingerprint, "analysis+proposals", content)
+
+    def stats(self) -> Dict[str, Any]:
+        return self.cache.stats()
+
+
+_default_store: Optional[ResultStore] = None
+
+
+def get_result_store() -> ResultStore:
+    """Store partagé par tout le processus"""
+    global _default_store
+    if _default_store is None:
+        _default_store = ResultStore()
+    return _default_store
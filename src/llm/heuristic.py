@@ -0,0 +1,325 @@
+"""
+Propositions de visualisations sans LLM
+Classe les triplets (x, y, type) par statistiques vectorisées et mots-clés de la question
+"""
+
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .prompt_builder import name_matches, rank_columns, tokenize
+
+
+# Lignes échantillonnées pour les statistiques (stables bien avant 5000)
+DEFAULT_MAX_ROWS = 5000
+DEFAULT_MAX_NUMERIC = 30
+DEFAULT_MAX_CATEGORICAL = 15
+MAX_CATEGORIES = 50
+# Au-delà, les barres deviennent illisibles
+READABLE_CATEGORIES = 20
+
+# Intentions de la question (mots normalisés, sans accents, comparés par préfixe)
+TYPE_KEYWORDS = {
+    "scatter_plot": ("correl", "lien", "relation", "influen", "depend", "impact", "facteur", "fonction"),
+    "histogram": ("distribu", "repart", "frequen", "histogram"),
+    "box_plot": ("dispers", "variab", "ecart", "aberr", "outlier", "etendue"),
+    "bar_chart": ("compar", "moyen", "total", "plus", "moins", "categor", "classe", "meilleur"),
+}
+# Score statistique utilisé sans DataFrame (seulement df_info)
+NEUTRAL_SCORE = 0.3
+# Objectif analytique déduit du type de la meilleure proposition
+GOAL_BY_TYPE = {
+    "scatter_plot": "correlation",
+    "histogram": "distribution",
+    "box_plot": "distribution",
+    "bar_chart": "comparison",
+}
+
+
+@dataclass
+class Candidate:
+    """Visualisation candidate et son score"""
+    type: str
+    x_axis: str
+    y_axis: str
+    score: float
+    # Statistique qui justifie le score (asymétrie, r, part de variance), None sans DataFrame
+    stat: Optional[float] = None
+
+    @property
+    def title(self) -> str:
+        if self.type == "histogram":
+            return f"Distribution de {self.x_axis}"
+        if self.type == "scatter_plot":
+            return f"Relation entre {self.x_axis} et {self.y_axis}"
+        if self.type == "bar_chart":
+            return f"Moyenne de {self.y_axis} par {self.x_axis}"
+        return f"Distribution de {self.y_axis} par {self.x_axis}"
+
+    @property
+    def rationale(self) -> str:
+        if self.stat is None:
+            return {
+                "histogram": "Histogramme pour voir la distribution",
+                "scatter_plot": "Nuage de points pour explorer la relation",
+                "bar_chart": "Comparaison des moyennes par catégorie",
+            }.get(self.type, "Comparaison des distributions par catégorie")
+        if self.type == "histogram":
+            return f"Distribution {'asymétrique' if abs(self.stat) > 1 else 'à examiner'} (asymétrie {self.stat:.2f})"
+        if self.type == "scatter_plot":
+            return f"Corrélation r = {self.stat:.2f}"
+        return f"{self.stat:.0%} de la variance de {self.y_axis} expliquée par {self.x_axis}"
+
+    def to_proposal(self, proposal_id: int) -> Dict[str, Any]:
+        return {
+            "id": proposal_id,
+            "type": self.type,
+            "title": self.title,
+            "x_axis": self.x_axis,
+            "y_axis": self.y_axis,
+            "color": None,
+            "rationale": self.rationale,
+        }
+
+
+def _matrix(df: pd.DataFrame, columns: List[str]) -> np.ndarray:
+    """Colonnes numériques en float64, NaN remplacés par la moyenne"""
+    values = df[columns].to_numpy(dtype=float, na_value=np.nan)
+    missing = np.isnan(values)
+    counts = np.maximum((~missing).sum(axis=0), 1)
+    means = np.where(missing, 0.0, values).sum(axis=0) / counts
+    return np.where(missing, means, values)
+
+
+def correlations(values: np.ndarray) -> np.ndarray:
+    """Matrice des corrélations de Pearson (0 pour les colonnes constantes)"""
+    centered = values - values.mean(axis=0)
+    norms = np.sqrt((centered ** 2).sum(axis=0))
+    norms = np.where(norms > 0, norms, np.inf)
+    return (centered.T @ centered) / np.outer(norms, norms)
+
+
+def skewness(values: np.ndarray) -> np.ndarray:
+    """Asymétrie (moment d'ordre 3) de chaque colonne"""
+    centered = values - values.mean(axis=0)
+    squared = centered * centered
+    std = np.sqrt(squared.mean(axis=0))
+    std = np.where(std > 0, std, np.inf)
+    return (squared * centered).mean(axis=0) / (std * std * std)
+
+
+def between_group_ratio(values: np.ndarray, codes: np.ndarray, n_groups: int) -> np.ndarray:
+    """
+    Part de variance expliquée par les groupes, pour chaque colonne
+
+    eta² ajusté (epsilon²): corrigé du nombre de groupes, pour qu'une
+    catégorielle à beaucoup de modalités ne l'emporte pas par hasard.
+
+    Args:
+        values: Tableau (lignes x colonnes numériques)
+        codes: Groupe de chaque ligne (0..n_groups-1)
+        n_groups: Nombre de groupes
+
+    Returns:
+        Part de variance par colonne, entre 0 et 1
+    """
+    n = len(values)
+    # Sommes par groupe en un produit matriciel (n_groups x colonnes)
+    indicator = np.zeros((n_groups, n))
+    indicator[codes, np.arange(n)] = 1.0
+    sums = indicator @ values
+    sizes = indicator.sum(axis=1)
+    present = sizes > 0
+
+    total = values.sum(axis=0)
+    overall = (values * values).sum(axis=0) - total * total / n
+    between = (sums[present] ** 2 / sizes[present][:, None]).sum(axis=0) - total * total / n
+    k = int(present.sum())
+    within_mean = (overall - between) / max(n - k, 1)
+    adjusted = between - (k - 1) * within_mean
+    return np.clip(adjusted / np.where(overall > 0, overall, np.inf), 0.0, 1.0)
+
+
+def _quartile_skew(stats: Optional[Dict[str, float]]) -> float:
+    """Asymétrie de Bowley à partir des quartiles de df_info"""
+    if not stats:
+        return 0.0
+    q1, q2, q3 = stats.get("25%"), stats.get("50%"), stats.get("75%")
+    if q1 is None or q3 is None or q2 is None or not q3 > q1:
+        return 0.0
+    return (q3 + q1 - 2 * q2) / (q3 - q1)
+
+
+def _matches(words: List[str], prefixes) -> bool:
+    return any(word.startswith(prefix) for word in words for prefix in prefixes)
+
+
+class HeuristicProposer:
+    """
+    Moteur de propositions statistique, sans appel au LLM
+
+    Nuage de points pour les paires numériques corrélées, barres et boîtes
+    pour les numériques qui varient entre catégories, histogramme pour
+    les distributions asymétriques. Avec df_info seul (pas de DataFrame),
+    les scores retombent sur l'asymétrie des quartiles et la cardinalité.
+    """
+
+    def __init__(
+        self,
+        max_rows: int = DEFAULT_MAX_ROWS,
+        max_numeric: int = DEFAULT_MAX_NUMERIC,
+        max_categorical: int = DEFAULT_MAX_CATEGORICAL
+    ):
+        """
+        Args:
+            max_rows: Lignes échantillonnées pour les statistiques
+            max_numeric: Colonnes numériques considérées (les plus pertinentes)
+            max_categorical: Colonnes catégorielles considérées
+        """
+        self.max_rows = max_rows
+        self.max_numeric = max_numeric
+        self.max_categorical = max_categorical
+        self.last_elapsed_ms = 0.0
+
+    def propose(
+        self,
+        df: Optional[pd.DataFrame],
+        df_info: Dict[str, Any],
+        question: str = "",
+        k: int = 3,
+        exclude: Optional[List[Dict[str, Any]]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Les k meilleures propositions, de types variés si possible
+
+        Args:
+            df: DataFrame (None: scores à partir de df_info seulement)
+            df_info: Informations sur le DataFrame
+            question: Problématique saisie
+            k: Nombre de propositions
+            exclude: Propositions déjà retenues (mêmes axes écartés)
+
+        Returns:
+            Propositions au format de VizProposer, numérotées à la suite de exclude
+        """
+        start = time.perf_counter()
+        exclude = exclude or []
+        taken: Set[Tuple[str, str]] = {(p.get("x_axis"), p.get("y_axis")) for p in exclude}
+        types = [p.get("type") for p in exclude]
+
+        chosen: List[Candidate] = []
+        ranked = self.candidates(df, df_info, question)
+        # Premier passage: un type différent par proposition; second: les meilleurs restants
+        for distinct in (True, False):
+            for candidate in ranked:
+                if len(chosen) >= k:
+                    break
+                pair = (candidate.x_axis, candidate.y_axis)
+                if pair in taken or (distinct and candidate.type in types):
+                    continue
+                chosen.append(candidate)
+                taken.add(pair)
+                types.append(candidate.type)
+
+        self.last_elapsed_ms = (time.perf_counter() - start) * 1000
+        return [c.to_proposal(len(exclude) + i + 1) for i, c in enumerate(chosen)]
+
+    def candidates(self, df: Optional[pd.DataFrame], df_info: Dict[str, Any], question: str = "") -> List[Candidate]:
+        """Tous les triplets (x, y, type) évalués, par score décroissant"""
+        question_words = tokenize(question)
+        relevance = dict(rank_columns(df_info, question))
+        unique_counts = df_info.get("unique_counts", {})
+
+        numeric = [str(c) for c in df_info.get("numeric_columns", []) if unique_counts.get(c, 2) > 1]
+        numeric = sorted(numeric, key=lambda c: -relevance.get(c, 0.0))[:self.max_numeric]
+        categorical = [
+            str(c) for c in df_info.get("categorical_columns", [])
+            if 2 <= unique_counts.get(c, 2) <= MAX_CATEGORIES
+        ]
+        categorical = sorted(categorical, key=lambda c: -relevance.get(c, 0.0))[:self.max_categorical]
+
+        # Bonus par colonne citée dans la question, par type d'intention
+        boost = np.array([0.5 * (name_matches(c, question_words) > 0) for c in numeric])
+        intent = {viz: 1.0 + 0.5 * _matches(question_words, prefixes) for viz, prefixes in TYPE_KEYWORDS.items()}
+
+        sample = None
+        if df is not None and len(df):
+            sample = df[numeric + categorical]
+            if len(df) > self.max_rows:
+                # Lignes régulièrement espacées: O(max_rows), couvre tout le fichier
+                sample = sample.iloc[np.linspace(0, len(df) - 1, self.max_rows).astype(int)]
+
+        # Une numérique à peu de valeurs (0/1, notes) se prête mal aux histogrammes et nuages
+        continuity = np.array([min(unique_counts.get(c, 10) / 10, 1.0) for c in numeric])
+
+        values = _matrix(sample, numeric) if sample is not None and numeric else None
+        if values is not None:
+            skews = skewness(values)
+        else:
+            skews = np.array([_quartile_skew(df_info.get("numeric_stats", {}).get(c)) * 3 for c in numeric])
+        skew_factor = np.minimum(np.abs(skews) / 2, 1.0)
+
+        candidates: List[Candidate] = []
+
+        scores = (0.2 + 0.6 * skew_factor) * continuity * (1.0 + boost) * intent["histogram"]
+        for i, col in enumerate(numeric):
+            stat = float(skews[i]) if values is not None else None
+            candidates.append(Candidate("histogram", col, "count", float(scores[i]), stat))
+
+        if len(numeric) >= 2:
+            rows, cols = np.triu_indices(len(numeric), k=1)
+            if values is not None:
+                r = correlations(values)[rows, cols]
+                # |r| ~ 1: colonnes redondantes (unités différentes, dérivées)
+                base = np.where(np.abs(r) > 0.995, 0.1, np.abs(r))
+            else:
+                r = None
+                base = np.full(len(rows), NEUTRAL_SCORE)
+            scores = (base * np.minimum(continuity[rows], continuity[cols])
+                      * (1.0 + boost[rows] + boost[cols]) * intent["scatter_plot"])
+            for n, (i, j) in enumerate(zip(rows, cols)):
+                stat = float(r[n]) if r is not None else None
+                candidates.append(Candidate("scatter_plot", numeric[i], numeric[j], float(scores[n]), stat))
+
+        box_spread = (0.8 + 0.2 * skew_factor) * continuity * 0.9
+        for cat in categorical:
+            readability = 1.0 if unique_counts.get(cat, 2) <= READABLE_CATEGORIES else 0.7
+            cat_boost = 0.5 * (name_matches(cat, question_words) > 0)
+            ratio = None
+            if values is not None:
+                codes, uniques = pd.factorize(sample[cat])
+                known = codes >= 0
+                if known.sum() <= len(uniques):
+                    # Une ligne par modalité (identifiant): rien à comparer
+                    continue
+                ratio = between_group_ratio(values[known], codes[known], len(uniques))
+                base = np.sqrt(ratio)
+            else:
+                base = np.full(len(numeric), NEUTRAL_SCORE)
+            weight = 1.0 + boost + cat_boost
+            bar_scores = base * readability * weight * intent["bar_chart"]
+            box_scores = base * box_spread * weight * intent["box_plot"]
+            for j, num in enumerate(numeric):
+                stat = float(ratio[j]) if ratio is not None else None
+                candidates.append(Candidate("bar_chart", cat, num, float(bar_scores[j]), stat))
+                candidates.append(Candidate("box_plot", cat, num, float(box_scores[j]), stat))
+
+        candidates.sort(key=lambda c: -c.score)
+        return candidates
+
+
+def heuristic_analysis(proposals: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Analyse au format de DataVizAnalyzer, déduite des propositions statistiques"""
+    variables = []
+    for prop in proposals:
+        for axis in (prop["x_axis"], prop["y_axis"]):
+            if axis != "count" and axis not in variables:
+                variables.append(axis)
+    return {
+        "analytical_goal": GOAL_BY_TYPE.get(proposals[0]["type"], "exploration") if proposals else "exploration",
+        "key_variables": variables[:5],
+        "suggested_focus": "Propositions statistiques (sans LLM)",
+    }
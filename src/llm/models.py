@@ -0,0 +1,183 @@
+"""
+Cycle de vie des modèles Ollama
+Modèle de chaque étape, préchargement, keep_alive et latences à froid / à chaud
+"""
+
+import statistics
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from .client import DEFAULT_BASE_URL, Generation, OllamaClient, get_client
+
+
+# Modèle par défaut de chaque étape
+STAGE_MODELS = {
+    "analysis": "mistral",
+    "proposal": "mistral-opt",
+    "code": "mistral-opt",
+    "combined": "mistral-opt",
+}
+DEFAULT_KEEP_ALIVE = "30m"
+# Au-delà, Ollama a (re)chargé le modèle en mémoire pour répondre
+COLD_LOAD_THRESHOLD_MS = 500.0
+# Un premier chargement peut dépasser le délai de lecture d'une génération
+PRELOAD_TIMEOUT = 120.0
+
+
+@dataclass
+class LatencyStats:
+    """Latences d'un modèle, séparées selon qu'il a fallu le charger ou non"""
+    cold_ms: List[float] = field(default_factory=list)
+    warm_ms: List[float] = field(default_factory=list)
+    load_ms: List[float] = field(default_factory=list)
+
+    def summary(self) -> Dict[str, Any]:
+        def median(values: List[float]) -> Optional[float]:
+            return statistics.median(values) if values else None
+        return {
+            "cold_calls": len(self.cold_ms),
+            "warm_calls": len(self.warm_ms),
+            "cold_median_ms": median(self.cold_ms),
+            "warm_median_ms": median(self.warm_ms),
+            "load_median_ms": median(self.load_ms),
+        }
+
+
+class ModelManager:
+    """
+    Choix des modèles et maintien en mémoire côté Ollama
+
+    Deux modèles différents (mistral / mistral-opt) se chassent de la
+    mémoire à chaque changement d'étape; un modèle unifié, choisi par
+    l'appelant (ex: la session), remplace celui de toutes les étapes.
+    Le manager est partagé par le processus: il ne garde pas ce choix.
+    """
+
+    def __init__(
+        self,
+        client: OllamaClient,
+        keep_alive: Optional[str] = DEFAULT_KEEP_ALIVE,
+        stage_models: Optional[Dict[str, str]] = None
+    ):
+        """
+        Args:
+            client: Client Ollama
+            keep_alive: Durée de maintien en mémoire (ex: "30m", "-1" pour toujours)
+            stage_models: Modèle de chaque étape (défaut: STAGE_MODELS)
+        """
+        self.client = client
+        self.stage_models = dict(stage_models or STAGE_MODELS)
+        self.latency: Dict[str, LatencyStats] = {}
+        self._lock = threading.Lock()
+        self._preloaded: Dict[str, float] = {}
+        # Préchargements en cours, et échecs (retentés au prochain preload_async)
+        self._pending: set = set()
+        self._preload_errors: Dict[str, int] = {}
+        self.last_preload_error: Optional[str] = None
+
+        self.client.keep_alive = keep_alive
+        self.client.listeners.append(self.record)
+
+    def model_for(self, stage: str, unified: Optional[str] = None) -> str:
+        """Modèle à utiliser pour une étape (unified: modèle commun à toutes les étapes)"""
+        return unified or self.stage_models[stage]
+
+    def models(self, unified: Optional[str] = None) -> List[str]:
+        """Modèles utilisés par les étapes"""
+        return sorted({self.model_for(stage, unified) for stage in self.stage_models})
+
+    def preload(self, models: Optional[List[str]] = None) -> Dict[str, float]:
+        """
+        Charge les modèles en mémoire (requête sans prompt) avec keep_alive
+
+        Args:
+            models: Modèles à charger (défaut: ceux des étapes)
+
+        Returns:
+            Dictionnaire {modèle: durée de chargement en ms}, sans les échecs
+        """
+        loaded = {}
+        for model in models or self.models():
+            payload = {"model": model}
+            if self.client.keep_alive is not None:
+                payload["keep_alive"] = self.client.keep_alive
+            try:
+                data = self.client.post("/api/generate", payload, timeout=PRELOAD_TIMEOUT).json()
+            except Exception as e:
+                with self._lock:
+                    self._pending.discard(model)
+                    self._preload_errors[model] = self._preload_errors.get(model, 0) + 1
+                    self.last_preload_error = f"{model}: {type(e).__name__}: {e}"
+                continue
+            loaded[model] = data.get("load_duration", 0) / 1e6
+            with self._lock:
+                self._pending.discard(model)
+                self._preloaded[model] = loaded[model]
+                if self.last_preload_error and self.last_preload_error.startswith(f"{model}: "):
+                    self.last_preload_error = None
+        return loaded
+
+    def preload_async(self, models: Optional[List[str]] = None) -> Optional[threading.Thread]:
+        """
+        Précharge en arrière-plan les modèles ni chargés ni en cours de
+        chargement (un échec est retenté à l'appel suivant)
+
+        Args:
+            models: Modèles à charger (défaut: ceux des étapes)
+        """
+        with self._lock:
+            pending = [
+                model for model in models or self.models()
+                if model not in self._preloaded and model not in self._pending
+            ]
+            if not pending:
+                return None
+            # Marqués tout de suite pour ne pas relancer à chaque rerun
+            self._pending.update(pending)
+        thread = threading.Thread(target=self.preload, args=(pending,), daemon=True, name="ollama-preload")
+        thread.start()
+        return thread
+
+    def loaded_models(self) -> List[str]:
+        """Modèles actuellement en mémoire côté Ollama (/api/ps)"""
+        try:
+            response = self.client.session.get(f"{self.client.base_url}/api/ps", timeout=self.client.timeout)
+            response.raise_for_status()
+            return [m.get("name", "") for m in response.json().get("models", [])]
+        except Exception:
+            return []
+
+    def record(self, generation: Generation):
+        """Classe une génération en appel à froid ou à chaud (load_duration d'Ollama)"""
+        load_ms = generation.metadata.get("load_duration", 0) / 1e6
+        with self._lock:
+            stats = self.latency.setdefault(generation.model, LatencyStats())
+            if load_ms > COLD_LOAD_THRESHOLD_MS:
+                stats.cold_ms.append(generation.elapsed_ms)
+                stats.load_ms.append(load_ms)
+            else:
+                stats.warm_ms.append(generation.elapsed_ms)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Latences à froid / à chaud par modèle, durée de préchargement et préchargements échoués"""
+        with self._lock:
+            result = {model: stats.summary() for model, stats in self.latency.items()}
+            for model, load_ms in self._preloaded.items():
+                result.setdefault(model, LatencyStats().summary())["preload_ms"] = load_ms
+            for model, errors in self._preload_errors.items():
+                result.setdefault(model, LatencyStats().summary())["preload_errors"] = errors
+            return result
+
+
+_managers: Dict[str, ModelManager] = {}
+_managers_lock = threading.Lock()
+
+
+def get_model_manager(base_url: str = DEFAULT_BASE_URL) -> ModelManager:
+    """Manager partagé par tout le processus pour un serveur donné"""
+    key = base_url.rstrip('/')
+    with _managers_lock:
+        if key not in _managers:
+            _managers[key] = ModelManager(get_client(key))
+        return _managers[key]
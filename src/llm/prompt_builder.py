@@ -0,0 +1,208 @@
+"""
+Construction des prompts sous budget de tokens
+Sélectionne les colonnes les plus pertinentes pour la question
+"""
+
+import math
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from .fingerprint import normalize_question
+
+
+# Budget de la partie "colonnes" du prompt
+DEFAULT_TOKEN_BUDGET = 600
+DEFAULT_MAX_COLUMNS = 40
+# Approximation courante pour les tokenizers BPE (texte + identifiants)
+CHARS_PER_TOKEN = 4
+# Catégorielle utile pour grouper / colorer
+MAX_USEFUL_CATEGORIES = 50
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimation du nombre de tokens d'un texte"""
+    return math.ceil(len(text) / CHARS_PER_TOKEN) if text else 0
+
+
+def tokenize(text: str) -> List[str]:
+    """Mots d'un nom de colonne ou d'une question (snake_case, camelCase, accents)"""
+    text = re.sub(r'([a-z])([A-Z])', r'\1 \2', str(text))
+    return [w for w in re.split(r'[^0-9a-z]+', normalize_question(text)) if len(w) >= 3]
+
+
+def name_matches(name: str, question_words: List[str]) -> int:
+    """Nombre de mots du nom de colonne cités dans la question (au préfixe près)"""
+    return sum(
+        any(word.startswith(q) or q.startswith(word) for q in question_words)
+        for word in tokenize(name)
+    )
+
+
+def _format_number(value: float) -> str:
+    """Nombre court: 1.5M, 80k, 12.3"""
+    for threshold, suffix in ((1e9, 'G'), (1e6, 'M'), (1e3, 'k')):
+        if abs(value) >= threshold:
+            return f"{value / threshold:.3g}{suffix}"
+    return f"{value:.3g}"
+
+
+def score_column(name: str, df_info: Dict[str, Any], question_words: List[str]) -> float:
+    """
+    Pertinence d'une colonne pour la question
+
+    Correspondance du nom avec la question, dispersion (numériques),
+    cardinalité exploitable (catégorielles), pénalité pour les valeurs
+    manquantes, les constantes et les identifiants.
+    """
+    score = 0.0
+    n_rows = (df_info.get("shape") or (0,))[0] or 0
+
+    # Correspondance de nom, au préfixe près (vente / ventes)
+    score += 3.0 * name_matches(name, question_words)
+
+    n_unique = df_info.get("unique_counts", {}).get(name)
+    if n_unique is not None and n_unique <= 1:
+        score -= 2.0
+
+    stats = df_info.get("numeric_stats", {}).get(name)
+    if name in df_info.get("numeric_columns", []) and stats:
+        mean, std = stats.get("mean"), stats.get("std")
+        if mean is not None and std is not None and not math.isnan(std):
+            # Coefficient de variation borné: une colonne dispersée est plus informative
+            cv = std / abs(mean) if mean else (1.0 if std else 0.0)
+            score += min(cv, 1.0)
+    elif name in df_info.get("categorical_columns", []) and n_unique is not None:
+        if 2 <= n_unique <= MAX_USEFUL_CATEGORIES:
+            score += 1.0
+        elif n_rows and n_unique >= 0.9 * n_rows:
+            # Identifiant ou texte libre
+            score -= 1.0
+    elif name in df_info.get("datetime_columns", []):
+        score += 0.5
+
+    if n_rows:
+        score -= df_info.get("null_counts", {}).get(name, 0) / n_rows
+
+    return score
+
+
+def rank_columns(df_info: Dict[str, Any], question: str) -> List[Tuple[str, float]]:
+    """
+    Colonnes triées par pertinence décroissante
+
+    Returns:
+        Liste de (colonne, score)
+    """
+    question_words = tokenize(question)
+    scored = [(str(col), score_column(col, df_info, question_words)) for col in df_info.get("columns", [])]
+    return sorted(scored, key=lambda item: -item[1])
+
+
+def column_hint(name: str, df_info: Dict[str, Any]) -> str:
+    """Description compacte: nom (type, plage ou cardinalité, % de nuls)"""
+    hints = []
+    stats = df_info.get("numeric_stats", {}).get(name)
+    n_unique = df_info.get("unique_counts", {}).get(name)
+
+    if name in df_info.get("numeric_columns", []):
+        if stats and stats.get("min") is not None and not math.isnan(stats["min"]):
+            hints.append(f"{_format_number(stats['min'])}..{_format_number(stats['max'])}")
+    elif name in df_info.get("categorical_columns", []) and n_unique is not None:
+        hints.append(f"{n_unique} val.")
+    elif name in df_info.get("datetime_columns", []):
+        hints.append("date")
+
+    n_rows = (df_info.get("shape") or (0,))[0] or 0
+    nulls = df_info.get("null_counts", {}).get(name, 0)
+    if n_rows and nulls / n_rows > 0.1:
+        hints.append(f"{nulls / n_rows:.0%} nuls")
+
+    return f"{name} ({', '.join(hints)})" if hints else name
+
+
+@dataclass
+class ColumnContext:
+    """Colonnes retenues pour un prompt"""
+    numeric: List[str] = field(default_factory=list)
+    categorical: List[str] = field(default_factory=list)
+    included: List[str] = field(default_factory=list)
+    omitted: int = 0
+    tokens: int = 0
+
+    def note(self) -> str:
+        """Lignes à placer sous la liste des colonnes"""
+        lines = []
+        if any('(' in hint for hint in self.numeric + self.categorical):
+            # Le LLM doit renvoyer les noms seuls dans x_axis / y_axis
+            lines.append("(entre parenthèses: plage, nombre de valeurs ou % de nuls, pas le nom)")
+        if self.omitted:
+            lines.append(f"(+{self.omitted} autres colonnes moins pertinentes non listées)")
+        return ''.join(f"\n{line}" for line in lines)
+
+
+class PromptBuilder:
+    """Sélection des colonnes d'un prompt sous budget de tokens"""
+
+    def __init__(self, token_budget: int = DEFAULT_TOKEN_BUDGET, max_columns: int = DEFAULT_MAX_COLUMNS):
+        """
+        Args:
+            token_budget: Tokens maximum pour la liste des colonnes
+            max_columns: Nombre maximum de colonnes listées
+        """
+        self.token_budget = token_budget
+        self.max_columns = max_columns
+
+    def columns(self, df_info: Dict[str, Any], question: str) -> ColumnContext:
+        """
+        Colonnes numériques et catégorielles à lister dans le prompt
+
+        Les plus pertinentes sont retenues tant que le budget le permet;
+        elles restent dans l'ordre du fichier pour que le prompt soit
+        stable d'un appel à l'autre.
+
+        Args:
+            df_info: Informations sur le DataFrame
+            question: Problématique saisie
+
+        Returns:
+            ColumnContext
+        """
+        numeric = set(map(str, df_info.get("numeric_columns", [])))
+        categorical = set(map(str, df_info.get("categorical_columns", [])))
+        candidates = [(col, score) for col, score in rank_columns(df_info, question)
+                      if col in numeric or col in categorical]
+
+        selected = {}
+        tokens = 0
+        for col, _ in candidates:
+            if len(selected) >= self.max_columns:
+                break
+            hint = column_hint(col, df_info)
+            # +1 pour le séparateur ", "
+            cost = estimate_tokens(hint) + 1
+            if tokens + cost > self.token_budget:
+                continue
+            selected[col] = hint
+            tokens += cost
+
+        context = ColumnContext(omitted=len(candidates) - len(selected), tokens=tokens)
+        for col in map(str, df_info.get("columns", [])):
+            if col not in selected:
+                continue
+            context.included.append(col)
+            (context.numeric if col in numeric else context.categorical).append(selected[col])
+        return context
+
+
+def prompt_tokens(prompt: str, metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Optional[int]]:
+    """
+    Tokens d'un prompt: estimation locale et compte réel renvoyé par Ollama
+
+    Returns:
+        Dictionnaire estimated, actual (None si inconnu: cache, fallback)
+    """
+    return {
+        "estimated": estimate_tokens(prompt),
+        "actual": (metadata or {}).get("prompt_eval_count"),
+    }
@@ -0,0 +1,302 @@
+"""
+Sorties structurées du LLM
+Schémas JSON passés à Ollama (paramètre format), validation des réponses,
+réparation en un appel et statistiques d'échec
+"""
+
+import json
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+from .client import Generation, OllamaClient
+
+
+ANALYTICAL_GOALS = ["comparison", "trend_analysis", "distribution", "correlation", "exploration"]
+VIZ_TYPES = ["bar_chart", "scatter_plot", "histogram", "box_plot", "line_chart"]
+# Réponse fautive recopiée dans le prompt de réparation
+MAX_REPAIR_CHARS = 4000
+
+_TYPES = {
+    "object": dict,
+    "array": list,
+    "string": str,
+    "integer": int,
+    "number": (int, float),
+    "boolean": bool,
+    "null": type(None),
+}
+
+
+def _column_enum(columns: Optional[List[str]], *extra: str) -> Dict[str, Any]:
+    """Chaîne libre, ou limitée aux colonnes du prompt si elles sont connues"""
+    if not columns:
+        return {"type": "string"}
+    return {"type": "string", "enum": list(columns) + list(extra)}
+
+
+def analysis_schema(columns: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Schéma de l'analyse (objectif, variables clés, focus)"""
+    return {
+        "type": "object",
+        "properties": {
+            "analytical_goal": {"type": "string", "enum": ANALYTICAL_GOALS},
+            "key_variables": {"type": "array", "items": _column_enum(columns), "maxItems": 5},
+            "suggested_focus": {"type": "string"},
+        },
+        "required": ["analytical_goal", "key_variables", "suggested_focus"],
+    }
+
+
+def proposals_schema(columns: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Schéma des 3 propositions (x_axis / y_axis parmi les colonnes du prompt)"""
+    proposal = {
+        "type": "object",
+        "properties": {
+            "id": {"type": "integer"},
+            "type": {"type": "string", "enum": VIZ_TYPES},
+            "title": {"type": "string"},
+            "x_axis": _column_enum(columns),
+            "y_axis": _column_enum(columns, "count"),
+            "color": {"type": ["string", "null"]},
+            "rationale": {"type": "string"},
+        },
+        "required": ["id", "type", "title", "x_axis", "y_axis", "rationale"],
+    }
+    return {
+        "type": "object",
+        "properties": {
+            "proposals": {"type": "array", "items": proposal, "minItems": 3, "maxItems": 3},
+        },
+        "required": ["proposals"],
+    }
+
+
+def combined_schema(columns: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Schéma de l'analyse suivie des propositions (un seul appel)"""
+    analysis, proposals = analysis_schema(columns), proposals_schema(columns)
+    return {
+        "type": "object",
+        # L'ordre des propriétés fixe l'ordre de génération: analyse d'abord
+        "properties": {**analysis["properties"], **proposals["properties"]},
+        "required": analysis["required"] + proposals["required"],
+    }
+
+
+class StructuredOutputError(ValueError):
+    """Réponse du LLM non conforme au schéma attendu"""
+
+    def __init__(self, errors: List[str]):
+        super().__init__("; ".join(errors))
+        self.errors = errors
+
+
+def validate(value: Any, schema: Dict[str, Any], path: str = "$") -> List[str]:
+    """
+    Vérifie une valeur contre le sous-ensemble de JSON Schema utilisé ici
+
+    (type, enum, properties, required, items, minItems, maxItems)
+
+    Returns:
+        Liste des erreurs (vide si conforme)
+    """
+    expected = schema.get("type")
+    if expected is not None:
+        names = expected if isinstance(expected, list) else [expected]
+        # bool est un int en Python, pas en JSON
+        if isinstance(value, bool) and "boolean" not in names:
+            return [f"{path}: {json.dumps(value)} n'est pas de type {'/'.join(names)}"]
+        if not any(isinstance(value, _TYPES[name]) for name in names):
+            return [f"{path}: {type(value).__name__} au lieu de {'/'.join(names)}"]
+
+    if "enum" in schema and value not in schema["enum"]:
+        return [f"{path}: {json.dumps(value, ensure_ascii=False)} n'est pas une valeur autorisée"]
+
+    errors = []
+    if isinstance(value, dict):
+        for key in schema.get("required", []):
+            if key not in value:
+                errors.append(f"{path}.{key}: champ manquant")
+        for key, sub_schema in schema.get("properties", {}).items():
+            if key in value:
+                errors.extend(validate(value[key], sub_schema, f"{path}.{key}"))
+    elif isinstance(value, list):
+        if len(value) < schema.get("minItems", 0):
+            errors.append(f"{path}: {len(value)} éléments, {schema['minItems']} attendus au minimum")
+        if "maxItems" in schema and len(value) > schema["maxItems"]:
+            errors.append(f"{path}: {len(value)} éléments, {schema['maxItems']} attendus au maximum")
+        if "items" in schema:
+            for i, item in enumerate(value):
+                errors.extend(validate(item, schema["items"], f"{path}[{i}]"))
+    return errors
+
+
+def parse_structured(text: str, schema: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Décode et valide une réponse produite avec format=schema
+
+    Raises:
+        StructuredOutputError: JSON invalide ou non conforme
+    """
+    try:
+        value = json.loads(text)
+    except json.JSONDecodeError as e:
+        raise StructuredOutputError([f"JSON invalide: {e.msg} (position {e.pos})"])
+    errors = validate(value, schema)
+    if errors:
+        raise StructuredOutputError(errors)
+    return value
+
+
+def conforms(schema: Dict[str, Any]) -> Callable[[str], bool]:
+    """Contrôle pour le cache des réponses: texte décodable et conforme au schéma"""
+    def check(text: str) -> bool:
+        try:
+            parse_structured(text, schema)
+        except StructuredOutputError:
+            return False
+        return True
+    return check
+
+
+class ParseStats:
+    """Taux d'échec du parsing et temps de génération perdu, par type de réponse"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts: Dict[str, Dict[str, float]] = {}
+
+    def record(self, name: str, outcome: str, wasted_ms: float = 0.0):
+        """
+        Args:
+            name: Type de réponse (analysis, proposals, combined)
+            outcome: valid, repaired ou failed
+            wasted_ms: Durée des appels dont la réponse a été jetée
+        """
+        with self._lock:
+            counts = self._counts.setdefault(name, {"valid": 0, "repaired": 0, "failed": 0, "wasted_ms": 0.0})
+            counts[outcome] += 1
+            counts["wasted_ms"] += wasted_ms
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Returns:
+            {type: calls, valid, repaired, failed, failure_rate (au premier
+            essai), wasted_ms}
+        """
+        with self._lock:
+            result = {}
+            for name, counts in self._counts.items():
+                calls = counts["valid"] + counts["repaired"] + counts["failed"]
+                result[name] = {
+                    "calls": calls,
+                    **counts,
+                    "failure_rate": (calls - counts["valid"]) / calls if calls else 0.0,
+                }
+            return result
+
+    def reset(self):
+        with self._lock:
+            self._counts = {}
+
+
+_parse_stats = ParseStats()
+
+
+def get_parse_stats() -> ParseStats:
+    return _parse_stats
+
+
+@dataclass
+class StructuredResult:
+    """Réponse validée, éventuellement après réparation"""
+    value: Dict[str, Any]
+    generation: Generation
+    repaired: bool = False
+    from_cache: bool = False
+
+
+def repair_prompt(text: str, errors: List[str]) -> str:
+    """Prompt de réparation: erreurs précises et réponse fautive à corriger"""
+    if len(text) > MAX_REPAIR_CHARS:
+        text = text[:MAX_REPAIR_CHARS] + "..."
+    listed = "\n".join(f"- {error}" for error in errors[:10])
+    return f"""La réponse JSON ci-dessous ne respecte pas le format attendu.
+
+ERREURS:
+{listed}
+
+RÉPONSE À CORRIGER:
+{text}
+
+Corrige uniquement les erreurs en conservant le reste du contenu.
+Réponds en JSON uniquement."""
+
+
+def check_structured(
+    client: OllamaClient,
+    generation: Generation,
+    schema: Dict[str, Any],
+    name: str,
+    use_cache: bool = True
+) -> StructuredResult:
+    """
+    Valide une génération et, si elle est fautive, tente une réparation
+
+    La réparation réutilise la réponse fautive (un seul appel, même
+    modèle, même schéma) plutôt que de régénérer depuis le prompt initial.
+
+    Raises:
+        StructuredOutputError: Réponse toujours non conforme après réparation
+    """
+    try:
+        value = parse_structured(generation.text, schema)
+        _parse_stats.record(name, "valid")
+        return StructuredResult(value, generation, from_cache=generation.from_cache)
+    except StructuredOutputError as e:
+        errors = e.errors
+
+    wasted_ms = generation.elapsed_ms
+    try:
+        repair = client.generate(generation.model, repair_prompt(generation.text, errors),
+                                 use_cache=use_cache, validate=conforms(schema), format=schema)
+    except Exception:
+        _parse_stats.record(name, "failed", wasted_ms)
+        raise
+    try:
+        value = parse_structured(repair.text, schema)
+    except StructuredOutputError:
+        _parse_stats.record(name, "failed", wasted_ms + repair.elapsed_ms)
+        raise
+    _parse_stats.record(name, "repaired", wasted_ms)
+    return StructuredResult(value, repair, repaired=True,
+                            from_cache=generation.from_cache and repair.from_cache)
+
+
+def generate_structured(
+    client: OllamaClient,
+    model: str,
+    prompt: str,
+    schema: Dict[str, Any],
+    name: str,
+    use_cache: bool = True
+) -> StructuredResult:
+    """
+    Génération contrainte par un schéma JSON, validée et réparée si besoin
+
+    Args:
+        client: Client Ollama
+        model: Nom du modèle
+        prompt: Prompt complet
+        schema: Schéma JSON (paramètre format d'Ollama)
+        name: Type de réponse pour les statistiques
+        use_cache: Lire et alimenter le cache des réponses
+
+    Returns:
+        StructuredResult
+
+    Raises:
+        StructuredOutputError: Réponse non conforme après réparation
+    """
+    generation = client.generate(model, prompt, use_cache=use_cache, validate=conforms(schema), format=schema)
+    return check_structured(client, generation, schema, name, use_cache=use_cache)
@@ -0,0 +1,82 @@
+"""
+Parsing JSON incrémental d'une réponse streamée
+Les objets d'un tableau sont émis dès que leur accolade fermante arrive
+"""
+
+import json
+from typing import Any, Dict, Iterable, Iterator, List
+
+
+class JsonObjectStream:
+    """
+    Extrait les objets JSON éléments d'un tableau au fil des morceaux reçus
+
+    Fonctionne sur {"proposals": [{...}, {...}]} comme sur [{...}, {...}],
+    y compris avec du texte libre autour du JSON. Les chaînes (et leurs
+    échappements) sont suivies pour ne pas compter leurs accolades.
+    """
+
+    def __init__(self):
+        self._buffer: List[str] = []
+        # Pile des conteneurs ouverts ('{' ou '[') et position de début des objets
+        self._stack: List[str] = []
+        self._starts: List[int] = []
+        self._length = 0
+        self._in_string = False
+        self._escape = False
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        """
+        Ajoute un morceau de texte
+
+        Returns:
+            Objets complétés par ce morceau (éléments de tableau uniquement)
+        """
+        completed = []
+        for char in chunk:
+            self._buffer.append(char)
+            position = self._length
+            self._length += 1
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == '\\':
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+
+            if not self._stack and char not in '{[':
+                # Texte libre avant le JSON
+                continue
+
+            if char == '"':
+                self._in_string = True
+            elif char in '{[':
+                self._stack.append(char)
+                self._starts.append(position)
+            elif char in '}]' and self._stack:
+                opener = self._stack.pop()
+                start = self._starts.pop()
+                if opener == '{' and char == '}' and self._stack and self._stack[-1] == '[':
+                    text = ''.join(self._buffer[start:position + 1])
+                    try:
+                        obj = json.loads(text)
+                    except json.JSONDecodeError:
+                        continue
+                    if isinstance(obj, dict):
+                        completed.append(obj)
+        return completed
+
+    @property
+    def text(self) -> str:
+        """Texte reçu jusqu'ici"""
+        return ''.join(self._buffer)
+
+
+def iter_json_objects(chunks: Iterable[str]) -> Iterator[Dict[str, Any]]:
+    """Objets éléments de tableau, émis au fil d'un flux de morceaux de texte"""
+    parser = JsonObjectStream()
+    for chunk in chunks:
+        yield from parser.feed(chunk)
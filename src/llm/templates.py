@@ -0,0 +1,254 @@
+"""
+Templates de code Plotly paramétrés
+Code de visualisation produit sans LLM pour chaque type de proposition
+"""
+
+import re
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
+
+
+# Au-delà, les groupes de couleur les moins fréquents sont regroupés
+MAX_COLOR_GROUPS = 12
+# Valeurs de type date dans une colonne texte (ISO, jj/mm/aaaa)
+_DATE_PATTERN = re.compile(r'^\d{4}-\d{1,2}(-\d{1,2})?([ T]\d{1,2}:\d{2}(:\d{2})?)?$|^\d{1,2}/\d{1,2}/\d{2,4}$')
+
+
+@dataclass
+class PlotSpec:
+    """Paramètres d'un template, tirés d'une proposition"""
+    type: str
+    x: str
+    y: str
+    title: str
+    color: Optional[str] = None
+    # x numérique (sinon catégoriel ou temporel)
+    x_numeric: bool = False
+    x_temporal: bool = False
+
+    @property
+    def count(self) -> bool:
+        return self.y == 'count'
+
+    @property
+    def columns(self) -> list:
+        """Colonnes lues par le code (pour dropna)"""
+        used = [self.x] + ([] if self.count else [self.y]) + ([self.color] if self.color else [])
+        return list(dict.fromkeys(used))
+
+
+# Un template reçoit les paramètres et renvoie le code, ou None s'il ne s'applique pas
+PlotTemplate = Callable[[PlotSpec], Optional[str]]
+
+TEMPLATES: Dict[str, PlotTemplate] = {}
+
+
+def register_template(viz_type: str) -> Callable[[PlotTemplate], PlotTemplate]:
+    """Décorateur d'enregistrement d'un template pour un type de visualisation"""
+    def decorator(func: PlotTemplate) -> PlotTemplate:
+        TEMPLATES[viz_type] = func
+        return func
+    return decorator
+
+
+def is_temporal(column: str, df_info: Dict[str, Any]) -> bool:
+    """Colonne de dates: type datetime, ou texte dont l'aperçu ne contient que des dates"""
+    if column in df_info.get('datetime_columns', []):
+        return True
+    if column not in df_info.get('categorical_columns', []):
+        return False
+    values = [row.get(column) for row in df_info.get('head', [])]
+    values = [str(v) for v in values if v is not None and v == v]
+    return bool(values) and all(_DATE_PATTERN.match(v) for v in values)
+
+
+def plot_spec(proposal: Dict[str, Any], df_info: Dict[str, Any]) -> Optional[PlotSpec]:
+    """
+    Paramètres d'une proposition, ou None si ses colonnes sont inconnues
+
+    Un x temporel donne une courbe pour les barres et les nuages de
+    points; un comptage (y = count) en nuage ou en boîte devient un
+    histogramme.
+    """
+    columns = df_info.get('columns', [])
+    x, y = proposal.get('x_axis'), proposal.get('y_axis')
+    color = proposal.get('color')
+    if x not in columns or (y != 'count' and y not in columns):
+        return None
+    if color not in columns or color in (x, y):
+        color = None
+
+    viz_type = proposal.get('type', 'bar_chart')
+    temporal = is_temporal(x, df_info)
+    if viz_type in ('bar_chart', 'scatter_plot') and temporal:
+        viz_type = 'line_chart'
+    elif viz_type in ('scatter_plot', 'box_plot') and y == 'count':
+        viz_type = 'histogram'
+    return PlotSpec(
+        type=viz_type,
+        x=x,
+        y=y,
+        title=proposal.get('title') or 'Visualisation',
+        color=color,
+        x_numeric=x in df_info.get('numeric_columns', []),
+        x_temporal=temporal,
+    )
+
+
+def _figure_code(spec: PlotSpec, body: str, y_title: str, layout: str = "") -> str:
+    """Fonction create_figure complète autour du corps d'un template"""
+    color_setup = ""
+    if spec.color:
+        # Groupes peu fréquents regroupés pour garder une légende lisible
+        color_setup = f'''
+    groups = df_clean[{spec.color!r}].astype(str)
+    top = groups.value_counts().index[:{MAX_COLOR_GROUPS}]
+    df_clean[{spec.color!r}] = groups.where(groups.isin(top), 'Autres')
+'''
+    return f'''import plotly.graph_objects as go
+import pandas as pd
+
+def create_figure(df):
+    df_clean = df[{spec.columns!r}].dropna()
+{color_setup}{body}
+    fig.update_layout(
+        title={spec.title!r},
+        xaxis_title={spec.x!r},
+        yaxis_title={y_title!r},{layout}
+        template='plotly_white'
+    )
+    return fig
+'''
+
+
+def _traces(spec: PlotSpec, trace: str) -> str:
+    """
+    Une trace, ou une trace par groupe de couleur
+
+    trace utilise la variable data (DataFrame du groupe) et name.
+    """
+    if not spec.color:
+        return f'''
+    fig = go.Figure()
+    data, name = df_clean, None
+    fig.add_trace({trace})
+'''
+    return f'''
+    fig = go.Figure()
+    for name, data in df_clean.groupby({spec.color!r}, sort=True, observed=True):
+        fig.add_trace({trace})
+'''
+
+
+@register_template('histogram')
+def histogram_template(spec: PlotSpec) -> Optional[str]:
+    body = _traces(spec, f"go.Histogram(x=data[{spec.x!r}], name=name, opacity=0.75 if name is not None else 1.0)")
+    return _figure_code(spec, body, 'Count', "\n        barmode='overlay'," if spec.color else "")
+
+
+@register_template('bar_chart')
+def bar_template(spec: PlotSpec) -> Optional[str]:
+    if spec.count:
+        aggregate = f"data.groupby({spec.x!r}, sort=True, observed=True).size()"
+        y_title = 'Count'
+    else:
+        aggregate = f"data.groupby({spec.x!r}, sort=True, observed=True)[{spec.y!r}].mean()"
+        y_title = f'Moyenne de {spec.y}'
+    x_type = "\n        xaxis_type='category'," if not spec.x_numeric else ""
+    body = _traces(spec, f"_bar({aggregate}, name)")
+    body = f'''
+    def _bar(values, name):
+        return go.Bar(x=values.index, y=values.to_numpy(), name=name)
+''' + body
+    return _figure_code(spec, body, y_title, x_type + ("\n        barmode='group'," if spec.color else ""))
+
+
+@register_template('scatter_plot')
+def scatter_template(spec: PlotSpec) -> Optional[str]:
+    if spec.count:
+        return None
+    body = _traces(spec, f"go.Scatter(x=data[{spec.x!r}], y=data[{spec.y!r}], mode='markers', name=name, opacity=0.7)")
+    return _figure_code(spec, body, spec.y)
+
+
+@register_template('box_plot')
+def box_template(spec: PlotSpec) -> Optional[str]:
+    if spec.count:
+        return None
+    x = "None" if spec.x_numeric else f"data[{spec.x!r}]"
+    # x numérique: une boîte de y par groupe de couleur (ou une seule)
+    body = _traces(spec, f"go.Box(x={x}, y=data[{spec.y!r}], name=name, boxpoints='outliers')")
+    return _figure_code(spec, body, spec.y, "\n        boxmode='group'," if spec.color else "")
+
+
+@register_template('line_chart')
+def line_template(spec: PlotSpec) -> Optional[str]:
+    if spec.count:
+        aggregate = "data.groupby('_x').size()"
+        y_title = 'Count'
+    else:
+        aggregate = f"data.groupby('_x')[{spec.y!r}].mean()"
+        y_title = f'Moyenne de {spec.y}'
+    if spec.x_temporal:
+        x_values = f"pd.to_datetime(df_clean[{spec.x!r}], errors='coerce', format='mixed')"
+    else:
+        x_values = f"df_clean[{spec.x!r}]"
+    # Une valeur par x (moyenne), dans l'ordre des x
+    body = f'''
+    df_clean = df_clean.assign(_x={x_values}).dropna(subset=['_x'])
+
+    def _line(values, name):
+        return go.Scatter(x=values.index, y=values.to_numpy(), mode='lines+markers', name=name)
+''' + _traces(spec, f"_line({aggregate}, name)")
+    return _figure_code(spec, body, y_title)
+
+
+class TemplateStats:
+    """Part des codes produits par un template plutôt que par le LLM"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hits: Dict[str, int] = {}
+        self._misses: Dict[str, int] = {}
+
+    def record(self, viz_type: str, hit: bool):
+        with self._lock:
+            counts = self._hits if hit else self._misses
+            counts[viz_type] = counts.get(viz_type, 0) + 1
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns:
+            Dictionnaire hits, misses, hit_rate et by_type {type: (hits, misses)}
+        """
+        with self._lock:
+            hits, misses = sum(self._hits.values()), sum(self._misses.values())
+            types = sorted(set(self._hits) | set(self._misses))
+            return {
+                "hits": hits,
+                "misses": misses,
+                "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+                "by_type": {t: (self._hits.get(t, 0), self._misses.get(t, 0)) for t in types},
+            }
+
+
+_template_stats = TemplateStats()
+
+
+def get_template_stats() -> TemplateStats:
+    return _template_stats
+
+
+def render_template(proposal: Dict[str, Any], df_info: Dict[str, Any]) -> Optional[str]:
+    """
+    Code Plotly d'une proposition par template
+
+    Returns:
+        Code, ou None si aucun template ne s'applique (le LLM prend le relais)
+    """
+    spec = plot_spec(proposal, df_info)
+    template = TEMPLATES.get(spec.type) if spec is not None else None
+    code = template(spec) if template is not None else None
+    _template_stats.record(spec.type if spec is not None else str(proposal.get('type')), code is not None)
+    return code
@@ -2,28 +2,194 @@
 Proposition de visualisations via Ollama Mistral
 """
 
-import requests
-import json
-from typing import Dict, Any, List
+import pandas as pd
+from typing import Callable, Dict, Any, Iterator, List, Optional
+
+from .client import Generation, GenerationStream, OllamaClient, get_client
+from .heuristic import HeuristicProposer
+from .models import get_model_manager
+from .prompt_builder import ColumnContext, PromptBuilder, prompt_tokens
+from .schemas import check_structured, conforms, generate_structured, proposals_schema
+from .streaming import iter_json_objects
 
 
 class VizProposer:
     """Générateur de propositions avec Mistral local"""
     
-    def __init__(self, base_url: str = "http://localhost:11434"):
+    def __init__(self, base_url: str = "http://localhost:11434", client: Optional[OllamaClient] = None, model: Optional[str] = None):
         self.base_url = base_url
-        self.model = "mistral-opt"
+        # Modèle de l'étape, ou modèle unique si toutes les étapes sont unifiées
+        self.model = model or get_model_manager(base_url).model_for("proposal")
+        self.client = client or get_client(base_url)
+        # Vrai si la dernière réponse vient du cache
+        self.last_from_cache = False
+        # Vrai si le dernier résultat est le repli par défaut (LLM indisponible...)
+        self.last_fallback = False
+        # Propositions du LLM valides (avant ajout des fallbacks)
+        self.last_valid_count = 0
+        self.prompt_builder = PromptBuilder()
+        # Tokens du dernier prompt (estimation et compte d'Ollama)
+        self.last_prompt_tokens: Optional[Dict[str, Optional[int]]] = None
+        # Dernière réponse complète validée par le schéma (mode streamé)
+        self.last_structured: Optional[Dict[str, Any]] = None
+        # Propositions sans LLM: fallbacks et complément des réponses incomplètes
+        self.heuristic = HeuristicProposer()
     
-    def propose_visualizations(self, question: str, df_info: Dict[str, Any], analysis: Dict[str, Any]) -> List[Dict[str, Any]]:
-        """Génère 3 propositions de visualisations"""
-        
-        prompt = f"""Propose 3 visualisations DIFFÉRENTES.
+    def propose_visualizations(
+        self,
+        question: str,
+        df_info: Dict[str, Any],
+        analysis: Dict[str, Any],
+        use_cache: bool = True,
+        df: Optional[pd.DataFrame] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Génère 3 propositions de visualisations (use_cache=False force un nouvel appel)
+        
+        Les propositions manquantes viennent du moteur statistique
+        (HeuristicProposer), calculé sur df s'il est fourni.
+        """
+        self.last_from_cache = False
+        self.last_fallback = False
+        self.last_valid_count = 0
+        
+        columns = self.prompt_builder.columns(df_info, question)
+        prompt = self._build_prompt(question, columns, analysis)
+        
+        self.last_prompt_tokens = prompt_tokens(prompt)
+        try:
+            result = generate_structured(
+                self.client, self.model, prompt, proposals_schema(columns.included),
+                "proposals", use_cache=use_cache
+            )
+            self.last_from_cache = result.from_cache
+            self.last_prompt_tokens = prompt_tokens(prompt, result.generation.metadata)
+            proposals = result.value["proposals"]
+            
+            # VALIDATION: Vérifier que chaque proposition est valide
+            validated_proposals = []
+            for prop in proposals:
+                if self._validate_proposal(prop, df_info):
+                    validated_proposals.append(prop)
+            self.last_valid_count = len(validated_proposals)
+            
+            # Si pas assez de propositions valides, ajouter des fallbacks
+            validated_proposals += self._get_fallbacks(df_info, validated_proposals[:3], question, df)
+            return validated_proposals[:3]
+            
+        except Exception:
+            # LLM indisponible, ou réponse non conforme même après réparation
+            self.last_fallback = True
+            return self._get_fallbacks(df_info, [], question, df)
+    
+    def stream_proposals(
+        self,
+        question: str,
+        df_info: Dict[str, Any],
+        analysis: Dict[str, Any],
+        use_cache: bool = True,
+        df: Optional[pd.DataFrame] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Propositions validées émises une à une, au fil de la génération
+        
+        La réponse est streamée et chaque objet JSON du tableau "proposals"
+        est validé dès qu'il est complet; les manquants sont complétés par
+        des fallbacks en fin de flux.
+        
+        Yields:
+            Propositions (3 au plus)
+        """
+        columns = self.prompt_builder.columns(df_info, question)
+        prompt = self._build_prompt(question, columns, analysis)
+        schema = proposals_schema(columns.included)
+        self.last_prompt_tokens = prompt_tokens(prompt)
+        yield from self.validate_stream(
+            lambda: self.client.stream_generate(
+                self.model, prompt, use_cache=use_cache, validate=conforms(schema), format=schema
+            ),
+            df_info, schema=schema, name="proposals", use_cache=use_cache, question=question, df=df
+        )
+    
+    def validate_stream(
+        self,
+        open_stream: Callable[[], GenerationStream],
+        df_info: Dict[str, Any],
+        schema: Optional[Dict[str, Any]] = None,
+        name: str = "proposals",
+        use_cache: bool = True,
+        question: str = "",
+        df: Optional[pd.DataFrame] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Valide au fil de l'eau les propositions d'une réponse streamée
+        
+        En fin de flux, la réponse complète est vérifiée contre le schéma;
+        si elle n'est pas conforme, un appel de réparation complète les
+        propositions manquantes. La réponse validée est dans last_structured.
+        
+        Args:
+            open_stream: Ouvre le flux de génération (appelé une fois)
+            df_info: Informations sur le DataFrame
+            schema: Schéma JSON demandé au LLM (None: pas de vérification)
+            name: Type de réponse pour les statistiques de parsing
+            use_cache: Cache des réponses pour l'appel de réparation
+            question: Problématique, pour classer les fallbacks
+            df: DataFrame pour les statistiques des fallbacks (optionnel)
+        
+        Yields:
+            Propositions (3 au plus), complétées par des fallbacks
+        """
+        self.last_from_cache = False
+        self.last_fallback = False
+        self.last_valid_count = 0
+        self.last_structured = None
+        
+        emitted = []
+        count = 0
+        try:
+            stream = open_stream()
+            self.last_from_cache = stream.from_cache
+            for prop in iter_json_objects(stream):
+                if count < 3 and self._validate_proposal(prop, df_info):
+                    count += 1
+                    self.last_valid_count = count
+                    emitted.append(prop)
+                    yield prop
+            if self.last_prompt_tokens is not None:
+                self.last_prompt_tokens["actual"] = stream.metadata.get("prompt_eval_count")
+            
+            if schema is not None:
+                generation = Generation(stream.text, stream.model, from_cache=stream.from_cache,
+                                        elapsed_ms=stream.elapsed_ms, metadata=stream.metadata)
+                result = check_structured(self.client, generation, schema, name, use_cache=use_cache)
+                self.last_structured = result.value
+                if result.repaired:
+                    self.last_from_cache = result.from_cache
+                    for prop in result.value.get("proposals", []):
+                        if count < 3 and prop not in emitted and self._validate_proposal(prop, df_info):
+                            count += 1
+                            self.last_valid_count = count
+                            emitted.append(prop)
+                            yield prop
+        except Exception:
+            self.last_fallback = True
+            if count == 0:
+                yield from self._get_fallbacks(df_info, [], question, df)
+                return
+        
+        # Si pas assez de propositions valides, ajouter des fallbacks
+        yield from self._get_fallbacks(df_info, emitted[:3], question, df)
+    
+    def _build_prompt(self, question: str, columns: ColumnContext, analysis: Dict[str, Any]) -> str:
+        """Prompt de proposition (partagé par les modes streamé et non streamé)"""
+        return f"""Propose 3 visualisations DIFFÉRENTES.
 
 PROBLÉMATIQUE: "{question}"
-COLONNES NUMÉRIQUES: {', '.join(df_info.get('numeric_columns', []))}
-COLONNES CATÉGORIELLES: {', '.join(df_info.get('categorical_columns', []))}
+COLONNES NUMÉRIQUES: {', '.join(columns.numeric)}
+COLONNES CATÉGORIELLES: {', '.join(columns.categorical)}{columns.note()}
 
-Types disponibles: bar_chart, scatter_plot, histogram, box_plot
+Types disponibles: bar_chart, scatter_plot, histogram, box_plot, line_chart (x temporel)
 
 IMPORTANT: Pour chaque visualisation, x_axis et y_axis doivent être des noms de colonnes valides (pas null, pas "None").
 
@@ -35,45 +201,6 @@ Réponds en JSON uniquement:
     {{"id": 3, "type": "histogram", "title": "Titre 3", "x_axis": "colonne5", "y_axis": "count", "color": null, "rationale": "Raison"}}
   ]
 }}"""
-        
-        try:
-            response = requests.post(
-                f"{self.base_url}/api/generate",
-                json={"model": self.model, "prompt": prompt, "stream": False},
-                timeout=30
-            )
-            content = response.json()["response"]
-            
-            # Extraire le JSON
-            start = content.find('{')
-            end = content.rfind('}') + 1
-            if start != -1 and end != 0:
-                content = content[start:end]
-            
-            result = json.loads(content)
-            proposals = result.get("proposals", [])
-            
-            # VALIDATION: Vérifier que chaque proposition est valide
-            validated_proposals = []
-            for prop in proposals:
-                if self._validate_proposal(prop, df_info):
-                    validated_proposals.append(prop)
-            
-            # Si pas assez de propositions valides, ajouter des fallbacks
-            while len(validated_proposals) < 3:
-                fallback = self._get_single_fallback(
-                    len(validated_proposals) + 1, 
-                    df_info
-                )
-                if fallback:
-                    validated_proposals.append(fallback)
-                else:
-                    break
-            
-            return validated_proposals[:3]
-            
-        except:
-            return self._get_default_proposals(df_info)
     
     def _validate_proposal(self, proposal: Dict[str, Any], df_info: Dict[str, Any]) -> bool:
         """Valide qu'une proposition est correcte"""
@@ -109,81 +236,14 @@ Réponds en JSON uniquement:
         
         return True
     
-    def _get_single_fallback(self, proposal_id: int, df_info: Dict[str, Any]) -> Dict[str, Any]:
-        """Génère une seule proposition fallback"""
-        numeric = df_info.get('numeric_columns', [])
-        categoric = df_info.get('categorical_columns', [])
-        
-        if proposal_id == 1 and len(numeric) >= 2:
-            return {
-                "id": 1, 
-                "type": "scatter_plot",
-                "title": f"Relation entre {numeric[0]} et {numeric[1]}",
-                "x_axis": numeric[0], 
-                "y_axis": numeric[1],
-                "color": None,
-                "rationale": "Nuage de points pour explorer la corrélation"
-            }
-        
-        elif proposal_id == 2 and categoric and numeric:
-            return {
-                "id": 2, 
-                "type": "bar_chart",
-                "title": f"Moyenne de {numeric[0]} par {categoric[0]}",
-                "x_axis": categoric[0], 
-                "y_axis": numeric[0],
-                "color": None,
-                "rationale": "Comparaison des moyennes par catégorie"
-            }
-        
-        elif proposal_id == 3 and numeric:
-            return {
-                "id": 3, 
-                "type": "histogram",
-                "title": f"Distribution de {numeric[0]}",
-                "x_axis": numeric[0], 
-                "y_axis": "count",
-                "color": None,
-                "rationale": "Histogramme pour voir la distribution"
-            }
-        
-        return None
-    
-    def _get_default_proposals(self, df_info: Dict[str, Any]) -> List[Dict[str, Any]]:
-        """Propositions par défaut complètes"""
-        proposals = []
-        
-        for i in range(1, 4):
-            fallback = self._get_single_fallback(i, df_info)
-            if fallback:
-                proposals.append(fallback)
-        
-        # Compléter si nécessaire
-        numeric = df_info.get('numeric_columns', [])
-        categoric = df_info.get('categorical_columns', [])
-        
-        while len(proposals) < 3:
-            if numeric:
-                proposals.append({
-                    "id": len(proposals) + 1,
-                    "type": "histogram",
-                    "title": f"Distribution de {numeric[0]}",
-                    "x_axis": numeric[0],
-                    "y_axis": "count",
-                    "color": None,
-                    "rationale": "Visualisation de distribution"
-                })
-            elif categoric and numeric:
-                proposals.append({
-                    "id": len(proposals) + 1,
-                    "type": "bar_chart",
-                    "title": f"{numeric[0]} par {categoric[0]}",
-                    "x_axis": categoric[0],
-                    "y_axis": numeric[0],
-                    "color": None,
-                    "rationale": "Comparaison par catégorie"
-                })
-            else:
-                break
-        
-        return proposals[:3]
\ No newline at end of file
+    def _get_fallbacks(
+        self,
+        df_info: Dict[str, Any],
+        existing: List[Dict[str, Any]],
+        question: str = "",
+        df: Optional[pd.DataFrame] = None
+    ) -> List[Dict[str, Any]]:
+        """Propositions statistiques complétant existing jusqu'à 3 (axes et types différents)"""
+        if len(existing) >= 3:
+            return []
+        return self.heuristic.propose(df, df_info, question, k=3 - len(existing), exclude=existing)
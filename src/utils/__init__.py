@@ -2,12 +2,36 @@
 Utilitaires pour le chargement et la validation des données
 """
 
-from .data_loader import load_csv, get_dataframe_info
+from .data_loader import load_csv, load_csv_cached, load_csv_chunked, get_dataframe_info
+from .cache import DatasetCache
+from .dtypes import compact_dataframe
+from .profiler import DataFrameProfile, get_profile, dataset_fingerprint
+from .sketches import SketchProfile
+from .incremental import IncrementalDataset
+from .streaming import StreamingDataset
+from .local_source import LocalDataset, open_local_dataset, list_local_datasets, get_data_root
 from .validator import validate_dataframe, check_column_types
+from .rules import RuleEngine, register_rule
 
 __all__ = [
     "load_csv",
+    "load_csv_cached",
+    "load_csv_chunked",
+    "DatasetCache",
+    "compact_dataframe",
+    "DataFrameProfile",
+    "get_profile",
+    "dataset_fingerprint",
+    "SketchProfile",
+    "IncrementalDataset",
+    "StreamingDataset",
+    "LocalDataset",
+    "open_local_dataset",
+    "list_local_datasets",
+    "get_data_root",
     "get_dataframe_info",
     "validate_dataframe",
     "check_column_types",
+    "RuleEngine",
+    "register_rule",
 ]
@@ -0,0 +1,214 @@
+"""
+Cache disque des datasets parsés
+Clé = empreinte du contenu du fichier, stockage colonnaire Parquet, éviction LRU
+"""
+
+import pandas as pd
+from pathlib import Path
+from typing import Any, Dict, Optional
+import hashlib
+import os
+import tempfile
+import threading
+
+try:
+    import pyarrow  # noqa: F401
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+
+DEFAULT_CACHE_DIR = Path(tempfile.gettempdir()) / "dataviz_cache"
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+_HASH_BLOCK = 1024 * 1024
+
+
+def hash_content(file_content: Any, **params) -> str:
+    """
+    Calcule l'empreinte du contenu d'un fichier, lu par blocs
+
+    Args:
+        file_content: Chemin, bytes ou objet file-like (UploadedFile Streamlit)
+        params: Paramètres de lecture qui influencent le résultat (encodage...)
+
+    Returns:
+        Empreinte hexadécimale
+    """
+    h = hashlib.blake2b(digest_size=20)
+
+    if isinstance(file_content, (str, os.PathLike)):
+        with open(file_content, 'rb') as f:
+            for block in iter(lambda: f.read(_HASH_BLOCK), b''):
+                h.update(block)
+    elif isinstance(file_content, (bytes, bytearray, memoryview)):
+        h.update(file_content)
+    elif hasattr(file_content, 'getbuffer'):
+        # BytesIO / UploadedFile: vue sans copie sur le contenu
+        h.update(file_content.getbuffer())
+    else:
+        file_content.seek(0)
+        for block in iter(lambda: file_content.read(_HASH_BLOCK), b''):
+            h.update(block)
+        file_content.seek(0)
+
+    for name in sorted(params):
+        h.update(f"|{name}={params[name]}".encode())
+
+    return h.hexdigest()
+
+
+class DatasetCache:
+    """Cache LRU borné en taille de DataFrames stockés en Parquet"""
+
+    def __init__(self, cache_dir: Optional[Path] = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        Args:
+            cache_dir: Répertoire du cache (défaut: temp/dataviz_cache)
+            max_bytes: Taille maximale du cache sur disque
+        """
+        self.cache_dir = Path(cache_dir) if cache_dir else DEFAULT_CACHE_DIR
+        self.max_bytes = max_bytes
+        self.enabled = HAS_PYARROW
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.write_errors = 0
+        self.last_write_error: Optional[str] = None
+        self._lock = threading.Lock()
+        self._path_keys: Dict[tuple, str] = {}
+
+        if self.enabled:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def key_for(self, file_content: Any, **params) -> str:
+        """
+        Clé de cache d'un fichier
+
+        Pour un chemin, l'empreinte est mémorisée tant que le fichier
+        n'est pas modifié (taille + date), ce qui évite de le relire.
+        """
+        if isinstance(file_content, (str, os.PathLike)):
+            stat = os.stat(file_content)
+            memo_key = (os.fspath(file_content), stat.st_size, stat.st_mtime_ns, tuple(sorted(params.items())))
+            if memo_key not in self._path_keys:
+                self._path_keys[memo_key] = hash_content(file_content, **params)
+            return self._path_keys[memo_key]
+        return hash_content(file_content, **params)
+
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.parquet"
+
+    def get(self, key: str) -> Optional[pd.DataFrame]:
+        """
+        Lit un DataFrame du cache
+
+        Returns:
+            DataFrame ou None si absent
+        """
+        if not self.enabled:
+            return None
+
+        path = self._entry_path(key)
+        try:
+            df = pd.read_parquet(path)
+        except (FileNotFoundError, OSError):
+            with self._lock:
+                self.misses += 1
+            return None
+        except Exception:
+            # Entrée corrompue: la supprimer
+            path.unlink(missing_ok=True)
+            with self._lock:
+                self.misses += 1
+            return None
+
+        # Mise à jour de la date d'accès pour l'ordre LRU
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        with self._lock:
+            self.hits += 1
+        return df
+
+    def put(self, key: str, df: pd.DataFrame) -> bool:
+        """
+        Stocke un DataFrame dans le cache
+
+        Returns:
+            True si le DataFrame a été mis en cache
+        """
+        if not self.enabled:
+            return False
+
+        path = self._entry_path(key)
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            df.to_parquet(tmp_path, index=False)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            # Types non sérialisables en Parquet (colonnes objet mixtes...)
+            tmp_path.unlink(missing_ok=True)
+            with self._lock:
+                self.write_errors += 1
+                self.last_write_error = str(e)
+            return False
+
+        self._evict()
+        return True
+
+    def _evict(self):
+        """Supprime les entrées les moins récemment utilisées au-delà de max_bytes"""
+        entries = []
+        for path in self.cache_dir.glob("*.parquet"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries, key=lambda entry: entry[0]):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            with self._lock:
+                self.evictions += 1
+
+    def clear(self):
+        """Vide le cache"""
+        for path in self.cache_dir.glob("*.parquet"):
+            path.unlink(missing_ok=True)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Compteurs du cache
+
+        Returns:
+            Dictionnaire hits, misses, evictions, write_errors, last_write_error,
+            entries, size_bytes, hit_rate
+        """
+        sizes = [path.stat().st_size for path in self.cache_dir.glob("*.parquet")] if self.enabled else []
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "write_errors": self.write_errors,
+            "last_write_error": self.last_write_error,
+            "entries": len(sizes),
+            "size_bytes": sum(sizes),
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+_default_cache: Optional[DatasetCache] = None
+
+
+def get_default_cache() -> DatasetCache:
+    """Cache partagé par tout le processus"""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = DatasetCache()
+    return _default_cache
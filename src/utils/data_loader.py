@@ -4,16 +4,35 @@ Module de chargement et d'analyse des données CSV
 
 import pandas as pd
 from typing import Dict, Any, Optional
-import io
 
+from .streaming import StreamingDataset, open_source, DEFAULT_CHUNKSIZE, DEFAULT_SAMPLE_SIZE
+from .cache import DatasetCache, get_default_cache
+from .dtypes import compact_dataframe
+from .profiler import get_profile, get_sketch, set_dataset_fingerprint
+from .sniffer import sniff_csv
+from .parsers import parse_csv
 
-def load_csv(file_content: Any, encoding: str = "utf-8") -> pd.DataFrame:
+
+def load_csv(
+    file_content: Any,
+    encoding: Optional[str] = None,
+    compact: bool = False,
+    backend: str = "auto"
+) -> pd.DataFrame:
     """
     Charge un fichier CSV en DataFrame pandas
     
+    Encodage, délimiteur, séparateur décimal et en-tête sont détectés sur
+    le début du fichier, puis le fichier est parsé une seule fois. La
+    décision et sa durée sont dans df.attrs["sniff"].
+    
     Args:
         file_content: Contenu du fichier (bytes ou file-like object)
-        encoding: Encodage du fichier
+        encoding: Encodage du fichier (détecté si None)
+        compact: Compacter les types après lecture (category, datetime,
+            downcast numérique). Le rapport est dans df.attrs["compaction"]
+        backend: Parser à utiliser ("pandas", "pyarrow" ou "auto" pour
+            choisir selon la taille du fichier)
         
     Returns:
         DataFrame pandas
@@ -22,52 +41,136 @@ def load_csv(file_content: Any, encoding: str = "utf-8") -> pd.DataFrame:
         ValueError: Si le fichier ne peut pas être lu
     """
     try:
-        # Si c'est un objet UploadedFile de Streamlit
-        if hasattr(file_content, 'getvalue'):
-            content = file_content.getvalue()
-            df = pd.read_csv(io.BytesIO(content), encoding=encoding)
-        else:
-            df = pd.read_csv(file_content, encoding=encoding)
-        
-        return df
-    except UnicodeDecodeError:
-        # Essayer avec un autre encodage
-        try:
-            if hasattr(file_content, 'seek'):
-                file_content.seek(0)
-            df = pd.read_csv(file_content, encoding='latin-1')
-            return df
-        except Exception as e:
-            raise ValueError(f"Impossible de lire le fichier CSV: {str(e)}")
+        dialect = sniff_csv(file_content, encoding=encoding)
+        df = parse_csv(file_content, dialect, backend=backend)
+    except Exception as e:
+        raise ValueError(f"Erreur lors du chargement du CSV: {str(e)}")
+    df.attrs["sniff"] = dialect.to_dict()
+
+    if compact:
+        df, report = compact_dataframe(df)
+        df.attrs["compaction"] = report
+
+    return df
+
+
+def load_csv_cached(
+    file_content: Any,
+    encoding: Optional[str] = None,
+    compact: bool = False,
+    backend: str = "auto",
+    cache: Optional[DatasetCache] = None
+) -> pd.DataFrame:
+    """
+    Charge un fichier CSV en passant par le cache disque
+
+    Un même contenu (upload répété, rerun Streamlit, exemple) n'est parsé
+    qu'une fois: les appels suivants relisent le Parquet mis en cache.
+
+    Args:
+        file_content: Chemin, bytes ou objet file-like (UploadedFile Streamlit)
+        encoding: Encodage du fichier (détecté si None)
+        compact: Compacter les types après lecture (voir load_csv)
+        backend: Parser à utiliser (voir load_csv)
+        cache: Cache à utiliser (défaut: cache partagé du processus)
+
+    Returns:
+        DataFrame pandas
+
+    Raises:
+        ValueError: Si le fichier ne peut pas être lu
+    """
+    cache = cache or get_default_cache()
+    key = cache.key_for(file_content, encoding=encoding, compact=compact, backend=backend)
+
+    df = cache.get(key)
+    if df is None:
+        df = load_csv(file_content, encoding=encoding, compact=compact, backend=backend)
+        cache.put(key, df)
+    # Relu du cache à chaque rerun: la clé sert d'empreinte sans rehacher les valeurs
+    set_dataset_fingerprint(df, key)
+    return df
+
+
+def load_csv_chunked(
+    file_content: Any,
+    chunksize: int = DEFAULT_CHUNKSIZE,
+    sample_size: int = DEFAULT_SAMPLE_SIZE,
+    encoding: Optional[str] = None,
+    random_state: Optional[int] = None,
+) -> StreamingDataset:
+    """
+    Charge un fichier CSV par morceaux, à mémoire bornée
+
+    La mémoire crête est proportionnelle à chunksize + sample_size et non
+    à la taille du fichier. Le profil (get_info) et l'échantillon de travail
+    (sample) sont construits pendant la lecture.
+
+    Args:
+        file_content: Chemin, bytes ou objet file-like (UploadedFile Streamlit)
+        chunksize: Nombre de lignes lues par morceau
+        sample_size: Nombre maximal de lignes de l'échantillon de travail
+        encoding: Encodage du fichier (détecté si None)
+        random_state: Graine pour l'échantillonnage
+
+    Returns:
+        StreamingDataset déjà parcouru
+
+    Raises:
+        ValueError: Si le fichier ne peut pas être lu
+    """
+    source = open_source(file_content)
+    try:
+        dialect = sniff_csv(source, encoding=encoding)
+        read_kwargs = dialect.read_csv_kwargs()
+        dataset = StreamingDataset(
+            source, chunksize=chunksize, sample_size=sample_size,
+            encoding=read_kwargs.pop("encoding"), random_state=random_state,
+            encoding_errors='replace', **read_kwargs
+        ).ingest()
     except Exception as e:
         raise ValueError(f"Erreur lors du chargement du CSV: {str(e)}")
 
+    dataset.dialect = dialect
+    return dataset
+
 
-def get_dataframe_info(df: pd.DataFrame, n_rows: int = 5) -> Dict[str, Any]:
+def get_dataframe_info(df: pd.DataFrame, n_rows: int = 5, approximate: bool = False) -> Dict[str, Any]:
     """
     Extrait les informations importantes d'un DataFrame
     
     Args:
         df: DataFrame pandas
         n_rows: Nombre de lignes à inclure dans l'aperçu
+        approximate: Statistiques approchées par sketches (quartiles,
+            valeurs distinctes) et aperçu tiré d'un échantillon aléatoire,
+            pour les DataFrames de plusieurs dizaines de millions de lignes
         
     Returns:
-        Dictionnaire contenant les métadonnées du DataFrame
+        Dictionnaire contenant les métadonnées du DataFrame (et
+        "error_bounds" en mode approché, voir SketchProfile.error_bounds)
     """
+    profile = get_profile(df, approximate=approximate)
+    head = get_sketch(df).head(n_rows) if approximate else df.head(n_rows)
+
     info = {
         "shape": df.shape,
         "columns": list(df.columns),
         "dtypes": {col: str(dtype) for col, dtype in df.dtypes.items()},
-        "null_counts": df.isnull().sum().to_dict(),
-        "head": df.head(n_rows).to_dict(orient='records'),
-        "numeric_columns": list(df.select_dtypes(include=['number']).columns),
-        "categorical_columns": list(df.select_dtypes(include=['object', 'category']).columns),
-        "datetime_columns": list(df.select_dtypes(include=['datetime64']).columns),
+        "null_counts": profile.null_counts,
+        "unique_counts": profile.unique_counts,
+        "head": head.to_dict(orient='records'),
+        "numeric_columns": list(profile.numeric_columns),
+        "categorical_columns": list(profile.categorical_columns),
+        "datetime_columns": list(profile.datetime_columns),
     }
     
     # Statistiques descriptives pour les colonnes numériques
     if len(info["numeric_columns"]) > 0:
-        info["numeric_stats"] = df[info["numeric_columns"]].describe().to_dict()
+        info["numeric_stats"] = profile.numeric_stats
+    
+    if profile.error_bounds is not None:
+        info["error_bounds"] = profile.error_bounds
     
     return info
 
@@ -82,30 +185,5 @@ def infer_column_semantics(df: pd.DataFrame) -> Dict[str, str]:
     Returns:
         Dictionnaire {nom_colonne: type_sémantique}
     """
-    semantics = {}
-    
-    for col in df.columns:
-        dtype = df[col].dtype
-        
-        # Détection de dates
-        if pd.api.types.is_datetime64_any_dtype(dtype):
-            semantics[col] = "temporal"
-        # Détection de numériques
-        elif pd.api.types.is_numeric_dtype(dtype):
-            # Vérifier si c'est potentiellement un ID
-            if df[col].nunique() == len(df) and col.lower() in ['id', 'index', 'key']:
-                semantics[col] = "identifier"
-            else:
-                semantics[col] = "quantitative"
-        # Détection de catégories
-        elif pd.api.types.is_object_dtype(dtype):
-            n_unique = df[col].nunique()
-            # Si peu de valeurs uniques, c'est probablement catégoriel
-            if n_unique < len(df) * 0.5:
-                semantics[col] = "categorical"
-            else:
-                semantics[col] = "text"
-        else:
-            semantics[col] = "unknown"
-    
-    return semantics
+    profile = get_profile(df)
+    return {col: profile.semantic_type(col) for col in profile.columns}
@@ -0,0 +1,130 @@
+"""
+Module de compaction des types d'un DataFrame
+Réduit l'empreinte mémoire et accélère nunique/groupby/value_counts
+"""
+
+import pandas as pd
+import numpy as np
+from typing import Dict, Any, Tuple, Optional
+
+
+# Formats de dates essayés, dans l'ordre, sur un échantillon de la colonne
+DATE_FORMATS = [
+    "%Y-%m-%d",
+    "%Y-%m-%d %H:%M:%S",
+    "%Y-%m-%dT%H:%M:%S",
+    "%d/%m/%Y",
+    "%d/%m/%Y %H:%M",
+    "%Y/%m/%d",
+    "%d-%m-%Y",
+]
+
+
+def _is_text(series: pd.Series) -> bool:
+    """Colonne de chaînes (object, dtype string ou string Arrow)"""
+    return pd.api.types.is_string_dtype(series.dtype)
+
+
+def detect_date_format(series: pd.Series, sample_size: int = 200) -> Optional[str]:
+    """
+    Cherche un format de date qui parse tout un échantillon de la colonne
+
+    Args:
+        series: Colonne de chaînes
+        sample_size: Nombre de valeurs testées
+
+    Returns:
+        Format strftime ou None si la colonne ne ressemble pas à des dates
+    """
+    sample = series.dropna().head(sample_size).astype(str)
+    if sample.empty:
+        return None
+
+    # Rejet rapide: une date contient au moins un séparateur et des chiffres
+    first = sample.iloc[0]
+    if not any(sep in first for sep in "-/") or not any(c.isdigit() for c in first):
+        return None
+
+    for fmt in DATE_FORMATS:
+        parsed = pd.to_datetime(sample, format=fmt, errors='coerce')
+        if parsed.notna().all():
+            return fmt
+    return None
+
+
+def _downcast_numeric(series: pd.Series) -> pd.Series:
+    """Downcast sans perte d'une colonne numérique"""
+    if pd.api.types.is_bool_dtype(series.dtype):
+        return series
+
+    if pd.api.types.is_integer_dtype(series.dtype):
+        return pd.to_numeric(series, downcast='integer')
+
+    # Flottants numpy uniquement: les types Arrow restent Arrow
+    if isinstance(series.dtype, np.dtype) and series.dtype.kind == 'f' and series.dtype != np.float32:
+        values = series.to_numpy()
+        as_float32 = values.astype(np.float32)
+        # float32 seulement si toutes les valeurs sont représentées exactement
+        if np.array_equal(as_float32.astype(values.dtype), values, equal_nan=True):
+            return pd.Series(as_float32, index=series.index, name=series.name)
+
+    return series
+
+
+def compact_dataframe(
+    df: pd.DataFrame,
+    max_category_ratio: float = 0.5,
+    parse_dates: bool = True,
+    downcast: bool = True
+) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    """
+    Compacte les types d'un DataFrame
+
+    - chaînes à faible cardinalité -> category
+    - colonnes ressemblant à des dates -> datetime64
+    - entiers/flottants -> plus petit type sans perte
+
+    Args:
+        df: DataFrame pandas
+        max_category_ratio: Ratio valeurs uniques / lignes sous lequel une
+            colonne texte devient catégorielle
+        parse_dates: Convertir les colonnes de dates
+        downcast: Réduire les types numériques
+
+    Returns:
+        Tuple (DataFrame compacté, rapport)
+        Le rapport contient memory_before, memory_after, saved_bytes et
+        conversions {colonne: "ancien -> nouveau"}
+    """
+    memory_before = int(df.memory_usage(deep=True).sum())
+    columns = {}
+    conversions = {}
+
+    for col in df.columns:
+        series = df[col]
+        new_series = series
+
+        if _is_text(series):
+            fmt = detect_date_format(series) if parse_dates else None
+            if fmt is not None:
+                new_series = pd.to_datetime(series, format=fmt, errors='coerce')
+            elif series.nunique() <= len(series) * max_category_ratio:
+                new_series = series.astype('category')
+        elif downcast and pd.api.types.is_numeric_dtype(series.dtype):
+            new_series = _downcast_numeric(series)
+
+        if new_series.dtype != series.dtype:
+            conversions[col] = f"{series.dtype} -> {new_series.dtype}"
+        columns[col] = new_series
+
+    compacted = pd.DataFrame(columns, index=df.index)
+    compacted.attrs = dict(df.attrs)
+    memory_after = int(compacted.memory_usage(deep=True).sum())
+
+    report = {
+        "memory_before": memory_before,
+        "memory_after": memory_after,
+        "saved_bytes": memory_before - memory_after,
+        "conversions": conversions,
+    }
+    return compacted, report
@@ -0,0 +1,334 @@
+"""
+Module de maintenance incrémentale du profil sur données ajoutées
+Pour les datasets rafraîchis par ajout de lignes (ventes, climat...)
+"""
+
+import threading
+
+import numpy as np
+import pandas as pd
+from typing import Dict, Any, List, Optional, Tuple
+
+from .profiler import (
+    ColumnProfile, DataFrameProfile, chain_fingerprint, dataset_fingerprint, get_profile, set_dataset_fingerprint
+)
+from .sketches import ColumnSketch, DEFAULT_DISTINCT_ERROR, DEFAULT_MAX_EXACT_DISTINCT, DEFAULT_QUANTILE_ERROR, DEFAULT_SEED_SAMPLE
+from .validator import validate_batch
+
+
+def _sort_keys(series: pd.Series) -> Optional[np.ndarray]:
+    """
+    Valeurs non nulles d'une colonne numérique (float64) ou temporelle (int64,
+    en ns), comparables entre lots; None pour les autres colonnes
+    """
+    series = series.dropna()
+    dtype = series.dtype
+    if pd.api.types.is_bool_dtype(dtype):
+        return None
+    if pd.api.types.is_numeric_dtype(dtype):
+        return series.to_numpy(dtype='float64')
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        if getattr(dtype, 'tz', None) is not None:
+            series = series.dt.tz_convert(None)
+        return series.astype('datetime64[ns]').to_numpy().view('int64')
+    return None
+
+
+def _hash_keys(series: pd.Series) -> np.ndarray:
+    """Hashs uint64 des valeurs non nulles (colonnes sans ordre: texte...)"""
+    return pd.util.hash_pandas_object(series.dropna().astype(str), index=False, categorize=False).to_numpy()
+
+
+def _contains(present: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """Appartenance de values au tableau trié present (recherche dichotomique)"""
+    if len(present) == 0:
+        return np.zeros(len(values), dtype=bool)
+    positions = np.minimum(np.searchsorted(present, values), len(present) - 1)
+    return present[positions] == values
+
+
+class IncrementalDataset:
+    """
+    Dataset auquel on ajoute des lots de lignes
+
+    Le profil initial est le profil exact (get_profile, partagé avec
+    get_dataframe_info). Au premier ajout, l'état courant en est tiré sans
+    reparcourir les données; chaque ajout ne traite ensuite que le lot:
+    - nulls, count/mean/std/min/max: fusionnés exactement (moments)
+    - valeurs distinctes: exactes (valeurs du lot absentes des données déjà
+      présentes); pour une colonne de forte cardinalité, elles sont
+      recherchées dans les valeurs initiales (hashs pour le texte) triées
+      une fois, à la première recherche; une valeur numérique ou temporelle
+      hors de l'étendue déjà vue est nouvelle sans recherche
+    - quartiles: approchés (sketch KLL initialisé par un échantillon),
+      bornes d'erreur dans profile.error_bounds
+
+    L'empreinte (key) est chaînée: empreinte précédente + hash du lot.
+    """
+
+    def __init__(
+        self,
+        df: pd.DataFrame,
+        quantile_error: float = DEFAULT_QUANTILE_ERROR,
+        max_exact_distinct: int = DEFAULT_MAX_EXACT_DISTINCT,
+        seed_sample: int = DEFAULT_SEED_SAMPLE,
+        seed: Optional[int] = None
+    ):
+        """
+        Args:
+            df: Données initiales (déjà validées)
+            quantile_error: Erreur de rang du sketch des quartiles
+            max_exact_distinct: Cardinalité jusqu'à laquelle les valeurs
+                distinctes d'une colonne sont gardées en mémoire
+            seed_sample: Lignes tirées pour initialiser les quartiles
+            seed: Graine aléatoire
+        """
+        self._frames: List[pd.DataFrame] = [df]
+        self._dtypes = df.dtypes
+        self._quantile_error = quantile_error
+        self._max_exact_distinct = max_exact_distinct
+        self._seed_sample = seed_sample
+        self._seed = seed
+        self._base_profile = get_profile(df)
+        self._profile: Optional[DataFrameProfile] = self._base_profile
+        self.key = dataset_fingerprint(df)
+        self.n_appends = 0
+        # Concaténation (threads de pré-génération) et ajout de lots
+        self._frames_lock = threading.Lock()
+
+        # État courant, tiré du profil exact au premier ajout (voir _start)
+        self._columns: Optional[Dict[Any, ColumnSketch]] = None
+        self._n_rows = len(df)
+        self._n_unique: Dict[Any, int] = {}
+        # Valeurs distinctes des colonnes de faible cardinalité (None: trop nombreuses)
+        self._distinct: Dict[Any, Optional[pd.Index]] = {}
+        # Étendue (min, max) des colonnes numériques et temporelles de forte cardinalité
+        self._ranges: Dict[Any, Tuple[Any, Any]] = {}
+        self._text_lengths: Dict[Any, float] = {}
+        # Colonnes de forte cardinalité: valeurs initiales triées et valeurs nouvelles de chaque lot
+        self._base = df
+        self._sorted: Dict[Any, np.ndarray] = {}
+        self._seen: Dict[Any, List[np.ndarray]] = {}
+
+    @property
+    def df(self) -> pd.DataFrame:
+        """DataFrame complet (les lots sont concaténés à la demande)"""
+        with self._frames_lock:
+            if len(self._frames) > 1:
+                df = pd.concat(self._frames, ignore_index=True)
+                # Catégories différentes d'un lot à l'autre: pd.concat repasse en object
+                for col, dtype in self._dtypes.items():
+                    if isinstance(dtype, pd.CategoricalDtype) and not isinstance(df[col].dtype, pd.CategoricalDtype):
+                        df[col] = df[col].astype('category')
+                # Empreinte chaînée: le DataFrame concaténé n'est pas rehaché
+                set_dataset_fingerprint(df, self.key)
+                self._frames = [df]
+            return self._frames[0]
+
+    @property
+    def profile(self) -> DataFrameProfile:
+        """Profil courant: exact avant tout ajout, puis tiré de l'état courant"""
+        if self._profile is None:
+            self._profile = self._build_profile()
+        return self._profile
+
+    def _start(self):
+        """État courant tiré du profil exact des données initiales (sans les reparcourir)"""
+        base = self._base
+        self._columns = {}
+        for col, column in self._base_profile.columns.items():
+            sketch = ColumnSketch(DEFAULT_DISTINCT_ERROR, self._quantile_error, self._seed, self._max_exact_distinct)
+            sketch.seed(base[col], column, self._seed_sample)
+            self._columns[col] = sketch
+            self._n_unique[col] = column.n_unique
+            if column.avg_length is not None:
+                self._text_lengths[col] = column.avg_length * (len(base) - column.null_count)
+
+            dtype = base[col].dtype
+            if column.n_unique > self._max_exact_distinct:
+                self._distinct[col] = None
+                if column.kind == 'numeric' and column.numeric_stats and column.numeric_stats['count']:
+                    self._ranges[col] = (column.numeric_stats['min'], column.numeric_stats['max'])
+                elif column.kind == 'temporal':
+                    keys = _sort_keys(base[col])
+                    if keys is not None and len(keys):
+                        self._ranges[col] = (keys.min(), keys.max())
+            elif isinstance(dtype, pd.CategoricalDtype) and len(dtype.categories) == column.n_unique:
+                # Catégories toutes utilisées: ce sont les valeurs distinctes
+                self._distinct[col] = dtype.categories
+            else:
+                # Faible cardinalité: valeurs gardées une fois pour toutes
+                self._distinct[col] = pd.Index(base[col].dropna().unique())
+
+    def _count_new_values(self, col: Any, values: pd.Series) -> int:
+        """Valeurs distinctes du lot absentes des données déjà présentes"""
+        known = self._distinct[col]
+        if known is not None:
+            uniques = pd.Index(values.dropna().unique())
+            new = uniques[known.get_indexer(uniques) < 0]
+            known = known.append(new) if len(new) else known
+            self._distinct[col] = known if len(known) <= self._max_exact_distinct else None
+            if self._distinct[col] is None:
+                # Devenue de forte cardinalité: valeurs connues reprises comme déjà vues
+                known = pd.Series(known)
+                keys = _sort_keys(known)
+                if keys is None:
+                    keys = _hash_keys(known)
+                elif len(keys):
+                    self._ranges[col] = (keys.min(), keys.max())
+                self._sorted[col] = np.sort(keys)
+            return len(new)
+
+        keys = _sort_keys(values)
+        ordered = keys is not None
+        if not ordered:
+            # Texte: hachage 64 bits des valeurs (collisions négligeables)
+            keys = _hash_keys(values)
+
+        # Forte cardinalité: hors de l'étendue déjà vue, une valeur est nouvelle;
+        # les autres sont cherchées dans les valeurs (ou hashs) triés déjà présents
+        uniques = np.unique(keys)
+        if ordered and col in self._ranges:
+            low, high = self._ranges[col]
+            inside = (uniques >= low) & (uniques <= high)
+        else:
+            inside = np.ones(len(uniques), dtype=bool)
+        candidates = uniques[inside]
+        if len(candidates):
+            if col not in self._sorted:
+                base = self._base[col]
+                self._sorted[col] = np.sort(_sort_keys(base) if ordered else _hash_keys(base))
+            for present in [self._sorted[col]] + self._seen.get(col, []):
+                candidates = candidates[~_contains(present, candidates)]
+                if not len(candidates):
+                    break
+        new = np.union1d(uniques[~inside], candidates)
+        if len(new):
+            self._seen.setdefault(col, []).append(new)
+        if ordered and len(uniques):
+            low, high = uniques[0], uniques[-1]
+            if col in self._ranges:
+                low, high = min(low, self._ranges[col][0]), max(high, self._ranges[col][1])
+            self._ranges[col] = (low, high)
+        return len(new)
+
+    def _integrate(self, batch: pd.DataFrame):
+        """Met à jour l'état courant avec le lot seulement"""
+        if self._columns is None:
+            self._start()
+        for col, sketch in self._columns.items():
+            values = batch[col]
+            # Avant update: le lot n'est pas encore dans les données
+            self._n_unique[col] += self._count_new_values(col, values)
+            sketch.update(values)
+            if col in self._text_lengths:
+                self._text_lengths[col] += float(values.dropna().astype(str).str.len().sum())
+        self._n_rows += len(batch)
+
+    def _build_profile(self) -> DataFrameProfile:
+        """Profil de l'état courant (quartiles approchés, voir error_bounds)"""
+        columns = {}
+        for col, sketch in self._columns.items():
+            base = self._base_profile.columns[col]
+            non_null = self._n_rows - sketch.null_count
+            columns[col] = ColumnProfile(
+                name=col,
+                dtype=base.dtype,
+                kind=base.kind,
+                null_count=sketch.null_count,
+                n_unique=self._n_unique[col],
+                numeric_stats=sketch.numeric_stats() if base.kind == 'numeric' else None,
+                avg_length=self._text_lengths[col] / non_null if col in self._text_lengths and non_null else base.avg_length,
+            )
+
+        return DataFrameProfile(
+            n_rows=self._n_rows,
+            columns=columns,
+            numeric_columns=list(self._base_profile.numeric_columns),
+            categorical_columns=list(self._base_profile.categorical_columns),
+            datetime_columns=list(self._base_profile.datetime_columns),
+            error_bounds={
+                "n_unique": {col: 0.0 for col in columns},
+                "quantiles": {col: self._columns[col].quantiles.rank_error for col in self._base_profile.numeric_columns},
+                "sample_rows": 0,
+            },
+        )
+
+    def _align(self, batch: pd.DataFrame) -> pd.DataFrame:
+        """Ramène les dates du lot au type du dataset (CSV relu sans compaction)"""
+        batch = batch[list(self._dtypes.index)].copy()
+        for col, dtype in self._dtypes.items():
+            if pd.api.types.is_datetime64_any_dtype(dtype) and not pd.api.types.is_datetime64_any_dtype(batch[col].dtype):
+                try:
+                    batch[col] = pd.to_datetime(batch[col]).astype(dtype)
+                except (TypeError, ValueError):
+                    pass
+        return batch
+
+    def append(self, batch: pd.DataFrame) -> Tuple[bool, List[str]]:
+        """
+        Ajoute un lot de lignes et met à jour le profil
+
+        Le lot est rejeté (dataset inchangé) s'il ne passe pas la validation.
+
+        Args:
+            batch: Nouvelles lignes, mêmes colonnes que le dataset
+
+        Returns:
+            Tuple (is_valid, list_of_errors)
+        """
+        is_valid, errors = validate_batch(batch, self.profile)
+        if not is_valid:
+            return False, errors
+
+        batch = self._align(batch)
+        self._integrate(batch)
+        key = chain_fingerprint(self.key, batch)
+        with self._frames_lock:
+            self._frames.append(batch)
+            self._profile = None
+            self.key = key
+            self.n_appends += 1
+        return True, []
+
+    def get_info(self, n_rows: int = 5) -> Dict[str, Any]:
+        """
+        Métadonnées au format de get_dataframe_info(), sans reparcourir les données
+
+        Args:
+            n_rows: Nombre de lignes à inclure dans l'aperçu
+
+        Returns:
+            Dictionnaire contenant les métadonnées du dataset ("error_bounds"
+            après un ajout)
+        """
+        profile = self.profile
+        head = self._frames[0].head(n_rows)
+
+        info = {
+            "shape": (profile.n_rows, len(profile.columns)),
+            "columns": list(profile.columns),
+            "dtypes": {col: p.dtype for col, p in profile.columns.items()},
+            "null_counts": profile.null_counts,
+            "unique_counts": profile.unique_counts,
+            "head": head.to_dict(orient='records'),
+            "numeric_columns": list(profile.numeric_columns),
+            "categorical_columns": list(profile.categorical_columns),
+            "datetime_columns": list(profile.datetime_columns),
+        }
+
+        if profile.numeric_columns:
+            info["numeric_stats"] = profile.numeric_stats
+
+        if profile.error_bounds is not None:
+            info["error_bounds"] = profile.error_bounds
+
+        return info
+
+    def column_semantics(self) -> Dict[str, str]:
+        """Rôles sémantiques (voir infer_column_semantics)"""
+        return {col: self.profile.semantic_type(col) for col in self.profile.columns}
+
+    def column_types(self) -> Dict[str, str]:
+        """Types pour la visualisation (voir check_column_types)"""
+        return {col: self.profile.viz_type(col) for col in self.profile.columns}
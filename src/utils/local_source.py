@@ -0,0 +1,269 @@
+"""
+Module d'ingestion de datasets présents sur le serveur
+Fichier CSV/Parquet mappé en mémoire ou répertoire de fichiers partitionnés
+
+Contrairement à l'upload Streamlit, rien n'est copié en mémoire à l'ouverture:
+seules les colonnes (et partitions) demandées sont lues.
+"""
+
+import hashlib
+import os
+import pandas as pd
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+from .sniffer import sniff_csv, CsvDialect
+
+try:
+    import pyarrow.csv as pa_csv
+    import pyarrow.dataset as pa_ds
+    import pyarrow.fs as pa_fs
+    import pyarrow.parquet as pq
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+
+# Répertoire des datasets ouvrables depuis l'app (désactivé si non défini)
+DATA_ROOT_ENV = "DATA_ROOT"
+CSV_SUFFIXES = {'.csv', '.txt', '.tsv'}
+PARQUET_SUFFIXES = {'.parquet', '.pq'}
+DEFAULT_PREVIEW_ROWS = 50_000
+
+PartitionFilter = Dict[str, Union[Any, Sequence[Any]]]
+
+
+def _detect_format(path: Path) -> str:
+    """'csv' ou 'parquet' selon l'extension (du fichier ou des fichiers du répertoire)"""
+    if path.is_file():
+        suffixes = {path.suffix.lower()}
+    else:
+        suffixes = {p.suffix.lower() for p in path.rglob('*') if p.is_file() and not p.name.startswith(('.', '_'))}
+
+    if suffixes and suffixes <= PARQUET_SUFFIXES:
+        return 'parquet'
+    if suffixes and suffixes <= CSV_SUFFIXES:
+        return 'csv'
+    raise ValueError(f"Format non supporté (CSV ou Parquet attendus): {sorted(suffixes)}")
+
+
+class LocalDataset:
+    """
+    Dataset local: fichier CSV/Parquet ou répertoire partitionné (style Hive,
+    ex: region=North/part-0.parquet)
+
+    L'ouverture ne lit que le schéma. read() ne matérialise que les colonnes
+    et partitions demandées, à partir de fichiers mappés en mémoire.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        """
+        Args:
+            path: Chemin d'un fichier ou d'un répertoire sur le serveur
+
+        Raises:
+            ValueError: Si le chemin n'existe pas ou le format n'est pas supporté
+        """
+        self.path = Path(path).expanduser()
+        if not self.path.exists():
+            raise ValueError(f"Chemin introuvable: {self.path}")
+
+        self.format = _detect_format(self.path)
+        self.dialect: Optional[CsvDialect] = None
+        self._dataset = None
+
+        if self.format == 'csv':
+            first_file = self.path if self.path.is_file() else next(
+                p for p in sorted(self.path.rglob('*')) if p.suffix.lower() in CSV_SUFFIXES
+            )
+            self.dialect = sniff_csv(first_file)
+
+        if HAS_PYARROW:
+            self._dataset = self._open_arrow_dataset()
+        elif self.format == 'parquet' or self.path.is_dir():
+            raise ImportError("pyarrow est requis pour les fichiers Parquet et les répertoires partitionnés")
+
+    def _open_arrow_dataset(self):
+        """Dataset pyarrow sur un système de fichiers local mappé en mémoire"""
+        filesystem = pa_fs.LocalFileSystem(use_mmap=True)
+
+        if self.format == 'csv':
+            kwargs = self.dialect.read_csv_kwargs()
+            file_format = pa_ds.CsvFileFormat(
+                parse_options=pa_csv.ParseOptions(delimiter=self.dialect.delimiter),
+                convert_options=pa_csv.ConvertOptions(decimal_point=self.dialect.decimal),
+                read_options=pa_csv.ReadOptions(
+                    encoding=self.dialect.encoding.replace('utf-8-sig', 'utf-8'),
+                    column_names=kwargs.get("names"),
+                ),
+            )
+        else:
+            file_format = 'parquet'
+
+        return pa_ds.dataset(
+            str(self.path), format=file_format, filesystem=filesystem,
+            partitioning='hive' if self.path.is_dir() else None,
+        )
+
+    @property
+    def fingerprint(self) -> str:
+        """Empreinte des fichiers (chemin, taille, date de modification), sans les lire"""
+        files = [self.path] if self.path.is_file() else sorted(p for p in self.path.rglob('*') if p.is_file())
+        h = hashlib.blake2b(digest_size=20)
+        for file in files:
+            stat = file.stat()
+            h.update(f"{file}|{stat.st_size}|{stat.st_mtime_ns}\n".encode())
+        return h.hexdigest()
+
+    @property
+    def columns(self) -> List[str]:
+        """Noms des colonnes (colonnes de partition comprises)"""
+        if self._dataset is not None:
+            return list(self._dataset.schema.names)
+        return list(pd.read_csv(self.path, nrows=0, **self.dialect.read_csv_kwargs()).columns)
+
+    @property
+    def partition_columns(self) -> List[str]:
+        """Colonnes issues des noms de répertoires (clé=valeur)"""
+        if self._dataset is None or not self.path.is_dir():
+            return []
+        fragment = next(self._dataset.get_fragments(), None)
+        if fragment is None:
+            return []
+        physical = set(fragment.physical_schema.names)
+        return [col for col in self._dataset.schema.names if col not in physical]
+
+    def _filter_expression(self, partitions: Optional[PartitionFilter]):
+        if not partitions:
+            return None
+        expression = None
+        for column, values in partitions.items():
+            if isinstance(values, (list, tuple, set)):
+                condition = pa_ds.field(column).isin(list(values))
+            else:
+                condition = pa_ds.field(column) == values
+            expression = condition if expression is None else expression & condition
+        return expression
+
+    def read(
+        self,
+        columns: Optional[Sequence[str]] = None,
+        partitions: Optional[PartitionFilter] = None
+    ) -> pd.DataFrame:
+        """
+        Lit les colonnes et partitions demandées
+
+        Args:
+            columns: Colonnes à lire (toutes si None)
+            partitions: Filtre sur les colonnes de partition,
+                ex: {"region": ["North", "South"]}. Les répertoires exclus
+                ne sont pas ouverts.
+
+        Returns:
+            DataFrame pandas
+        """
+        columns = list(dict.fromkeys(columns)) if columns else None
+
+        if self._dataset is None:
+            # Sans pyarrow: fichier CSV unique, lu par pandas en mmap
+            return pd.read_csv(self.path, usecols=columns, memory_map=True,
+                               encoding_errors='replace', **self.dialect.read_csv_kwargs())
+
+        if self.format == 'parquet' and self.path.is_file() and not partitions:
+            return pq.read_table(self.path, columns=columns, memory_map=True).to_pandas()
+
+        table = self._dataset.to_table(columns=columns, filter=self._filter_expression(partitions))
+        return table.to_pandas()
+
+    def preview(self, n_rows: int = DEFAULT_PREVIEW_ROWS, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """
+        Premières lignes du dataset, pour le profilage et l'aperçu
+
+        Args:
+            n_rows: Nombre de lignes
+            columns: Colonnes à lire (toutes si None)
+
+        Returns:
+            DataFrame pandas
+        """
+        if self._dataset is None:
+            return pd.read_csv(self.path, nrows=n_rows, usecols=columns, memory_map=True,
+                               encoding_errors='replace', **self.dialect.read_csv_kwargs())
+        return self._dataset.head(n_rows, columns=list(columns) if columns else None).to_pandas()
+
+    def count_rows(self, partitions: Optional[PartitionFilter] = None) -> int:
+        """Nombre de lignes (métadonnées Parquet, sinon parcours sans conversion)"""
+        if self._dataset is None:
+            return sum(len(chunk) for chunk in pd.read_csv(
+                self.path, usecols=[0], chunksize=1_000_000, **self.dialect.read_csv_kwargs()
+            ))
+        return self._dataset.count_rows(filter=self._filter_expression(partitions))
+
+
+def get_data_root() -> Optional[Path]:
+    """Répertoire autorisé (variable d'environnement DATA_ROOT), None si non configuré"""
+    root = os.environ.get(DATA_ROOT_ENV)
+    return Path(root).expanduser().resolve() if root else None
+
+
+def resolve_in_root(path: Union[str, Path], root: Path) -> Path:
+    """
+    Chemin absolu d'un dataset, qui doit rester sous root
+
+    Les chemins relatifs partent de root; liens symboliques et '..' sont
+    résolus avant la vérification.
+
+    Raises:
+        ValueError: Si le chemin sort de root
+    """
+    root = Path(root).resolve()
+    resolved = (root / Path(path).expanduser()).resolve()
+    if not resolved.is_relative_to(root):
+        raise ValueError(f"Chemin hors du répertoire de données: {path}")
+    return resolved
+
+
+def list_local_datasets(root: Path) -> List[str]:
+    """
+    Datasets ouvrables sous root: fichiers CSV/Parquet et répertoires
+
+    Les partitions (répertoires clé=valeur) ne sont pas détaillées: seul
+    leur répertoire parent est proposé.
+
+    Returns:
+        Chemins relatifs à root, triés
+    """
+    root = Path(root).resolve()
+    entries = []
+    for directory, subdirs, files in os.walk(root):
+        subdirs[:] = [d for d in subdirs if not d.startswith(('.', '_')) and '=' not in d]
+        relative = Path(directory).relative_to(root)
+        if relative.parts:
+            entries.append(str(relative))
+        entries.extend(
+            str(relative / name) for name in files
+            if not name.startswith(('.', '_')) and Path(name).suffix.lower() in CSV_SUFFIXES | PARQUET_SUFFIXES
+        )
+    # Liens symboliques vers l'extérieur écartés (refusés à l'ouverture)
+    return sorted(entry for entry in entries if (root / entry).resolve().is_relative_to(root))
+
+
+def open_local_dataset(path: Union[str, Path], root: Optional[Path] = None) -> LocalDataset:
+    """
+    Ouvre un fichier ou un répertoire de données présent sur le serveur
+
+    Args:
+        path: Chemin d'un fichier CSV/Parquet ou d'un répertoire partitionné
+        root: Répertoire autorisé: le chemin (relatif à root ou absolu) doit
+            s'y trouver
+
+    Returns:
+        LocalDataset (seul le schéma est lu)
+
+    Raises:
+        ValueError: Si le chemin n'existe pas, sort de root ou si le format
+            n'est pas supporté
+    """
+    if root is not None:
+        path = resolve_in_root(path, root)
+    return LocalDataset(path)
@@ -0,0 +1,138 @@
+"""
+Backends de parsing CSV
+Le backend est choisi automatiquement selon la taille du fichier
+"""
+
+import pandas as pd
+from typing import Any, Callable, Dict
+import io
+import os
+
+from .sniffer import CsvDialect
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+
+# Au-delà de cette taille, le lecteur multi-threadé pyarrow est nettement
+# plus rapide que le parser C de pandas (voir benchmarks/bench_parsers.py);
+# en dessous, on garde les types numpy, le gain absolu étant négligeable
+PYARROW_MIN_BYTES = 32 * 1024 * 1024
+
+ParserBackend = Callable[[Any, CsvDialect], pd.DataFrame]
+PARSER_BACKENDS: Dict[str, ParserBackend] = {}
+
+
+def register_backend(name: str) -> Callable[[ParserBackend], ParserBackend]:
+    """Décorateur d'enregistrement d'un backend de parsing"""
+    def decorator(func: ParserBackend) -> ParserBackend:
+        PARSER_BACKENDS[name] = func
+        return func
+    return decorator
+
+
+@register_backend("pandas")
+def read_with_pandas(source: Any, dialect: CsvDialect) -> pd.DataFrame:
+    """Parser C de pandas (mono-thread)"""
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    # Un octet invalide au-delà de l'échantillon est remplacé plutôt que
+    # de tout reparser avec un autre encodage
+    return pd.read_csv(source, engine='c', encoding_errors='replace', **dialect.read_csv_kwargs())
+
+
+@register_backend("pyarrow")
+def read_with_pyarrow(source: Any, dialect: CsvDialect) -> pd.DataFrame:
+    """Lecteur CSV multi-threadé de pyarrow, colonnes typées Arrow"""
+    if not HAS_PYARROW:
+        raise ImportError("pyarrow n'est pas installé")
+
+    read_options = pa_csv.ReadOptions(
+        use_threads=True,
+        encoding=dialect.encoding.replace('utf-8-sig', 'utf-8'),
+        column_names=None if dialect.has_header else dialect.read_csv_kwargs()["names"],
+    )
+    parse_options = pa_csv.ParseOptions(delimiter=dialect.delimiter)
+    convert_options = pa_csv.ConvertOptions(decimal_point=dialect.decimal)
+
+    if isinstance(source, (bytes, bytearray)):
+        source = pa.BufferReader(source)
+    elif hasattr(source, 'getbuffer'):
+        # UploadedFile / BytesIO: lecture sans copie du buffer
+        source = pa.BufferReader(source.getbuffer())
+
+    table = pa_csv.read_csv(source, read_options=read_options,
+                            parse_options=parse_options, convert_options=convert_options)
+    return table.to_pandas(types_mapper=pd.ArrowDtype)
+
+
+def source_size(source: Any) -> int:
+    """Taille en octets d'une source (0 si inconnue)"""
+    if isinstance(source, (str, os.PathLike)):
+        return os.path.getsize(source)
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return len(source)
+    if hasattr(source, 'size'):
+        return int(source.size)
+    if hasattr(source, 'getbuffer'):
+        return source.getbuffer().nbytes
+    return 0
+
+
+def select_backend(source: Any) -> str:
+    """
+    Choisit le backend selon la taille du fichier
+
+    Args:
+        source: Chemin, bytes ou objet file-like
+
+    Returns:
+        Nom du backend
+    """
+    if HAS_PYARROW and source_size(source) >= PYARROW_MIN_BYTES:
+        return "pyarrow"
+    return "pandas"
+
+
+def parse_csv(source: Any, dialect: CsvDialect, backend: str = "auto") -> pd.DataFrame:
+    """
+    Parse un CSV avec le backend demandé
+
+    Si pyarrow échoue (encodage invalide, ligne mal formée...), on retombe
+    sur le parser pandas, plus tolérant.
+
+    Args:
+        source: Chemin, bytes ou objet file-like
+        dialect: Paramètres détectés par sniff_csv
+        backend: Nom du backend ou "auto"
+
+    Returns:
+        DataFrame pandas
+
+    Raises:
+        ValueError: Si le backend est inconnu
+    """
+    if backend == "auto":
+        backend = select_backend(source)
+    if backend not in PARSER_BACKENDS:
+        raise ValueError(f"Backend de parsing inconnu: {backend}")
+
+    if hasattr(source, 'seek'):
+        source.seek(0)
+
+    try:
+        df = PARSER_BACKENDS[backend](source, dialect)
+    except Exception:
+        if backend == "pandas":
+            raise
+        if hasattr(source, 'seek'):
+            source.seek(0)
+        backend = "pandas"
+        df = PARSER_BACKENDS[backend](source, dialect)
+
+    df.attrs["parser"] = backend
+    return df
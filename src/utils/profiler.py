@@ -0,0 +1,313 @@
+"""
+Module de profilage unifié des colonnes
+Calcule en une passe les statistiques utilisées par get_dataframe_info,
+infer_column_semantics, check_column_types et suggest_preprocessing
+"""
+
+import hashlib
+import pandas as pd
+import numpy as np
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import weakref
+
+
+QUANTILES = (0.25, 0.5, 0.75)
+IDENTIFIER_NAMES = ['id', 'index', 'key']
+
+
+@dataclass
+class ColumnProfile:
+    """Statistiques d'une colonne"""
+    name: str
+    dtype: str
+    kind: str  # 'numeric', 'boolean', 'temporal', 'string', 'unknown'
+    null_count: int
+    n_unique: int
+    numeric_stats: Optional[Dict[str, float]] = None
+    avg_length: Optional[float] = None
+
+
+@dataclass
+class DataFrameProfile:
+    """Profil complet d'un DataFrame, partagé par les API d'analyse"""
+    n_rows: int
+    columns: Dict[str, ColumnProfile]
+    numeric_columns: List[str] = field(default_factory=list)
+    categorical_columns: List[str] = field(default_factory=list)
+    datetime_columns: List[str] = field(default_factory=list)
+    # Profil approché: bornes d'erreur (voir SketchProfile.error_bounds), None si exact
+    error_bounds: Optional[Dict[str, Any]] = None
+
+    @property
+    def null_counts(self) -> Dict[str, int]:
+        return {name: col.null_count for name, col in self.columns.items()}
+
+    @property
+    def unique_counts(self) -> Dict[str, int]:
+        return {name: col.n_unique for name, col in self.columns.items()}
+
+    @property
+    def numeric_stats(self) -> Dict[str, Dict[str, float]]:
+        return {name: self.columns[name].numeric_stats for name in self.numeric_columns}
+
+    def semantic_type(self, name: str) -> str:
+        """Rôle sémantique (voir infer_column_semantics)"""
+        col = self.columns[name]
+        if col.kind == 'temporal':
+            return "temporal"
+        if col.kind in ('numeric', 'boolean'):
+            if col.n_unique == self.n_rows and name.lower() in IDENTIFIER_NAMES:
+                return "identifier"
+            return "quantitative"
+        if col.kind == 'string':
+            # Si peu de valeurs uniques, c'est probablement catégoriel
+            return "categorical" if col.n_unique < self.n_rows * 0.5 else "text"
+        return "unknown"
+
+    def viz_type(self, name: str) -> str:
+        """Type pour la visualisation (voir check_column_types)"""
+        col = self.columns[name]
+        if col.kind in ('numeric', 'boolean'):
+            return 'numeric'
+        if col.kind == 'temporal':
+            return 'temporal'
+        if col.kind == 'string':
+            if col.n_unique < self.n_rows * 0.5 and col.n_unique < 50:
+                return 'categorical'
+            return 'text'
+        return 'unknown'
+
+
+def column_kind(dtype) -> str:
+    """Famille de type d'une colonne: numeric, boolean, temporal, string ou unknown"""
+    if pd.api.types.is_bool_dtype(dtype):
+        return 'boolean'
+    if pd.api.types.is_numeric_dtype(dtype):
+        return 'numeric'
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        return 'temporal'
+    if pd.api.types.is_string_dtype(dtype) or isinstance(dtype, pd.CategoricalDtype):
+        return 'string'
+    return 'unknown'
+
+
+def _numeric_block_stats(block: np.ndarray) -> Tuple[Dict[str, np.ndarray], np.ndarray]:
+    """
+    Statistiques describe() de toutes les colonnes numériques en une passe
+
+    Le bloc est trié une fois par colonne (les NaN vont à la fin), ce qui
+    donne min, max, quantiles et nombre de valeurs distinctes par
+    indexation vectorisée.
+
+    Args:
+        block: Tableau float64 (lignes x colonnes numériques)
+
+    Returns:
+        Tuple ({statistique: tableau par colonne}, valeurs distinctes par colonne)
+    """
+    counts = np.count_nonzero(~np.isnan(block), axis=0)
+    has_values = counts > 0
+    safe_counts = np.where(has_values, counts, 1)
+
+    filled = np.where(np.isnan(block), 0.0, block)
+    means = filled.sum(axis=0) / safe_counts
+    squared = np.where(np.isnan(block), 0.0, (block - means) ** 2).sum(axis=0)
+    stds = np.where(counts > 1, np.sqrt(squared / np.maximum(counts - 1, 1)), np.nan)
+
+    ordered = np.sort(block, axis=0)
+    cols = np.arange(block.shape[1])
+    stats = {
+        "count": counts.astype(float),
+        "mean": np.where(has_values, means, np.nan),
+        "std": stds,
+        "min": np.where(has_values, ordered[0, cols] if len(block) else np.nan, np.nan),
+    }
+
+    # Interpolation linéaire, identique à pandas.quantile
+    for q in QUANTILES:
+        position = (safe_counts - 1) * q
+        lower = np.floor(position).astype(int)
+        upper = np.ceil(position).astype(int)
+        weight = position - lower
+        values = ordered[lower, cols] * (1 - weight) + ordered[upper, cols] * weight if len(block) else np.nan
+        stats[f"{int(q * 100)}%"] = np.where(has_values, values, np.nan)
+
+    stats["max"] = np.where(has_values, ordered[safe_counts - 1, cols] if len(block) else np.nan, np.nan)
+
+    # Valeurs distinctes: ruptures dans la colonne triée, hors NaN
+    rows = np.arange(len(block))[:, None]
+    changes = np.ones(block.shape, dtype=bool)
+    changes[1:] = ordered[1:] != ordered[:-1]
+    n_unique = np.count_nonzero(changes & (rows < counts), axis=0)
+    return stats, n_unique
+
+
+def _average_length(series: pd.Series) -> float:
+    """Longueur moyenne des chaînes d'une colonne"""
+    try:
+        return float(series.str.len().mean())
+    except AttributeError:
+        # Colonne objet sans aucune chaîne
+        return float(series.astype(str).str.len().mean())
+
+
+def compute_profile(df: pd.DataFrame) -> DataFrameProfile:
+    """
+    Profile un DataFrame en une passe vectorisée par colonne
+
+    Args:
+        df: DataFrame pandas
+
+    Returns:
+        DataFrameProfile
+    """
+    n_rows = len(df)
+    names = list(df.columns)
+    kinds = [column_kind(dtype) for dtype in df.dtypes]
+
+    null_counts = df.isnull().sum().to_numpy()
+    n_uniques = np.zeros(len(names), dtype=int)
+
+    numeric_idx = [i for i, kind in enumerate(kinds) if kind == 'numeric']
+    numeric_stats: Dict[int, Dict[str, float]] = {}
+    if numeric_idx:
+        block = df.iloc[:, numeric_idx].to_numpy(dtype='float64', na_value=np.nan)
+        block_stats, block_uniques = _numeric_block_stats(block)
+        for j, i in enumerate(numeric_idx):
+            numeric_stats[i] = {stat: float(values[j]) for stat, values in block_stats.items()}
+            n_uniques[i] = block_uniques[j]
+
+    other_idx = [i for i, kind in enumerate(kinds) if kind != 'numeric']
+    if other_idx:
+        n_uniques[other_idx] = df.iloc[:, other_idx].nunique().to_numpy()
+
+    columns = {}
+    for i, name in enumerate(names):
+        avg_length = None
+        dtype = df.dtypes.iloc[i]
+        if kinds[i] == 'string' and not isinstance(dtype, pd.CategoricalDtype):
+            avg_length = _average_length(df.iloc[:, i]) if n_rows else 0.0
+        columns[name] = ColumnProfile(
+            name=name,
+            dtype=str(dtype),
+            kind=kinds[i],
+            null_count=int(null_counts[i]),
+            n_unique=int(n_uniques[i]),
+            numeric_stats=numeric_stats.get(i),
+            avg_length=avg_length,
+        )
+
+    return DataFrameProfile(
+        n_rows=n_rows,
+        columns=columns,
+        numeric_columns=[names[i] for i in numeric_idx],
+        categorical_columns=[names[i] for i, kind in enumerate(kinds) if kind == 'string'],
+        datetime_columns=[names[i] for i, kind in enumerate(kinds) if kind == 'temporal'],
+    )
+
+
+# Cache {id(df): (weakref, signature, {nom: valeur})}, purgé quand le DataFrame disparaît
+_profile_cache: Dict[int, tuple] = {}
+
+
+def _signature(df: pd.DataFrame) -> tuple:
+    return (df.shape, tuple(df.columns), tuple(str(dtype) for dtype in df.dtypes))
+
+
+def _cached(df: pd.DataFrame, name: str, build: Callable[[], Any]) -> Any:
+    """Valeur calculée une fois par DataFrame (tant que sa signature ne change pas)"""
+    key = id(df)
+    signature = _signature(df)
+    entry = _profile_cache.get(key)
+    if entry is None or entry[0]() is not df or entry[1] != signature:
+        ref = weakref.ref(df, lambda _, key=key: _profile_cache.pop(key, None))
+        entry = (ref, signature, {})
+        _profile_cache[key] = entry
+
+    values = entry[2]
+    if name not in values:
+        values[name] = build()
+    return values[name]
+
+
+def get_profile(df: pd.DataFrame, approximate: bool = False) -> DataFrameProfile:
+    """
+    Profil mis en cache d'un DataFrame
+
+    Le profil est recalculé si la forme, les colonnes ou les types changent.
+    Après une modification en place des valeurs, appeler invalidate_profile().
+
+    Args:
+        df: DataFrame pandas
+        approximate: Profil approché par sketches (voir utils.sketches), à
+            mémoire crête bornée pour les très gros DataFrames; ses bornes
+            d'erreur sont dans error_bounds
+
+    Returns:
+        DataFrameProfile
+    """
+    if approximate:
+        return _cached(df, 'sketch_profile', lambda: get_sketch(df).to_profile())
+    return _cached(df, 'profile', lambda: compute_profile(df))
+
+
+def get_sketch(df: pd.DataFrame):
+    """
+    SketchProfile mis en cache d'un DataFrame
+
+    Args:
+        df: DataFrame pandas
+
+    Returns:
+        SketchProfile
+    """
+    from .sketches import sketch_dataframe
+    return _cached(df, 'sketch', lambda: sketch_dataframe(df))
+
+
+def _content_hash(df: pd.DataFrame) -> str:
+    h = hashlib.blake2b(digest_size=20)
+    h.update(repr(_signature(df)).encode())
+    h.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def dataset_fingerprint(df: pd.DataFrame) -> str:
+    """
+    Empreinte du contenu d'un DataFrame
+
+    Les valeurs sont hachées une fois par DataFrame, sauf si l'empreinte a
+    été fixée au chargement (set_dataset_fingerprint). Comme le profil, elle
+    est liée à l'objet lui-même: un DataFrame dérivé (fillna, assign...) a
+    sa propre empreinte.
+    """
+    return _cached(df, 'fingerprint', lambda: _content_hash(df))
+
+
+def set_dataset_fingerprint(df: pd.DataFrame, key: str):
+    """
+    Fixe l'empreinte d'un DataFrame fraîchement chargé
+
+    Args:
+        df: DataFrame lu depuis un fichier
+        key: Empreinte du fichier source (clé du cache disque)
+    """
+    if _cached(df, 'fingerprint', lambda: key) != key:
+        _profile_cache[id(df)][2]['fingerprint'] = key
+
+
+def chain_fingerprint(key: str, batch: pd.DataFrame) -> str:
+    """
+    Empreinte d'un dataset d'empreinte key auquel on ajoute les lignes de
+    batch: seul le lot est haché
+    """
+    h = hashlib.blake2b(digest_size=20)
+    h.update(key.encode())
+    h.update(dataset_fingerprint(batch).encode())
+    return h.hexdigest()
+
+
+def invalidate_profile(df: pd.DataFrame):
+    """Supprime les profils en cache d'un DataFrame"""
+    _profile_cache.pop(id(df), None)
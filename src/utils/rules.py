@@ -0,0 +1,235 @@
+"""
+Moteur de validation par règles
+Les règles sont enregistrées une fois, puis compilées en un plan d'évaluation
+"""
+
+import time
+import pandas as pd
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+
+# Une règle reçoit le contexte et renvoie un message d'erreur (ou None)
+RuleCheck = Callable[["RuleContext"], Optional[str]]
+
+
+@dataclass
+class Rule:
+    """Règle de validation"""
+    name: str
+    check: RuleCheck
+    order: int = 100
+    # Arrête l'évaluation des règles suivantes en cas d'échec
+    stop_on_failure: bool = False
+    # Parcourt les valeurs (et pas seulement le schéma)
+    expensive: bool = False
+
+
+@dataclass
+class RuleResult:
+    """Résultat et durée d'une règle"""
+    name: str
+    passed: bool
+    elapsed_ms: float
+    message: Optional[str] = None
+    skipped: bool = False
+
+
+@dataclass
+class ValidationReport:
+    """Résultat d'une validation complète"""
+    results: List[RuleResult] = field(default_factory=list)
+    elapsed_ms: float = 0.0
+
+    @property
+    def errors(self) -> List[str]:
+        return [r.message for r in self.results if not r.passed and r.message]
+
+    @property
+    def is_valid(self) -> bool:
+        return not self.errors
+
+    @property
+    def skipped(self) -> List[str]:
+        return [r.name for r in self.results if r.skipped]
+
+    def timings(self) -> Dict[str, float]:
+        """Durée de chaque règle évaluée, en ms"""
+        return {r.name: r.elapsed_ms for r in self.results if not r.skipped}
+
+
+class RuleContext:
+    """
+    Vue du DataFrame partagée par les règles
+
+    Les agrégats (comptes de valeurs non nulles...) sont calculés une seule
+    fois, en un appel vectorisé sur tout le frame, à la première règle qui
+    les demande.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+        self._aggregates: Dict[str, Any] = {}
+
+    @property
+    def n_rows(self) -> int:
+        return len(self.df)
+
+    @property
+    def n_columns(self) -> int:
+        return len(self.df.columns)
+
+    def _aggregate(self, name: str, compute: Callable[[], Any]) -> Any:
+        if name not in self._aggregates:
+            self._aggregates[name] = compute()
+        return self._aggregates[name]
+
+    @property
+    def non_null_counts(self) -> pd.Series:
+        """Nombre de valeurs non nulles par colonne (position -> compte)"""
+        # count() travaille par bloc de colonnes de même type, sans
+        # matérialiser de masque isnull() colonne par colonne
+        return self._aggregate(
+            "non_null_counts",
+            lambda: pd.Series(self.df.count().to_numpy(), index=range(self.n_columns)),
+        )
+
+
+RULES: Dict[str, Rule] = {}
+_default_engine: Optional["RuleEngine"] = None
+
+
+def register_rule(
+    name: str,
+    order: int = 100,
+    stop_on_failure: bool = False,
+    expensive: bool = False
+) -> Callable[[RuleCheck], RuleCheck]:
+    """Décorateur d'enregistrement d'une règle"""
+    def decorator(func: RuleCheck) -> RuleCheck:
+        global _default_engine
+        RULES[name] = Rule(name, func, order, stop_on_failure, expensive)
+        # Le moteur partagé sera recompilé avec la nouvelle règle
+        _default_engine = None
+        return func
+    return decorator
+
+
+@register_rule("not_empty", order=10)
+def _rule_not_empty(ctx: RuleContext) -> Optional[str]:
+    if ctx.df.empty:
+        return "Le DataFrame est vide"
+    return None
+
+
+@register_rule("min_columns", order=20)
+def _rule_min_columns(ctx: RuleContext) -> Optional[str]:
+    if ctx.n_columns < 2:
+        return "Le DataFrame doit contenir au moins 2 colonnes"
+    return None
+
+
+@register_rule("min_rows", order=30)
+def _rule_min_rows(ctx: RuleContext) -> Optional[str]:
+    if ctx.n_rows < 3:
+        return "Le DataFrame doit contenir au moins 3 lignes de données"
+    return None
+
+
+@register_rule("unique_columns", order=40)
+def _rule_unique_columns(ctx: RuleContext) -> Optional[str]:
+    if ctx.df.columns.duplicated().any():
+        return "Le DataFrame contient des noms de colonnes dupliqués"
+    return None
+
+
+@register_rule("no_all_null_columns", order=50, expensive=True)
+def _rule_no_all_null_columns(ctx: RuleContext) -> Optional[str]:
+    counts = ctx.non_null_counts
+    all_null_cols = [str(ctx.df.columns[i]) for i in counts.index[counts.to_numpy() == 0]]
+    if all_null_cols:
+        return f"Colonnes entièrement nulles: {', '.join(all_null_cols)}"
+    return None
+
+
+class RuleEngine:
+    """
+    Évalue un ensemble de règles compilé
+
+    La compilation fige l'ordre d'évaluation: règles bloquantes
+    (stop_on_failure) d'abord, puis règles sur le schéma, puis celles qui
+    parcourent les valeurs, chacune selon son ordre.
+    """
+
+    def __init__(self, rules: Optional[Iterable[Rule]] = None):
+        """
+        Args:
+            rules: Règles à évaluer (toutes les règles enregistrées si None)
+        """
+        self.rules = list(rules) if rules is not None else list(RULES.values())
+        self._plan: Optional[List[Rule]] = None
+
+    def compile(self) -> List[Rule]:
+        """Calcule (une fois) l'ordre d'évaluation"""
+        if self._plan is None:
+            self._plan = sorted(
+                self.rules,
+                key=lambda r: (not r.stop_on_failure, r.expensive, r.order),
+            )
+        return self._plan
+
+    def validate(
+        self,
+        df: pd.DataFrame,
+        skip: Iterable[str] = (),
+        include_expensive: bool = True,
+        budget_ms: Optional[float] = None
+    ) -> ValidationReport:
+        """
+        Évalue les règles sur un DataFrame
+
+        Args:
+            df: DataFrame pandas
+            skip: Noms de règles à ne pas évaluer
+            include_expensive: Évaluer les règles qui parcourent les valeurs
+            budget_ms: Budget de latence; une fois dépassé, les règles
+                restantes sont marquées comme ignorées
+
+        Returns:
+            ValidationReport
+        """
+        skip = set(skip)
+        ctx = RuleContext(df)
+        report = ValidationReport()
+        start = time.perf_counter()
+        stopped = False
+
+        for rule in self.compile():
+            elapsed_total = (time.perf_counter() - start) * 1000
+            if (
+                stopped
+                or rule.name in skip
+                or (rule.expensive and not include_expensive)
+                or (budget_ms is not None and elapsed_total >= budget_ms)
+            ):
+                report.results.append(RuleResult(rule.name, True, 0.0, skipped=True))
+                continue
+
+            rule_start = time.perf_counter()
+            message = rule.check(ctx)
+            elapsed = (time.perf_counter() - rule_start) * 1000
+            report.results.append(RuleResult(rule.name, message is None, elapsed, message))
+
+            if message is not None and rule.stop_on_failure:
+                stopped = True
+
+        report.elapsed_ms = (time.perf_counter() - start) * 1000
+        return report
+
+
+def get_default_engine() -> RuleEngine:
+    """Moteur partagé sur toutes les règles enregistrées"""
+    global _default_engine
+    if _default_engine is None:
+        _default_engine = RuleEngine()
+    return _default_engine
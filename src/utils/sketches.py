@@ -0,0 +1,568 @@
+"""
+Module de profilage approché par sketches
+HyperLogLog (valeurs distinctes), KLL (quantiles) et réservoir (échantillon)
+
+Tous les sketches sont fusionnables (merge) et picklables: on peut les
+construire par morceaux ou dans des processus séparés puis les combiner.
+Utilisés pour les lectures par morceaux (StreamingDataset), où le profil
+exact est impossible, et en option (approximate=True) sur un DataFrame en
+mémoire: un peu plus rapide que compute_profile, pour une mémoire crête
+bien plus basse. Les bornes d'erreur sont données par error_bounds().
+"""
+
+import pandas as pd
+import numpy as np
+from typing import Dict, Any, Iterable, List, Optional, Sequence
+
+from .profiler import ColumnProfile, DataFrameProfile, QUANTILES, column_kind
+
+try:
+    import pyarrow as pa
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+
+DEFAULT_DISTINCT_ERROR = 0.01
+DEFAULT_QUANTILE_ERROR = 0.01
+DEFAULT_SAMPLE_SIZE = 1000
+DEFAULT_CHUNK_ROWS = 1_000_000
+DEFAULT_MAX_EXACT_DISTINCT = 10_000
+# Lignes tirées pour initialiser les quantiles d'une colonne déjà profilée
+DEFAULT_SEED_SAMPLE = 65_536
+
+
+def _numpy_temporal(series: pd.Series) -> pd.Series:
+    """
+    Dates et durées Arrow (date32, timestamp, duration du backend pyarrow)
+    converties en datetime64 / timedelta64 numpy: date32 n'a pas de
+    conversion directe en entier
+    """
+    dtype = series.dtype
+    if not HAS_PYARROW or not isinstance(dtype, pd.ArrowDtype):
+        return series
+    pa_type = dtype.pyarrow_dtype
+    if pa.types.is_date(pa_type) or (pa.types.is_timestamp(pa_type) and pa_type.tz is None):
+        return series.astype('datetime64[ns]')
+    if pa.types.is_duration(pa_type):
+        return series.astype('timedelta64[ns]')
+    return series
+
+
+def hash_values(series: pd.Series) -> np.ndarray:
+    """
+    Hache les valeurs distinctes non nulles d'une colonne en uint64
+
+    Les numériques sont hachés en float64 pour qu'une même valeur ait le
+    même hash quel que soit le type du morceau (int64 ou float64), les dates
+    et durées via leur représentation entière. Pour les chaînes, on ne
+    hache que les valeurs uniques du morceau (table de hachage native, bien
+    plus rapide que de hacher chaque ligne).
+    """
+    series = _numpy_temporal(series.dropna())
+    dtype = series.dtype
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        # Même unité (ns) quel que soit le morceau: datetime64[s] de pandas, date32 Arrow...
+        if getattr(dtype, 'tz', None) is not None:
+            series = series.dt.tz_convert(None)
+        series = series.astype('datetime64[ns]').astype('int64')
+    elif pd.api.types.is_timedelta64_dtype(dtype):
+        series = series.astype('timedelta64[ns]').astype('int64')
+    elif pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype):
+        series = series.astype('float64')
+    else:
+        series = pd.Series(series.unique())
+    return pd.util.hash_pandas_object(series, index=False, categorize=False).to_numpy()
+
+
+class HyperLogLog:
+    """Comptage approché de valeurs distinctes"""
+
+    def __init__(self, error: float = DEFAULT_DISTINCT_ERROR):
+        """
+        Args:
+            error: Erreur relative type visée (1.04 / sqrt(nombre de registres))
+        """
+        p = int(np.ceil(np.log2((1.04 / error) ** 2)))
+        self.p = min(max(p, 4), 18)
+        self.m = 1 << self.p
+        self.registers = np.zeros(self.m, dtype=np.uint8)
+
+    def update(self, hashes: np.ndarray):
+        """Ajoute des valeurs hachées (uint64)"""
+        if len(hashes) == 0:
+            return
+        hashes = hashes.astype(np.uint64, copy=False)
+        index = (hashes >> np.uint64(64 - self.p)).view(np.int64)
+        # Reste < 2^63: conversion signée en float64, plus rapide que depuis uint64
+        remainder = (hashes & np.uint64((1 << (64 - self.p)) - 1)).view(np.int64)
+        # Rang = position du premier bit à 1 dans les 64-p bits restants;
+        # longueur en bits lue dans l'exposant du float (0 pour un reste nul)
+        bit_length = np.maximum((remainder.astype(np.float64).view(np.int64) >> 52) - 1022, 0)
+        rank = (64 - self.p + 1) - bit_length
+        np.maximum.at(self.registers, index, rank.astype(np.uint8))
+
+    def merge(self, other: "HyperLogLog") -> "HyperLogLog":
+        if other.p != self.p:
+            raise ValueError("Impossible de fusionner des HyperLogLog de précisions différentes")
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def estimate(self) -> int:
+        """Nombre approché de valeurs distinctes"""
+        alpha = 0.7213 / (1 + 1.079 / self.m)
+        raw = alpha * self.m ** 2 / np.sum(np.exp2(-self.registers.astype(np.float64)))
+        zeros = np.count_nonzero(self.registers == 0)
+        if raw <= 2.5 * self.m and zeros:
+            # Petites cardinalités: comptage linéaire
+            raw = self.m * np.log(self.m / zeros)
+        return int(round(raw))
+
+    @property
+    def relative_error(self) -> float:
+        """Erreur relative type de l'estimation"""
+        return float(1.04 / np.sqrt(self.m))
+
+
+class QuantileSketch:
+    """
+    Sketch de quantiles KLL simplifié
+
+    Chaque niveau contient au plus k valeurs de poids 2^niveau. Un niveau
+    plein est trié puis compacté (une valeur sur deux, décalage aléatoire)
+    vers le niveau supérieur. L'erreur de rang est de l'ordre de 1/k.
+    """
+
+    def __init__(self, error: float = DEFAULT_QUANTILE_ERROR, seed: Optional[int] = None):
+        """
+        Args:
+            error: Erreur de rang visée (fraction de n)
+            seed: Graine pour les compactions
+        """
+        self.k = max(int(np.ceil(2.0 / error)), 16)
+        self.levels: List[np.ndarray] = [np.empty(0)]
+        self.n = 0
+        # Erreur de rang type due à un échantillon initial (voir seed)
+        self.sample_error = 0.0
+        self._rng = np.random.default_rng(seed)
+
+    def update(self, values: np.ndarray):
+        """Ajoute des valeurs (les NaN doivent être retirés)"""
+        if len(values) == 0:
+            return
+        values = np.asarray(values, dtype=np.float64)
+        self.n += len(values)
+
+        if len(values) > self.k:
+            # Gros lot: un seul tri, puis on saute directement au niveau où
+            # il tient (équivaut aux compactions successives)
+            level = int(np.ceil(np.log2(len(values) / self.k)))
+            step = 1 << level
+            values = np.sort(values)[self._rng.integers(step)::step]
+            while len(self.levels) <= level:
+                self.levels.append(np.empty(0))
+            self.levels[level] = np.concatenate([self.levels[level], values])
+        else:
+            self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+
+    def seed(self, sample: np.ndarray, level: int):
+        """
+        Intègre un échantillon uniforme de valeurs, chacune de poids 2^level
+        (elle représente 2^level valeurs non parcourues); les NaN sont ignorés
+        """
+        sample = np.sort(sample[~np.isnan(sample)])
+        if len(sample) == 0:
+            return
+        while len(self.levels) <= level:
+            self.levels.append(np.empty(0))
+        self.levels[level] = np.concatenate([self.levels[level], sample])
+        self.n += len(sample) << level
+        if level:
+            self.sample_error = max(self.sample_error, 0.5 / np.sqrt(len(sample)))
+        self._compress()
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) > self.k:
+                items = np.sort(items)
+                # Un élément impair reste au niveau courant
+                keep = items[:len(items) % 2]
+                pairs = items[len(items) % 2:]
+                promoted = pairs[self._rng.integers(2)::2]
+                self.levels[level] = keep
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+            level += 1
+
+    def merge(self, other: "QuantileSketch") -> "QuantileSketch":
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.n += other.n
+        self._compress()
+        return self
+
+    @property
+    def rank_error(self) -> float:
+        """Erreur de rang des quantiles (fraction de n), 0 tant qu'aucune compaction n'a eu lieu"""
+        return (0.0 if len(self.levels) == 1 else 2.0 / self.k) + self.sample_error
+
+    def quantiles(self, qs: Sequence[float]) -> np.ndarray:
+        """Quantiles approchés"""
+        if self.n == 0:
+            return np.full(len(qs), np.nan)
+        values = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(items), 2.0 ** level) for level, items in enumerate(self.levels)])
+        order = np.argsort(values)
+        values, cumulative = values[order], np.cumsum(weights[order])
+        ranks = np.asarray(qs) * cumulative[-1]
+        positions = np.searchsorted(cumulative, ranks, side='left')
+        return values[np.minimum(positions, len(values) - 1)]
+
+
+class ReservoirSample:
+    """
+    Échantillon uniforme de lignes à taille bornée
+
+    Chaque ligne reçoit une clé aléatoire, on garde les size plus petites:
+    la fusion de deux réservoirs reste un tirage uniforme.
+    """
+
+    def __init__(self, size: int = DEFAULT_SAMPLE_SIZE, seed: Optional[int] = None):
+        self.size = size
+        self.frame: Optional[pd.DataFrame] = None
+        self.keys = np.empty(0)
+        self._rng = np.random.default_rng(seed)
+
+    def update(self, chunk: pd.DataFrame, offset: int = 0):
+        """
+        Args:
+            chunk: Lignes à intégrer
+            offset: Position de la première ligne dans le dataset (ordre d'origine)
+        """
+        chunk = chunk.set_axis(pd.RangeIndex(offset, offset + len(chunk)))
+        self._absorb(chunk, self._rng.random(len(chunk)))
+
+    def merge(self, other: "ReservoirSample") -> "ReservoirSample":
+        if other.frame is not None:
+            self._absorb(other.frame, other.keys)
+        return self
+
+    def _absorb(self, frame: pd.DataFrame, keys: np.ndarray):
+        if self.frame is not None and len(self.frame) >= self.size:
+            # Réservoir plein: seules les lignes de clé inférieure au seuil entrent
+            candidates = keys < self.keys.max()
+            frame, keys = frame[candidates], keys[candidates]
+        if self.frame is not None:
+            frame = pd.concat([self.frame, frame])
+            keys = np.concatenate([self.keys, keys])
+        if len(frame) > self.size:
+            keep = np.argpartition(keys, self.size - 1)[:self.size]
+            frame, keys = frame.iloc[keep], keys[keep]
+        self.frame, self.keys = frame, keys
+
+    def to_frame(self) -> pd.DataFrame:
+        """Échantillon dans l'ordre d'origine des lignes"""
+        if self.frame is None:
+            return pd.DataFrame()
+        return self.frame.sort_index().reset_index(drop=True)
+
+
+def merge_dtype(current, new):
+    """Promotion de type entre deux morceaux (ex: int64 + float64 -> float64)"""
+    if current is None or current == new:
+        return new
+    if pd.api.types.is_numeric_dtype(current) and pd.api.types.is_numeric_dtype(new):
+        try:
+            return np.promote_types(current, new)
+        except TypeError:
+            # Types nullables pandas (Int64, Float64...)
+            return np.dtype('float64')
+    return np.dtype('object')
+
+
+class ColumnSketch:
+    """
+    Statistiques fusionnables d'une colonne
+
+    Les valeurs distinctes sont comptées exactement (ensemble de hashes)
+    tant qu'il y en a au plus max_exact_distinct, puis par HyperLogLog.
+    """
+
+    def __init__(
+        self,
+        distinct_error: float,
+        quantile_error: float,
+        seed: Optional[int] = None,
+        max_exact_distinct: int = DEFAULT_MAX_EXACT_DISTINCT
+    ):
+        self.max_exact_distinct = max_exact_distinct
+        self.exact_hashes: Optional[np.ndarray] = np.empty(0, dtype=np.uint64)
+        self.dtype = None
+        self.null_count = 0
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = None
+        self.max = None
+        self.distinct = HyperLogLog(distinct_error)
+        self.quantiles = QuantileSketch(quantile_error, seed)
+
+    @property
+    def kind(self) -> str:
+        return column_kind(self.dtype) if self.dtype is not None else 'unknown'
+
+    def update(self, series: pd.Series):
+        """Intègre un morceau de la colonne"""
+        self.dtype = merge_dtype(self.dtype, series.dtype)
+        self.null_count += int(series.isnull().sum())
+        hashes = hash_values(series)
+        self.distinct.update(hashes)
+        self._track_exact(hashes)
+
+        if column_kind(series.dtype) != 'numeric':
+            return
+
+        values = series.dropna().to_numpy(dtype='float64')
+        if len(values) == 0:
+            return
+
+        self.quantiles.update(values)
+        mean = float(values.mean())
+        m2 = float(((values - mean) ** 2).sum())
+        self._merge_moments(len(values), mean, m2, float(values.min()), float(values.max()))
+
+    def seed(self, series: pd.Series, column: ColumnProfile, sample_size: int = DEFAULT_SEED_SAMPLE):
+        """
+        Initialise l'état depuis le profil exact d'une colonne, sans la reparcourir
+
+        Nulls, count/mean/std/min/max repris du profil; les quantiles partent
+        d'un échantillon uniforme d'environ sample_size lignes (erreur dans
+        rank_error). Les valeurs distinctes ne sont pas suivies (exact_hashes
+        et HyperLogLog vides): l'appelant les compte.
+        """
+        self.dtype = series.dtype
+        self.null_count = column.null_count
+        self.exact_hashes = None
+        stats = column.numeric_stats
+        if column.kind != 'numeric' or not stats or not stats['count']:
+            return
+        count = int(stats['count'])
+        m2 = stats['std'] ** 2 * (count - 1) if count > 1 else 0.0
+        self._merge_moments(count, stats['mean'], m2, stats['min'], stats['max'])
+
+        n = len(series)
+        level = max(int(np.log2(n / sample_size)), 0) if sample_size else 0
+        rows = self.quantiles._rng.integers(0, n, n >> level) if level else slice(None)
+        self.quantiles.seed(series.iloc[rows].to_numpy(dtype='float64', na_value=np.nan), level)
+
+    def _track_exact(self, hashes: Optional[np.ndarray]):
+        if self.exact_hashes is None or hashes is None:
+            self.exact_hashes = None
+            return
+        if len(hashes) > self.max_exact_distinct:
+            # Début du morceau déjà trop varié: inutile de dédoublonner le reste
+            head = pd.unique(hashes[:4 * self.max_exact_distinct])
+            if len(head) > self.max_exact_distinct:
+                self.exact_hashes = None
+                return
+        merged = pd.unique(np.concatenate([self.exact_hashes, hashes]))
+        self.exact_hashes = merged if len(merged) <= self.max_exact_distinct else None
+
+    def n_distinct(self) -> int:
+        """Nombre de valeurs distinctes (exact si la cardinalité est faible)"""
+        if self.exact_hashes is not None:
+            return len(self.exact_hashes)
+        return self.distinct.estimate()
+
+    @property
+    def distinct_error(self) -> float:
+        """Erreur relative de n_distinct (0 si compté exactement)"""
+        return 0.0 if self.exact_hashes is not None else self.distinct.relative_error
+
+    def _merge_moments(self, n: int, mean: float, m2: float, vmin: float, vmax: float):
+        # Fusion de moyennes/variances (Chan et al.), stable numériquement
+        total = self.count + n
+        delta = mean - self.mean
+        self.mean += delta * n / total
+        self.m2 += m2 + delta ** 2 * self.count * n / total
+        self.count = total
+        self.min = vmin if self.min is None else min(self.min, vmin)
+        self.max = vmax if self.max is None else max(self.max, vmax)
+
+    def merge(self, other: "ColumnSketch") -> "ColumnSketch":
+        self.dtype = merge_dtype(self.dtype, other.dtype)
+        self.null_count += other.null_count
+        self.distinct.merge(other.distinct)
+        self._track_exact(other.exact_hashes)
+        self.quantiles.merge(other.quantiles)
+        if other.count:
+            self._merge_moments(other.count, other.mean, other.m2, other.min, other.max)
+        return self
+
+    def numeric_stats(self) -> Dict[str, float]:
+        """Statistiques au format de DataFrame.describe(), quartiles approchés"""
+        nan = float('nan')
+        quartiles = self.quantiles.quantiles(QUANTILES)
+        stats = {
+            "count": float(self.count),
+            "mean": self.mean if self.count else nan,
+            "std": (self.m2 / (self.count - 1)) ** 0.5 if self.count > 1 else nan,
+            "min": self.min if self.min is not None else nan,
+        }
+        for q, value in zip(QUANTILES, quartiles):
+            stats[f"{int(q * 100)}%"] = float(value)
+        stats["max"] = self.max if self.max is not None else nan
+        return stats
+
+
+class SketchProfile:
+    """
+    Profil approché d'un dataset, construit par morceaux
+
+    Les comptes de nulls, moyennes, écarts-types, min et max sont exacts;
+    les quartiles, l'aperçu et les valeurs distinctes au-delà de
+    max_exact_distinct sont approchés.
+    """
+
+    def __init__(
+        self,
+        distinct_error: float = DEFAULT_DISTINCT_ERROR,
+        quantile_error: float = DEFAULT_QUANTILE_ERROR,
+        sample_size: int = DEFAULT_SAMPLE_SIZE,
+        seed: Optional[int] = None,
+        max_exact_distinct: int = DEFAULT_MAX_EXACT_DISTINCT
+    ):
+        """
+        Args:
+            distinct_error: Erreur relative des comptes de valeurs distinctes
+            quantile_error: Erreur de rang des quantiles
+            sample_size: Taille du réservoir de lignes
+            seed: Graine aléatoire
+            max_exact_distinct: Cardinalité jusqu'à laquelle les valeurs
+                distinctes sont comptées exactement
+        """
+        self.distinct_error = distinct_error
+        self.quantile_error = quantile_error
+        self.max_exact_distinct = max_exact_distinct
+        self.seed = seed
+        self.n_rows = 0
+        self.columns: Dict[Any, ColumnSketch] = {}
+        self.sample = ReservoirSample(sample_size, seed)
+
+    def update(self, chunk: pd.DataFrame) -> "SketchProfile":
+        """Intègre un morceau de lignes"""
+        for col in chunk.columns:
+            if col not in self.columns:
+                self.columns[col] = ColumnSketch(
+                    self.distinct_error, self.quantile_error, self.seed, self.max_exact_distinct
+                )
+            self.columns[col].update(chunk[col])
+        self.sample.update(chunk, offset=self.n_rows)
+        self.n_rows += len(chunk)
+        return self
+
+    def merge(self, other: "SketchProfile") -> "SketchProfile":
+        """
+        Fusionne un profil construit ailleurs (autre morceau, autre processus)
+
+        L'ordre des lignes de l'échantillon suppose que other porte sur
+        des lignes situées après celles de self.
+        """
+        for col, sketch in other.columns.items():
+            if col in self.columns:
+                self.columns[col].merge(sketch)
+            else:
+                self.columns[col] = sketch
+        if other.sample.frame is not None:
+            shifted = ReservoirSample(self.sample.size)
+            shifted.frame = other.sample.frame.set_axis(other.sample.frame.index + self.n_rows)
+            shifted.keys = other.sample.keys
+            self.sample.merge(shifted)
+        self.n_rows += other.n_rows
+        return self
+
+    def head(self, n_rows: int = 5) -> pd.DataFrame:
+        """Aperçu tiré de l'échantillon"""
+        return self.sample.to_frame().head(n_rows)
+
+    def error_bounds(self) -> Dict[str, Any]:
+        """
+        Bornes d'erreur des statistiques approchées
+
+        Returns:
+            Dictionnaire avec:
+            - n_unique: {colonne: erreur relative type} (0: compte exact)
+            - quantiles: {colonne numérique: erreur de rang, fraction de n}
+              (0: quartiles exacts)
+            - sample_rows: lignes de l'échantillon (aperçu)
+        """
+        return {
+            "n_unique": {name: sketch.distinct_error for name, sketch in self.columns.items()},
+            "quantiles": {
+                name: sketch.quantiles.rank_error
+                for name, sketch in self.columns.items() if sketch.kind == 'numeric'
+            },
+            "sample_rows": 0 if self.sample.frame is None else len(self.sample.frame),
+        }
+
+    def to_profile(self) -> DataFrameProfile:
+        """Convertit en DataFrameProfile (valeurs distinctes et quartiles approchés, voir error_bounds)"""
+        columns = {}
+        for name, sketch in self.columns.items():
+            kind = sketch.kind
+            columns[name] = ColumnProfile(
+                name=name,
+                dtype=str(sketch.dtype),
+                kind=kind,
+                null_count=sketch.null_count,
+                n_unique=min(sketch.n_distinct(), self.n_rows - sketch.null_count),
+                numeric_stats=sketch.numeric_stats() if kind == 'numeric' else None,
+            )
+
+        return DataFrameProfile(
+            n_rows=self.n_rows,
+            columns=columns,
+            numeric_columns=[name for name, col in columns.items() if col.kind == 'numeric'],
+            categorical_columns=[name for name, col in columns.items() if col.kind == 'string'],
+            datetime_columns=[name for name, col in columns.items() if col.kind == 'temporal'],
+            error_bounds=self.error_bounds(),
+        )
+
+
+def sketch_chunks(chunks: Iterable[pd.DataFrame], **kwargs) -> SketchProfile:
+    """
+    Construit un profil approché à partir d'un itérable de morceaux
+
+    Args:
+        chunks: Morceaux successifs du dataset
+        kwargs: Paramètres de SketchProfile
+
+    Returns:
+        SketchProfile
+    """
+    profile = SketchProfile(**kwargs)
+    for chunk in chunks:
+        profile.update(chunk)
+    return profile
+
+
+def sketch_dataframe(df: pd.DataFrame, chunk_rows: int = DEFAULT_CHUNK_ROWS, **kwargs) -> SketchProfile:
+    """
+    Profil approché d'un DataFrame en mémoire, traité par tranches de lignes
+
+    Args:
+        df: DataFrame pandas
+        chunk_rows: Nombre de lignes par tranche
+        kwargs: Paramètres de SketchProfile
+
+    Returns:
+        SketchProfile
+    """
+    starts = range(0, max(len(df), 1), chunk_rows)
+    return sketch_chunks((df.iloc[start:start + chunk_rows] for start in starts), **kwargs)
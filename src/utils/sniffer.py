@@ -0,0 +1,191 @@
+"""
+Module de détection de l'encodage et du dialecte CSV
+N'inspecte que le début du fichier, avant le parsing complet
+"""
+
+import re
+import time
+import os
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, List, Optional
+
+
+DEFAULT_SNIFF_BYTES = 256 * 1024
+DELIMITERS = [',', ';', '\t', '|']
+MAX_SNIFF_LINES = 200
+
+_NUMBER = re.compile(r'^[-+]?(\d+([.,]\d*)?|[.,]\d+)([eE][-+]?\d+)?$')
+_COMMA_DECIMAL = re.compile(r'^[-+]?\d+,\d+$')
+
+
+@dataclass
+class CsvDialect:
+    """Paramètres de lecture détectés"""
+    encoding: str
+    delimiter: str
+    decimal: str
+    has_header: bool
+    n_columns: int
+    elapsed_ms: float
+    sample_bytes: int
+
+    def read_csv_kwargs(self) -> Dict[str, Any]:
+        """Options correspondantes pour pd.read_csv"""
+        kwargs = {"encoding": self.encoding, "sep": self.delimiter, "decimal": self.decimal}
+        if not self.has_header:
+            kwargs["header"] = None
+            kwargs["names"] = [f"col_{i + 1}" for i in range(self.n_columns)]
+        return kwargs
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def read_sample(file_content: Any, n_bytes: int = DEFAULT_SNIFF_BYTES) -> bytes:
+    """
+    Lit les premiers octets d'un fichier sans consommer la source
+
+    Args:
+        file_content: Chemin, bytes ou objet file-like (UploadedFile Streamlit)
+        n_bytes: Nombre d'octets à lire
+
+    Returns:
+        Début du fichier
+    """
+    if isinstance(file_content, (str, os.PathLike)):
+        with open(file_content, 'rb') as f:
+            return f.read(n_bytes)
+    if isinstance(file_content, (bytes, bytearray, memoryview)):
+        return bytes(file_content[:n_bytes])
+    if hasattr(file_content, 'getbuffer'):
+        return bytes(file_content.getbuffer()[:n_bytes])
+
+    file_content.seek(0)
+    sample = file_content.read(n_bytes)
+    file_content.seek(0)
+    return sample if isinstance(sample, bytes) else sample.encode()
+
+
+def detect_encoding(sample: bytes) -> str:
+    """
+    Choisit l'encodage: BOM, puis UTF-8 strict, puis cp1252 (exports Windows)
+
+    Le sample est coupé au dernier saut de ligne pour ne pas rejeter un
+    caractère multi-octets tronqué en fin d'échantillon.
+    """
+    if sample.startswith(b'\xef\xbb\xbf'):
+        return 'utf-8-sig'
+    if sample.startswith((b'\xff\xfe', b'\xfe\xff')):
+        return 'utf-16'
+
+    cut = sample.rfind(b'\n')
+    text = sample[:cut] if cut > 0 else sample
+    for encoding in ('utf-8', 'cp1252'):
+        try:
+            text.decode(encoding)
+            return encoding
+        except UnicodeDecodeError:
+            continue
+    return 'latin-1'
+
+
+def _split(line: str, delimiter: str) -> List[str]:
+    if '"' not in line:
+        return [field.strip() for field in line.split(delimiter)]
+
+    # Découpage simple: les délimiteurs entre guillemets sont ignorés
+    fields, current, quoted = [], [], False
+    for char in line:
+        if char == '"':
+            quoted = not quoted
+        elif char == delimiter and not quoted:
+            fields.append(''.join(current))
+            current = []
+            continue
+        current.append(char)
+    fields.append(''.join(current))
+    return [field.strip().strip('"') for field in fields]
+
+
+def detect_delimiter(lines: List[str]) -> str:
+    """
+    Délimiteur présent le même nombre de fois (et au moins une fois) sur
+    le plus de lignes; à égalité, celui qui découpe en le plus de champs
+    """
+    best, best_score = ',', (0.0, 0)
+    for delimiter in DELIMITERS:
+        counts = [len(_split(line, delimiter)) - 1 for line in lines]
+        if not counts or max(counts) == 0:
+            continue
+        mode = max(set(counts), key=counts.count)
+        if mode == 0:
+            continue
+        score = (counts.count(mode) / len(counts), mode)
+        if score > best_score:
+            best, best_score = delimiter, score
+    return best
+
+
+def detect_decimal(rows: List[List[str]], delimiter: str) -> str:
+    """Virgule décimale si le délimiteur n'est pas la virgule et que des nombres en 1,5 apparaissent"""
+    if delimiter == ',':
+        return '.'
+    fields = [field for row in rows for field in row]
+    comma = sum(1 for field in fields if _COMMA_DECIMAL.match(field))
+    dot = sum(1 for field in fields if re.match(r'^[-+]?\d+\.\d+$', field))
+    return ',' if comma > dot else '.'
+
+
+def detect_header(rows: List[List[str]]) -> bool:
+    """
+    En-tête si la première ligne n'a aucune valeur numérique alors qu'au
+    moins une colonne est numérique dans le reste de l'échantillon
+    """
+    if len(rows) < 2:
+        return True
+    first, body = rows[0], rows[1:]
+    if any(_NUMBER.match(field) for field in first):
+        return False
+    for i in range(len(first)):
+        values = [row[i] for row in body if i < len(row) and row[i]]
+        if values and all(_NUMBER.match(value) for value in values):
+            return True
+    # Aucune colonne numérique: impossible de trancher, convention pandas
+    return True
+
+
+def sniff_csv(file_content: Any, n_bytes: int = DEFAULT_SNIFF_BYTES, encoding: Optional[str] = None) -> CsvDialect:
+    """
+    Détecte encodage, délimiteur, séparateur décimal et en-tête
+
+    Args:
+        file_content: Chemin, bytes ou objet file-like (UploadedFile Streamlit)
+        n_bytes: Taille de l'échantillon inspecté
+        encoding: Encodage imposé (détecté si None)
+
+    Returns:
+        CsvDialect
+    """
+    start = time.perf_counter()
+    sample = read_sample(file_content, n_bytes)
+
+    encoding = encoding or detect_encoding(sample)
+    text = sample.decode(encoding, errors='replace')
+    lines = [line for line in text.splitlines() if line.strip()]
+    if len(sample) == n_bytes and len(lines) > 1:
+        # Dernière ligne probablement tronquée
+        lines = lines[:-1]
+    lines = lines[:MAX_SNIFF_LINES]
+
+    delimiter = detect_delimiter(lines)
+    rows = [_split(line, delimiter) for line in lines]
+
+    return CsvDialect(
+        encoding=encoding,
+        delimiter=delimiter,
+        decimal=detect_decimal(rows[1:], delimiter),
+        has_header=detect_header(rows),
+        n_columns=max((len(row) for row in rows), default=0),
+        elapsed_ms=(time.perf_counter() - start) * 1000,
+        sample_bytes=len(sample),
+    )
@@ -0,0 +1,178 @@
+"""
+Module d'ingestion CSV par morceaux (mémoire bornée)
+Construit le profil et un échantillon de travail au fil de la lecture
+"""
+
+import pandas as pd
+from typing import Dict, Any, Iterator, Optional, List
+import io
+import os
+
+from .sketches import SketchProfile
+
+
+DEFAULT_CHUNKSIZE = 100_000
+DEFAULT_SAMPLE_SIZE = 50_000
+
+
+class StreamingDataset:
+    """
+    Dataset CSV lu par morceaux
+
+    Seuls un morceau et l'échantillon de travail sont en mémoire à un instant
+    donné. Le dataset complet reste accessible à la demande via iter_chunks()
+    ou to_pandas(), en relisant la source.
+    """
+
+    def __init__(
+        self,
+        source: Any,
+        chunksize: int = DEFAULT_CHUNKSIZE,
+        sample_size: int = DEFAULT_SAMPLE_SIZE,
+        encoding: str = "utf-8",
+        random_state: Optional[int] = None,
+        **read_kwargs
+    ):
+        """
+        Args:
+            source: Chemin du fichier ou objet file-like relisible (seek)
+            chunksize: Nombre de lignes par morceau
+            sample_size: Taille maximale de l'échantillon de travail
+            encoding: Encodage du fichier
+            random_state: Graine pour l'échantillonnage
+            read_kwargs: Options supplémentaires pour pd.read_csv
+        """
+        self.source = source
+        self.chunksize = chunksize
+        self.encoding = encoding
+        self.read_kwargs = read_kwargs
+        self.dialect = None
+
+        self.n_chunks = 0
+        self.columns: List[str] = []
+        self.head: Optional[pd.DataFrame] = None
+        self.profile = SketchProfile(sample_size=sample_size, seed=random_state)
+        self.sample: Optional[pd.DataFrame] = None
+
+    def _rewind(self):
+        """Replace la source au début"""
+        if hasattr(self.source, 'seek'):
+            self.source.seek(0)
+
+    def iter_chunks(self, columns: Optional[List[str]] = None) -> Iterator[pd.DataFrame]:
+        """
+        Relit la source morceau par morceau
+
+        Args:
+            columns: Colonnes à lire (toutes par défaut)
+
+        Yields:
+            DataFrames d'au plus chunksize lignes
+        """
+        self._rewind()
+        reader = pd.read_csv(
+            self.source,
+            encoding=self.encoding,
+            chunksize=self.chunksize,
+            usecols=columns,
+            **self.read_kwargs
+        )
+        with reader:
+            for chunk in reader:
+                yield chunk
+
+    def ingest(self) -> "StreamingDataset":
+        """
+        Parcourt la source une fois pour construire le profil et l'échantillon
+
+        Returns:
+            Le dataset lui-même
+        """
+        for chunk in self.iter_chunks():
+            if self.n_chunks == 0:
+                self.columns = list(chunk.columns)
+                self.head = chunk.head(5).copy()
+
+            self.profile.update(chunk)
+            self.n_chunks += 1
+
+        self.sample = self.profile.sample.to_frame()
+        return self
+
+    def to_pandas(self, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Matérialise le dataset complet (à éviter sur les très gros fichiers)
+
+        Args:
+            columns: Colonnes à charger (toutes par défaut)
+
+        Returns:
+            DataFrame complet
+        """
+        return pd.concat(list(self.iter_chunks(columns)), ignore_index=True)
+
+    @property
+    def n_rows(self) -> int:
+        return self.profile.n_rows
+
+    @property
+    def shape(self) -> tuple:
+        return (self.n_rows, len(self.columns))
+
+    @property
+    def dtypes(self) -> Dict[str, Any]:
+        return {col: sketch.dtype for col, sketch in self.profile.columns.items()}
+
+    def get_info(self, n_rows: int = 5) -> Dict[str, Any]:
+        """
+        Métadonnées au format de get_dataframe_info(), calculées sur le flux
+
+        Les comptes de nulls et les statistiques count/mean/std/min/max sont
+        exacts sur tout le fichier, les quartiles sont approchés (sketch KLL);
+        leurs bornes d'erreur sont dans "error_bounds".
+
+        Args:
+            n_rows: Nombre de lignes à inclure dans l'aperçu
+
+        Returns:
+            Dictionnaire contenant les métadonnées du dataset
+        """
+        profile = self.profile.to_profile()
+
+        info = {
+            "shape": self.shape,
+            "columns": list(self.columns),
+            "dtypes": {col: str(dtype) for col, dtype in self.dtypes.items()},
+            "null_counts": profile.null_counts,
+            "unique_counts": profile.unique_counts,
+            "head": self.head.head(n_rows).to_dict(orient='records') if self.head is not None else [],
+            "numeric_columns": list(profile.numeric_columns),
+            "categorical_columns": list(profile.categorical_columns),
+            "datetime_columns": list(profile.datetime_columns),
+        }
+
+        if profile.numeric_columns:
+            info["numeric_stats"] = profile.numeric_stats
+        info["error_bounds"] = profile.error_bounds
+
+        return info
+
+
+def open_source(file_content: Any) -> Any:
+    """
+    Retourne une source relisible sans copier le contenu en mémoire
+
+    Args:
+        file_content: Chemin, bytes ou objet file-like (UploadedFile Streamlit)
+
+    Returns:
+        Chemin ou objet file-like positionné au début
+    """
+    if isinstance(file_content, (str, os.PathLike)):
+        return file_content
+    if isinstance(file_content, (bytes, bytearray, memoryview)):
+        return io.BytesIO(file_content)
+    # UploadedFile est un BytesIO: on le relit directement plutôt que getvalue()
+    if hasattr(file_content, 'seek'):
+        file_content.seek(0)
+    return file_content
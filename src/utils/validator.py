@@ -3,39 +3,87 @@ Module de validation des données
 """
 
 import pandas as pd
-from typing import List, Dict, Tuple, Optional
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import List, Dict, Tuple, Optional, Sequence
 
+from .profiler import DataFrameProfile, get_profile
+from .rules import get_default_engine
 
-def validate_dataframe(df: pd.DataFrame) -> Tuple[bool, List[str]]:
+
+# Bit de chaque méthode dans le masque de detect_outliers_batch
+OUTLIER_METHODS = {'iqr': 1, 'zscore': 2, 'mad': 4}
+ZSCORE_THRESHOLD = 3.0
+# Score z modifié (Iglewicz & Hoaglin): 0.6745 * |x - médiane| / MAD
+MAD_THRESHOLD = 3.5
+OUTLIER_BLOCK_COLUMNS = 16
+
+
+def validate_dataframe(
+    df: pd.DataFrame,
+    include_expensive: bool = True,
+    budget_ms: Optional[float] = None
+) -> Tuple[bool, List[str]]:
     """
     Valide qu'un DataFrame est utilisable pour la visualisation
     
+    Les contrôles sont les règles enregistrées dans utils.rules; utiliser
+    get_default_engine().validate() pour obtenir la durée de chaque règle.
+    
     Args:
         df: DataFrame pandas
+        include_expensive: Évaluer les règles qui parcourent les valeurs
+        budget_ms: Budget de latence au-delà duquel les règles restantes
+            sont ignorées
+        
+    Returns:
+        Tuple (is_valid, list_of_errors)
+    """
+    report = get_default_engine().validate(df, include_expensive=include_expensive, budget_ms=budget_ms)
+    return report.is_valid, report.errors
+
+
+def validate_batch(batch: pd.DataFrame, profile: DataFrameProfile) -> Tuple[bool, List[str]]:
+    """
+    Valide un lot de lignes à ajouter à un dataset déjà validé
+
+    Seul le lot est parcouru: les contrôles globaux (lignes, colonnes
+    entièrement nulles) combinent ses comptes avec le profil existant.
+    
+    Args:
+        batch: Lignes à ajouter
+        profile: Profil du dataset existant
         
     Returns:
         Tuple (is_valid, list_of_errors)
     """
     errors = []
     
-    # Vérifier que le DataFrame n'est pas vide
-    if df.empty:
-        errors.append("Le DataFrame est vide")
+    if batch.empty:
+        errors.append("Le lot à ajouter est vide")
     
-    # Vérifier qu'il y a au moins 2 colonnes
-    if len(df.columns) < 2:
-        errors.append("Le DataFrame doit contenir au moins 2 colonnes")
+    if batch.columns.duplicated().any():
+        errors.append("Le lot contient des noms de colonnes dupliqués")
     
-    # Vérifier qu'il y a au moins 3 lignes
-    if len(df) < 3:
-        errors.append("Le DataFrame doit contenir au moins 3 lignes de données")
+    # Vérifier que le schéma est identique
+    missing = [col for col in profile.columns if col not in batch.columns]
+    extra = [col for col in batch.columns if col not in profile.columns]
+    if missing:
+        errors.append(f"Colonnes manquantes dans le lot: {', '.join(map(str, missing))}")
+    if extra:
+        errors.append(f"Colonnes inconnues dans le lot: {', '.join(map(str, extra))}")
     
-    # Vérifier les noms de colonnes dupliqués
-    if df.columns.duplicated().any():
-        errors.append("Le DataFrame contient des noms de colonnes dupliqués")
+    if errors:
+        return False, errors
     
-    # Vérifier si toutes les colonnes sont nulles
-    all_null_cols = [col for col in df.columns if df[col].isnull().all()]
+    # Colonnes entièrement nulles après ajout
+    batch_nulls = batch.isnull().sum()
+    total_rows = profile.n_rows + len(batch)
+    all_null_cols = [
+        str(col) for col, p in profile.columns.items()
+        if p.null_count + int(batch_nulls[col]) == total_rows
+    ]
     if all_null_cols:
         errors.append(f"Colonnes entièrement nulles: {', '.join(all_null_cols)}")
     
@@ -43,66 +91,212 @@ def validate_dataframe(df: pd.DataFrame) -> Tuple[bool, List[str]]:
     return is_valid, errors
 
 
-def check_column_types(df: pd.DataFrame) -> Dict[str, str]:
+def check_column_types(df: pd.DataFrame, approximate: bool = False) -> Dict[str, str]:
     """
     Détermine le type de chaque colonne pour la visualisation
     
     Args:
         df: DataFrame pandas
+        approximate: Cardinalités estimées par sketch (très gros DataFrames);
+            bornes d'erreur dans get_profile(df, approximate=True).error_bounds
         
     Returns:
         Dictionnaire {nom_colonne: type_viz}
         Types possibles: 'numeric', 'categorical', 'temporal', 'text'
     """
-    column_types = {}
+    profile = get_profile(df, approximate=approximate)
+    return {col: profile.viz_type(col) for col in profile.columns}
+
+
+@dataclass
+class OutlierMask:
+    """
+    Résultat de detect_outliers_batch
+
+    bits[i, j] combine les bits (OUTLIER_METHODS) des méthodes pour
+    lesquelles la ligne i est un outlier de la colonne j.
+    """
+    index: pd.Index
+    columns: List[str]
+    methods: List[str]
+    bits: np.ndarray
+    counts: pd.DataFrame
+
+    def mask(self, column: str, method: str) -> pd.Series:
+        """Series booléenne des outliers d'une colonne pour une méthode"""
+        j = self.columns.index(column)
+        flags = (self.bits[:, j] & OUTLIER_METHODS[method]) != 0
+        return pd.Series(flags, index=self.index, name=column)
+
+    def any(self) -> pd.Series:
+        """Lignes outliers pour au moins une colonne et une méthode"""
+        return pd.Series(self.bits.any(axis=1), index=self.index)
+
+
+def _column_quantiles(values: np.ndarray, q: Sequence[float]) -> np.ndarray:
+    """
+    Quantiles de chaque ligne d'une matrice colonnes x lignes
+    (interpolation linéaire, comme pandas), NaN ignorés
+
+    Sans NaN, np.quantile procède par sélection partielle; sinon un tri
+    unique place les NaN en fin et les positions sont calculées sur le
+    nombre de valeurs de chaque colonne.
+    """
+    nan_mask = np.isnan(values)
+    if not nan_mask.any():
+        return np.quantile(values, q, axis=1)
+
+    counts = values.shape[1] - np.count_nonzero(nan_mask, axis=1)
+    sorted_values = np.sort(values, axis=1)
+    last = np.maximum(counts - 1, 0)
+    cols = np.arange(values.shape[0])
+    result = []
+    for quantile in q:
+        position = quantile * last
+        lower = np.floor(position).astype(np.intp)
+        upper = np.minimum(lower + 1, last)
+        low_values = sorted_values[cols, lower]
+        high_values = sorted_values[cols, upper]
+        interpolated = low_values + (high_values - low_values) * (position - lower)
+        result.append(np.where(counts > 0, interpolated, np.nan))
+    return np.array(result)
+
+
+def _outlier_block(values: np.ndarray, methods: Sequence[str]) -> np.ndarray:
+    """
+    Masque de bits d'un bloc de colonnes
+
+    values est stocké colonne par colonne (colonnes x lignes, float64) pour
+    que chaque sélection ou réduction parcoure une zone contiguë.
+    """
+    bits = np.zeros(values.shape, dtype=np.uint8)
+    if values.shape[1] == 0:
+        return bits
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        if 'iqr' in methods or 'mad' in methods:
+            q1, median, q3 = (q[:, None] for q in _column_quantiles(values, [0.25, 0.5, 0.75]))
+
+        if 'iqr' in methods:
+            iqr = q3 - q1
+            flags = (values < q1 - 1.5 * iqr) | (values > q3 + 1.5 * iqr)
+            bits |= flags.astype(np.uint8) * OUTLIER_METHODS['iqr']
+
+        if 'zscore' in methods:
+            mean = np.nanmean(values, axis=1, keepdims=True)
+            std = np.nanstd(values, axis=1, ddof=1, keepdims=True)
+            # Seuil multiplié plutôt que division: pas de temporaire z-score
+            flags = np.abs(values - mean) > ZSCORE_THRESHOLD * std
+            bits |= flags.astype(np.uint8) * OUTLIER_METHODS['zscore']
+
+        if 'mad' in methods:
+            deviations = np.abs(values - median)
+            mad = _column_quantiles(deviations, [0.5])[0][:, None]
+            # MAD nulle (plus de la moitié des valeurs identiques): pas d'outlier
+            flags = (mad > 0) & (deviations > MAD_THRESHOLD / 0.6745 * mad)
+            bits |= flags.astype(np.uint8) * OUTLIER_METHODS['mad']
+
+    return bits
+
+
+def detect_outliers_batch(
+    df: pd.DataFrame,
+    methods: Sequence[str] = ('iqr', 'zscore', 'mad'),
+    columns: Optional[Sequence[str]] = None,
+    n_jobs: int = 1,
+    block_size: int = OUTLIER_BLOCK_COLUMNS
+) -> OutlierMask:
+    """
+    Détecte les outliers de toutes les colonnes numériques en une passe
+
+    Les colonnes sont converties en une matrice float64 et traitées par
+    blocs; numpy libérant le GIL pendant les sélections et les tris, les
+    blocs peuvent être répartis sur plusieurs threads.
     
-    for col in df.columns:
-        if pd.api.types.is_numeric_dtype(df[col]):
-            column_types[col] = 'numeric'
-        elif pd.api.types.is_datetime64_any_dtype(df[col]):
-            column_types[col] = 'temporal'
-        elif pd.api.types.is_categorical_dtype(df[col]) or df[col].dtype == 'object':
-            # Distinguer catégoriel vs texte basé sur le nombre de valeurs uniques
-            n_unique = df[col].nunique()
-            if n_unique < len(df) * 0.5 and n_unique < 50:
-                column_types[col] = 'categorical'
-            else:
-                column_types[col] = 'text'
-        else:
-            column_types[col] = 'unknown'
+    Args:
+        df: DataFrame pandas
+        methods: Méthodes parmi 'iqr', 'zscore' et 'mad'
+        columns: Colonnes à analyser (toutes les numériques si None)
+        n_jobs: Nombre de threads (1: séquentiel)
+        block_size: Nombre de colonnes par bloc
+        
+    Returns:
+        OutlierMask (masque de bits lignes x colonnes et comptes par méthode)
+    """
+    methods = list(methods)
+    unknown = [m for m in methods if m not in OUTLIER_METHODS]
+    if unknown:
+        raise ValueError(f"Méthode inconnue: {', '.join(unknown)}")
+    
+    if columns is None:
+        columns = [
+            col for col in df.columns
+            if pd.api.types.is_numeric_dtype(df[col]) and not pd.api.types.is_bool_dtype(df[col])
+        ]
+    else:
+        columns = list(columns)
+        non_numeric = [col for col in columns if not pd.api.types.is_numeric_dtype(df[col])]
+        if non_numeric:
+            raise ValueError(f"Colonnes non numériques: {', '.join(map(str, non_numeric))}")
+    
+    # Matrice colonnes x lignes: la transposée est le plus souvent une vue
+    # des blocs internes de pandas, déjà stockés colonne par colonne
+    values = np.ascontiguousarray(df[columns].to_numpy(dtype=np.float64, na_value=np.nan).T)
+    blocks = [values[i:i + block_size] for i in range(0, len(columns), max(block_size, 1))]
     
-    return column_types
+    if n_jobs > 1 and len(blocks) > 1:
+        with ThreadPoolExecutor(max_workers=n_jobs) as pool:
+            results = list(pool.map(lambda block: _outlier_block(block, methods), blocks))
+    else:
+        results = [_outlier_block(block, methods) for block in blocks]
+    
+    bits = np.vstack(results).T if results else np.zeros((len(df), 0), dtype=np.uint8)
+    counts = pd.DataFrame(
+        {m: np.count_nonzero(bits & OUTLIER_METHODS[m], axis=0) for m in methods},
+        index=pd.Index(columns, name='column'),
+    )
+    return OutlierMask(index=df.index, columns=columns, methods=methods, bits=bits, counts=counts)
 
 
-def detect_outliers(df: pd.DataFrame, column: str, method: str = 'iqr') -> pd.Series:
+def detect_outliers(df: pd.DataFrame, column: str, method: str = 'iqr', approximate: bool = False) -> pd.Series:
     """
     Détecte les outliers dans une colonne numérique
     
     Args:
         df: DataFrame pandas
         column: Nom de la colonne
-        method: Méthode de détection ('iqr' ou 'zscore')
+        method: Méthode de détection ('iqr', 'zscore' ou 'mad')
+        approximate: Quartiles/moyenne/écart-type lus dans le profil par
+            sketches au lieu d'être recalculés exactement; l'erreur de rang
+            des quartiles est dans attrs["error_bounds"] du résultat
         
     Returns:
         Series booléenne indiquant les outliers
     """
     if not pd.api.types.is_numeric_dtype(df[column]):
         raise ValueError(f"La colonne {column} n'est pas numérique")
+    if method not in OUTLIER_METHODS:
+        raise ValueError(f"Méthode inconnue: {method}")
     
-    if method == 'iqr':
-        Q1 = df[column].quantile(0.25)
-        Q3 = df[column].quantile(0.75)
+    profile = get_profile(df, approximate=True) if approximate and method != 'mad' else None
+    stats = profile.columns[column].numeric_stats if profile is not None else None
+    
+    if stats and method == 'iqr':
+        Q1, Q3 = stats['25%'], stats['75%']
         IQR = Q3 - Q1
-        lower_bound = Q1 - 1.5 * IQR
-        upper_bound = Q3 + 1.5 * IQR
-        return (df[column] < lower_bound) | (df[column] > upper_bound)
+        outliers = (df[column] < Q1 - 1.5 * IQR) | (df[column] > Q3 + 1.5 * IQR)
+        outliers.attrs["error_bounds"] = {"quantiles": profile.error_bounds["quantiles"][column]}
+        return outliers
     
-    elif method == 'zscore':
-        z_scores = (df[column] - df[column].mean()) / df[column].std()
-        return abs(z_scores) > 3
+    if stats and method == 'zscore':
+        # Moyenne et écart-type exacts même en mode approché
+        z_scores = (df[column] - stats['mean']) / stats['std']
+        outliers = abs(z_scores) > ZSCORE_THRESHOLD
+        outliers.attrs["error_bounds"] = {"quantiles": 0.0}
+        return outliers
     
-    else:
-        raise ValueError(f"Méthode inconnue: {method}")
+    # Calcul exact (et MAD, absente du profil): même passe que le mode batch
+    return detect_outliers_batch(df, methods=[method], columns=[column]).mask(column, method)
 
 
 def suggest_preprocessing(df: pd.DataFrame) -> List[str]:
@@ -116,12 +310,12 @@ def suggest_preprocessing(df: pd.DataFrame) -> List[str]:
         Liste de suggestions
     """
     suggestions = []
+    profile = get_profile(df)
     
     # Vérifier les valeurs manquantes
-    null_cols = df.columns[df.isnull().any()].tolist()
-    if null_cols:
-        pct_null = {col: (df[col].isnull().sum() / len(df)) * 100 
-                    for col in null_cols}
+    if profile.n_rows:
+        pct_null = {col: (p.null_count / profile.n_rows) * 100
+                    for col, p in profile.columns.items() if p.null_count}
         high_null = [col for col, pct in pct_null.items() if pct > 50]
         if high_null:
             suggestions.append(
@@ -130,7 +324,7 @@ def suggest_preprocessing(df: pd.DataFrame) -> List[str]:
             )
     
     # Vérifier les colonnes avec une seule valeur unique
-    single_value_cols = [col for col in df.columns if df[col].nunique() == 1]
+    single_value_cols = [col for col, p in profile.columns.items() if p.n_unique == 1]
     if single_value_cols:
         suggestions.append(
             f"Colonnes constantes (peu utiles pour la visualisation): "
@@ -138,12 +332,10 @@ def suggest_preprocessing(df: pd.DataFrame) -> List[str]:
         )
     
     # Vérifier les colonnes de texte très longues
-    text_cols = df.select_dtypes(include=['object']).columns
-    for col in text_cols:
-        avg_length = df[col].astype(str).str.len().mean()
-        if avg_length > 100:
+    for col, p in profile.columns.items():
+        if p.avg_length is not None and p.avg_length > 100:
             suggestions.append(
-                f"La colonne '{col}' contient du texte long (moyenne: {avg_length:.0f} caractères)"
+                f"La colonne '{col}' contient du texte long (moyenne: {p.avg_length:.0f} caractères)"
             )
     
     return suggestions
@@ -4,8 +4,10 @@ Modules de génération et export de visualisations
 
 from .plotter import VisualizationPlotter
 from .export import export_figure_to_png
+from .sandbox import SandboxPool
 
 __all__ = [
     "VisualizationPlotter",
     "export_figure_to_png",
+    "SandboxPool",
 ]
@@ -0,0 +1,157 @@
+"""
+Mémoïsation de l'étape de visualisation
+Code généré, code compilé et figure conservés d'un rerun Streamlit à l'autre
+"""
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from types import CodeType
+from typing import Any, Dict, Optional, Tuple
+
+import plotly.graph_objects as go
+
+
+DEFAULT_MAX_ENTRIES = 64
+# Nom de fichier des tracebacks du code exécuté
+CODE_FILENAME = "<visualization>"
+
+
+@dataclass
+class CodeEntry:
+    """Code d'une proposition pour un schéma et un modèle"""
+    code: str
+    # None si le code ne compile pas (la visualisation de secours est utilisée)
+    compiled: Optional[CodeType]
+    from_cache: bool = False
+    from_template: bool = False
+
+
+@dataclass
+class FigureEntry:
+    """Figure d'une proposition sur un dataset donné"""
+    figure: go.Figure
+    thumbnail: Optional[bytes] = None
+
+
+def compile_plot_code(code: str) -> Optional[CodeType]:
+    """Code objet prêt pour exec, ou None en cas d'erreur de syntaxe"""
+    try:
+        return compile(code, CODE_FILENAME, "exec")
+    except (SyntaxError, ValueError):
+        return None
+
+
+class VisualizationMemo:
+    """
+    Cache LRU en mémoire de l'étape de visualisation, sur deux niveaux
+
+    - code (et code compilé): proposition + schéma du dataset + modèle;
+      réutilisé si le fichier change sans changer de colonnes
+    - figure: clé du code + empreinte du contenu du dataset
+
+    Rien n'expire de lui-même: les entrées sortent par ordre LRU ou par
+    invalidate() (régénération demandée, dataset rechargé). Les figures
+    sont partagées et ne doivent pas être modifiées en place.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        """
+        Args:
+            max_entries: Nombre maximum d'entrées par niveau
+        """
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._codes: "OrderedDict[Tuple[str, str, str], CodeEntry]" = OrderedDict()
+        self._figures: "OrderedDict[Tuple[str, str, str, str], FigureEntry]" = OrderedDict()
+
+    def _touch(self, entries: OrderedDict, key: tuple) -> Optional[Any]:
+        entry = entries.get(key)
+        if entry is not None:
+            entries.move_to_end(key)
+        return entry
+
+    def _store(self, entries: OrderedDict, key: tuple, entry: Any):
+        entries[key] = entry
+        entries.move_to_end(key)
+        while len(entries) > self.max_entries:
+            entries.popitem(last=False)
+
+    def get_code(self, proposal_key: str, schema_key: str, model: str) -> Optional[CodeEntry]:
+        with self._lock:
+            return self._touch(self._codes, (proposal_key, schema_key, model))
+
+    def put_code(self, proposal_key: str, schema_key: str, model: str, entry: CodeEntry):
+        with self._lock:
+            self._store(self._codes, (proposal_key, schema_key, model), entry)
+
+    def get_figure(self, proposal_key: str, schema_key: str, model: str, dataset_key: str) -> Optional[FigureEntry]:
+        """Figure mémorisée (compte un hit ou un miss)"""
+        with self._lock:
+            entry = self._touch(self._figures, (proposal_key, schema_key, model, dataset_key))
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return entry
+
+    def put_figure(self, proposal_key: str, schema_key: str, model: str, dataset_key: str, entry: FigureEntry):
+        with self._lock:
+            self._store(self._figures, (proposal_key, schema_key, model, dataset_key), entry)
+
+    def invalidate(self, proposal_key: Optional[str] = None, dataset_key: Optional[str] = None) -> int:
+        """
+        Supprime les entrées d'une proposition et/ou d'un dataset
+
+        Invalider une proposition supprime aussi son code (nouvel appel au
+        LLM au prochain passage); invalider un dataset ne supprime que ses
+        figures. Sans argument, tout est vidé.
+
+        Returns:
+            Nombre d'entrées supprimées
+        """
+        with self._lock:
+            if proposal_key is None and dataset_key is None:
+                removed = len(self._codes) + len(self._figures)
+                self._codes.clear()
+                self._figures.clear()
+                return removed
+
+            removed = 0
+            for key in list(self._figures):
+                if ((proposal_key is None or key[0] == proposal_key)
+                        and (dataset_key is None or key[3] == dataset_key)):
+                    del self._figures[key]
+                    removed += 1
+            if proposal_key is not None and dataset_key is None:
+                for key in [key for key in self._codes if key[0] == proposal_key]:
+                    del self._codes[key]
+                    removed += 1
+            return removed
+
+    def clear(self):
+        self.invalidate()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns:
+            Dictionnaire hits, misses, hit_rate (figures), codes et figures en mémoire
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "codes": len(self._codes),
+                "figures": len(self._figures),
+            }
+
+
+_visualization_memo = VisualizationMemo()
+
+
+def get_visualization_memo() -> VisualizationMemo:
+    return _visualization_memo
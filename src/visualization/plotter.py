@@ -5,33 +5,61 @@ Exécute le code généré par le LLM de manière sécurisée
 
 import pandas as pd
 import plotly.graph_objects as go
-from typing import Optional, Dict, Any
+from types import CodeType
+from typing import Optional, Dict, Any, Union, TYPE_CHECKING
 import sys
+import threading
 from io import StringIO
 
+from .reduction import DEFAULT_MAX_POINTS, points_trace, reduce_figure
+
+if TYPE_CHECKING:
+    from .sandbox import SandboxPool
+
+
+# sys.stdout/sys.stderr sont globaux: une seule exécution à la fois les redirige
+_EXEC_LOCK = threading.Lock()
+
 
 class VisualizationPlotter:
     """Classe pour exécuter et générer des visualisations"""
     
-    def __init__(self):
-        """Initialise le plotter"""
-        pass
+    def __init__(self, sandbox: Optional["SandboxPool"] = None, max_points: Optional[int] = DEFAULT_MAX_POINTS):
+        """
+        Initialise le plotter
+        
+        Args:
+            sandbox: Pool de processus isolés (voir visualization.sandbox);
+                None: exécution dans le processus courant
+            max_points: Points affichés au maximum par figure, au-delà les
+                traces sont réduites (voir visualization.reduction); None: aucune réduction
+        """
+        self.sandbox = sandbox
+        self.max_points = max_points
     
     def execute_plot_code(
         self,
-        code: str,
+        code: Union[str, CodeType],
         df: pd.DataFrame
     ) -> Optional[go.Figure]:
         """
         Exécute le code de visualisation de manière contrôlée
         
         Args:
-            code: Code Python à exécuter
+            code: Code Python à exécuter, source ou déjà compilé (exécution
+                dans le processus uniquement)
             df: DataFrame pandas
             
         Returns:
             Figure Plotly ou None si erreur
         """
+        if self.sandbox is not None and isinstance(code, str):
+            try:
+                return self.sandbox.run(code, df, max_points=self.max_points)
+            except Exception as e:
+                print(f"Erreur lors de l'exécution du code: {str(e)}")
+                return None
+        
         try:
             # Créer un namespace isolé pour l'exécution
             namespace = {
@@ -41,36 +69,38 @@ class VisualizationPlotter:
                 '__builtins__': __builtins__
             }
             
-            # Capturer stdout/stderr pour éviter les prints
-            old_stdout = sys.stdout
-            old_stderr = sys.stderr
-            sys.stdout = StringIO()
-            sys.stderr = StringIO()
+            with _EXEC_LOCK:
+                # Capturer stdout/stderr pour éviter les prints
+                old_stdout = sys.stdout
+                old_stderr = sys.stderr
+                sys.stdout = StringIO()
+                sys.stderr = StringIO()
             
-            try:
-                # Exécuter le code
-                exec(code, namespace)
+                try:
+                    # Exécuter le code
+                    exec(code, namespace)
                 
-                # Vérifier que create_figure existe
-                if 'create_figure' not in namespace:
-                    raise ValueError("Le code doit définir une fonction create_figure(df)")
+                    # Vérifier que create_figure existe
+                    if 'create_figure' not in namespace:
+                        raise ValueError("Le code doit définir une fonction create_figure(df)")
                 
-                # Appeler la fonction
-                fig = namespace['create_figure'](df)
+                    # Appeler la fonction
+                    fig = namespace['create_figure'](df)
                 
-                # Vérifier que c'est bien une Figure Plotly
-                if not isinstance(fig, go.Figure):
-                    raise ValueError(
-                        f"create_figure doit retourner un plotly.graph_objects.Figure, "
-                        f"reçu {type(fig)}"
-                    )
+                    # Vérifier que c'est bien une Figure Plotly
+                    if not isinstance(fig, go.Figure):
+                        raise ValueError(
+                            f"create_figure doit retourner un plotly.graph_objects.Figure, "
+                            f"reçu {type(fig)}"
+                        )
                 
-                return fig
+                    # Traces volumineuses réduites avant l'envoi au navigateur
+                    return reduce_figure(fig, self.max_points)
                 
-            finally:
-                # Restaurer stdout/stderr
-                sys.stdout = old_stdout
-                sys.stderr = old_stderr
+                finally:
+                    # Restaurer stdout/stderr
+                    sys.stdout = old_stdout
+                    sys.stderr = old_stderr
                 
         except Exception as e:
             print(f"Erreur lors de l'exécution du code: {str(e)}")
@@ -101,12 +131,12 @@ class VisualizationPlotter:
             
             # Déterminer le type de graphique selon les types de données
             if pd.api.types.is_numeric_dtype(df[x_col]) and pd.api.types.is_numeric_dtype(df[y_col]):
-                # Scatter plot pour numérique vs numérique
-                fig = go.Figure(data=go.Scatter(
-                    x=df_clean[x_col],
-                    y=df_clean[y_col],
-                    mode='markers',
-                    marker=dict(color='steelblue', size=8, opacity=0.6)
+                # Scatter plot pour numérique vs numérique (densité 2D si trop de points)
+                fig = go.Figure(data=points_trace(
+                    df_clean[x_col],
+                    df_clean[y_col],
+                    self.max_points,
+                    color='steelblue', size=8, opacity=0.6
                 ))
             else:
                 # Bar chart par défaut
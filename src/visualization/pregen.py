@@ -0,0 +1,393 @@
+"""
+Pré-génération des visualisations en arrière-plan
+Code, figure et miniature de chaque proposition, avant même sa sélection
+"""
+
+import json
+import threading
+import time
+import pandas as pd
+import plotly.graph_objects as go
+from concurrent.futures import Future, ThreadPoolExecutor, CancelledError
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+
+from llm.code_generator import CodeGenerator
+from llm.fingerprint import schema_fingerprint
+from llm.models import get_model_manager
+from .plotter import VisualizationPlotter
+from .export import export_figure_to_bytes
+from .sandbox import SandboxPool
+from .reduction import DEFAULT_MAX_POINTS
+from .memo import CodeEntry, FigureEntry, VisualizationMemo, compile_plot_code, get_visualization_memo
+
+
+THUMBNAIL_SIZE = (320, 200)
+
+DataSource = Union[pd.DataFrame, Callable[[], pd.DataFrame]]
+
+
+class PregenCancelled(Exception):
+    """La pré-génération a été annulée (nouvelle analyse)"""
+
+
+@dataclass
+class PregenResult:
+    """Visualisation prête pour une proposition"""
+    proposal: Dict[str, Any]
+    code: str
+    figure: go.Figure
+    thumbnail: Optional[bytes]
+    from_cache: bool
+    elapsed_ms: float
+    # Code produit par un template, sans appel au LLM
+    from_template: bool = False
+    # Code et figure repris de la mémoïsation, sans exécution
+    from_memo: bool = False
+    # Erreur de la préparation, remplacée par la visualisation de secours
+    error: Optional[str] = None
+
+
+def proposal_key(proposal: Dict[str, Any]) -> str:
+    """Clé stable d'une proposition"""
+    return json.dumps(proposal, sort_keys=True, ensure_ascii=False, default=str)
+
+
+def memo_keys(
+    proposal: Dict[str, Any],
+    df_info: Dict[str, Any],
+    base_url: str,
+    unified_model: Optional[str] = None
+) -> Tuple[str, str, str]:
+    """Clés de mémoïsation du code: proposition, schéma du dataset, modèle de l'étape code"""
+    model = get_model_manager(base_url).model_for("code", unified_model)
+    return proposal_key(proposal), schema_fingerprint(df_info), model
+
+
+def memoized_visualization(
+    proposal: Dict[str, Any],
+    df_info: Dict[str, Any],
+    dataset_key: Optional[str],
+    base_url: str,
+    memo: Optional[VisualizationMemo] = None,
+    unified_model: Optional[str] = None
+) -> Optional[PregenResult]:
+    """
+    Visualisation déjà construite pour cette proposition, ce dataset et ce modèle
+
+    Returns:
+        PregenResult (from_memo), ou None si absente ou sans clé de dataset
+    """
+    if dataset_key is None:
+        return None
+    memo = memo or get_visualization_memo()
+    start = time.perf_counter()
+    keys = memo_keys(proposal, df_info, base_url, unified_model)
+    figure = memo.get_figure(*keys, dataset_key)
+    code = memo.get_code(*keys)
+    if figure is None or code is None:
+        return None
+    return PregenResult(
+        proposal=proposal,
+        code=code.code,
+        figure=figure.figure,
+        thumbnail=figure.thumbnail,
+        from_cache=code.from_cache,
+        elapsed_ms=(time.perf_counter() - start) * 1000,
+        from_template=code.from_template,
+        from_memo=True,
+    )
+
+
+def build_visualization(
+    proposal: Dict[str, Any],
+    df_info: Dict[str, Any],
+    df: DataSource,
+    base_url: str,
+    use_cache: bool = True,
+    thumbnail: bool = False,
+    cancelled: Optional[threading.Event] = None,
+    dataset_key: Optional[str] = None,
+    memo: Optional[VisualizationMemo] = None,
+    sandbox: Optional[SandboxPool] = None,
+    max_points: Optional[int] = DEFAULT_MAX_POINTS,
+    unified_model: Optional[str] = None
+) -> PregenResult:
+    """
+    Code Plotly, figure (avec visualisation de secours) et miniature d'une proposition
+
+    Le code (source et compilé) est mémoïsé par proposition, schéma et
+    modèle; la figure l'est en plus par dataset_key. Un code de secours
+    (LLM indisponible) n'est pas mémoïsé. Le code du LLM s'exécute dans
+    sandbox s'il est fourni; celui des templates reste dans le processus.
+
+    Args:
+        proposal: Proposition de visualisation
+        df_info: Informations sur le DataFrame
+        df: DataFrame, ou fonction qui le charge (appelée seulement si besoin)
+        base_url: URL du serveur Ollama
+        use_cache: Utiliser le cache des réponses du LLM
+        thumbnail: Calculer une miniature PNG (kaleido)
+        cancelled: Événement vérifié entre les étapes
+        dataset_key: Empreinte du contenu du dataset (None: figure non mémoïsée)
+        memo: Mémoïsation à utiliser (défaut: partagée par le processus)
+        sandbox: Pool de processus isolés pour le code du LLM (None: dans le processus)
+        max_points: Points affichés au maximum (voir visualization.reduction)
+        unified_model: Modèle commun à toutes les étapes (None: modèle de l'étape code)
+
+    Returns:
+        PregenResult
+
+    Raises:
+        PregenCancelled: Si l'événement est levé entre deux étapes
+    """
+    def check():
+        if cancelled is not None and cancelled.is_set():
+            raise PregenCancelled()
+
+    memo = memo or get_visualization_memo()
+    ready = memoized_visualization(proposal, df_info, dataset_key, base_url, memo, unified_model)
+    if ready is not None:
+        return ready
+
+    start = time.perf_counter()
+    keys = memo_keys(proposal, df_info, base_url, unified_model)
+    entry = memo.get_code(*keys)
+    memoizable = True
+    if entry is None:
+        generator = CodeGenerator(base_url, model=keys[2])
+        code = generator.generate_plot_code(proposal, df_info, use_cache=use_cache)
+        entry = CodeEntry(
+            code=code,
+            compiled=compile_plot_code(code),
+            from_cache=generator.last_from_cache,
+            from_template=generator.last_from_template,
+        )
+        memoizable = not generator.last_fallback
+        if memoizable:
+            memo.put_code(*keys, entry)
+    check()
+
+    data = df() if callable(df) else df
+    check()
+
+    if sandbox is not None and not entry.from_template:
+        plotter = VisualizationPlotter(sandbox, max_points=max_points)
+        fig = plotter.execute_plot_code(entry.code, data)
+    else:
+        plotter = VisualizationPlotter(max_points=max_points)
+        fig = plotter.execute_plot_code(entry.compiled if entry.compiled is not None else entry.code, data)
+    if fig is None:
+        fig = plotter.create_fallback_visualization(
+            data, proposal['x_axis'], proposal['y_axis'], proposal['title']
+        )
+
+    image = None
+    if thumbnail:
+        check()
+        width, height = THUMBNAIL_SIZE
+        image = export_figure_to_bytes(fig, width=width, height=height, scale=1.0)
+
+    if memoizable and dataset_key is not None:
+        memo.put_figure(*keys, dataset_key, FigureEntry(fig, image))
+
+    return PregenResult(
+        proposal=proposal,
+        code=entry.code,
+        figure=fig,
+        thumbnail=image,
+        from_cache=entry.from_cache,
+        elapsed_ms=(time.perf_counter() - start) * 1000,
+        from_template=entry.from_template,
+    )
+
+
+def fallback_visualization(
+    proposal: Dict[str, Any],
+    df: DataSource,
+    error: Exception,
+    max_points: Optional[int] = DEFAULT_MAX_POINTS
+) -> PregenResult:
+    """
+    Visualisation de secours d'une préparation qui a échoué (lecture des
+    données, génération...), non mémoïsée
+
+    Args:
+        proposal: Proposition de visualisation
+        df: DataFrame, ou fonction qui le charge
+        error: Erreur de la préparation
+        max_points: Points affichés au maximum
+
+    Returns:
+        PregenResult (error renseigné)
+    """
+    start = time.perf_counter()
+    try:
+        data = df() if callable(df) else df
+    except Exception:
+        # Données illisibles: figure vide, l'erreur est remontée dans le résultat
+        data = pd.DataFrame(columns=[proposal['x_axis'], proposal['y_axis']])
+    fig = VisualizationPlotter(max_points=max_points).create_fallback_visualization(
+        data, proposal['x_axis'], proposal['y_axis'], proposal['title']
+    )
+    return PregenResult(
+        proposal=proposal,
+        code="",
+        figure=fig,
+        thumbnail=None,
+        from_cache=False,
+        elapsed_ms=(time.perf_counter() - start) * 1000,
+        error=f"{type(error).__name__}: {error}",
+    )
+
+
+class Pregenerator:
+    """
+    Pool de threads qui prépare les visualisations des propositions
+
+    Les appels au LLM dominent et libèrent le GIL pendant l'attente réseau:
+    un pool de threads suffit. Seule l'exécution du code produit par le
+    LLM peut être confiée à un pool de processus isolés (sandbox).
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        max_workers: int = 3,
+        thumbnails: bool = True,
+        sandbox: Optional[SandboxPool] = None,
+        max_points: Optional[int] = DEFAULT_MAX_POINTS,
+        unified_model: Optional[str] = None
+    ):
+        """
+        Args:
+            base_url: URL du serveur Ollama
+            max_workers: Propositions traitées en parallèle
+            thumbnails: Calculer une miniature PNG par proposition
+            sandbox: Pool de processus isolés pour le code du LLM (None: dans le processus)
+            max_points: Points affichés au maximum par figure (None: aucune réduction)
+            unified_model: Modèle commun à toutes les étapes (None: un modèle par étape)
+        """
+        self.base_url = base_url
+        self.unified_model = unified_model
+        self.thumbnails = thumbnails
+        self.sandbox = sandbox
+        self.max_points = max_points
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="pregen")
+        self._futures: Dict[str, Future] = {}
+        self._cancelled = threading.Event()
+        self._lock = threading.Lock()
+
+    def _key(self, proposal: Dict[str, Any], dataset_key: Optional[str]) -> str:
+        return f"{proposal_key(proposal)}|{dataset_key or ''}"
+
+    def _build(self, proposal: Dict[str, Any], df_info: Dict[str, Any], df: DataSource, *args) -> PregenResult:
+        """build_visualization dans le pool: une erreur donne la visualisation de secours"""
+        try:
+            return build_visualization(proposal, df_info, df, *args)
+        except PregenCancelled:
+            raise
+        except Exception as e:
+            return fallback_visualization(proposal, df, e, self.max_points)
+
+    def submit(
+        self,
+        proposal: Dict[str, Any],
+        df_info: Dict[str, Any],
+        df: DataSource,
+        use_cache: bool = True,
+        dataset_key: Optional[str] = None
+    ) -> Future:
+        """
+        Lance la préparation d'une proposition (sans effet si déjà lancée)
+
+        Une visualisation mémoïsée (voir visualization.memo) est renvoyée
+        dans un Future déjà terminé, sans passer par le pool.
+
+        Args:
+            dataset_key: Empreinte du contenu du dataset (active la mémoïsation de la figure)
+
+        Returns:
+            Future du PregenResult
+        """
+        key = self._key(proposal, dataset_key)
+        with self._lock:
+            future = self._futures.get(key)
+            if future is not None and not future.cancelled():
+                return future
+
+        ready = memoized_visualization(proposal, df_info, dataset_key, self.base_url,
+                                       unified_model=self.unified_model)
+        with self._lock:
+            future = self._futures.get(key)
+            if future is None or future.cancelled():
+                if ready is not None:
+                    future = Future()
+                    future.set_result(ready)
+                else:
+                    future = self._executor.submit(
+                        self._build, proposal, df_info, df, self.base_url,
+                        use_cache, self.thumbnails, self._cancelled, dataset_key,
+                        None, self.sandbox, self.max_points, self.unified_model,
+                    )
+                self._futures[key] = future
+            return future
+
+    def get(self, proposal: Dict[str, Any], dataset_key: Optional[str] = None) -> Optional[PregenResult]:
+        """Résultat s'il est prêt, None sinon (sans attendre)"""
+        with self._lock:
+            future = self._futures.get(self._key(proposal, dataset_key))
+        if future is None or not future.done():
+            return None
+        try:
+            return future.result()
+        except (CancelledError, PregenCancelled):
+            return None
+
+    def result(
+        self,
+        proposal: Dict[str, Any],
+        timeout: Optional[float] = None,
+        dataset_key: Optional[str] = None
+    ) -> Optional[PregenResult]:
+        """
+        Attend le résultat d'une proposition lancée
+
+        Returns:
+            PregenResult, ou None si la proposition n'a pas été lancée ou a été annulée
+        """
+        with self._lock:
+            future = self._futures.get(self._key(proposal, dataset_key))
+        if future is None:
+            return None
+        try:
+            return future.result(timeout=timeout)
+        except (CancelledError, PregenCancelled):
+            return None
+
+    def discard(self, proposal: Dict[str, Any], dataset_key: Optional[str] = None):
+        """Oublie le résultat d'une proposition (régénération demandée)"""
+        with self._lock:
+            future = self._futures.pop(self._key(proposal, dataset_key), None)
+        if future is not None:
+            future.cancel()
+
+    def cancel(self):
+        """
+        Annule les préparations en cours (nouvelle analyse)
+
+        Les tâches en attente ne démarrent pas; celles en cours s'arrêtent
+        à la prochaine étape. Un appel au LLM déjà parti va à son terme et
+        alimente le cache des réponses.
+        """
+        with self._lock:
+            self._cancelled.set()
+            for future in self._futures.values():
+                future.cancel()
+            self._futures = {}
+            # Nouvel événement pour les tâches suivantes
+            self._cancelled = threading.Event()
+
+    def shutdown(self):
+        self.cancel()
+        self._executor.shutdown(wait=False)
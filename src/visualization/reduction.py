@@ -0,0 +1,491 @@
+"""
+Réduction côté serveur des traces volumineuses
+Densité 2D pour les nuages de points, LTTB pour les courbes, barres
+regroupées par position puis décimées, histogrammes pré-calculés, boîtes à
+moustaches pré-calculées et WebGL au-delà d'un seuil
+
+Appliquée aux figures produites par le code généré (avant la sérialisation
+JSON) et aux données de la visualisation de secours (avant la construction
+des traces). Les extrêmes (min / max de y) sont toujours conservés.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+
+# Points affichés au maximum sur toute la figure
+DEFAULT_MAX_POINTS = 20_000
+# Au-delà, les nuages et courbes passent en WebGL (Scattergl)
+WEBGL_THRESHOLD = 5_000
+# Cases de la densité 2D (par axe) et barres max d'un histogramme pré-calculé
+DENSITY_BINS = 150
+MAX_HISTOGRAM_BINS = 200
+# Nuages et courbes, SVG ou WebGL (plotly.express passe en WebGL au-delà de 1000 lignes)
+SCATTER_TYPES = ('scatter', 'scattergl')
+# Tableaux par point conservés avec les points retenus
+MARKER_POINT_PROPS = ('color', 'size', 'opacity', 'symbol')
+BAR_POINT_PROPS = ('text', 'hovertext', 'customdata', 'width', 'base', 'offset')
+# Clé de layout.meta où sont notées les réductions appliquées
+REDUCTION_META = "reduction"
+
+
+def _values(data: Any) -> Optional[np.ndarray]:
+    """Tableau 1D d'une propriété de trace, ou None"""
+    if data is None or isinstance(data, (dict, str)):
+        return None
+    values = np.asarray(data)
+    return values if values.ndim == 1 else None
+
+
+def _as_float(values: np.ndarray) -> Optional[np.ndarray]:
+    """Valeurs numériques ou dates en float, None pour du texte"""
+    if np.issubdtype(values.dtype, np.datetime64):
+        values = values.astype('datetime64[ns]')
+        return np.where(np.isnat(values), np.nan, values.astype(np.int64).astype(float))
+    if np.issubdtype(values.dtype, np.number) or values.dtype == bool:
+        return values.astype(float)
+    if values.dtype == object:
+        converted = pd.to_numeric(pd.Series(values), errors='coerce').to_numpy(dtype=float)
+        if np.isnan(converted).sum() == pd.isna(values).sum():
+            return converted
+    return None
+
+
+def _with_extremes(indices: np.ndarray, y: np.ndarray) -> np.ndarray:
+    """Ajoute les positions du min et du max de y"""
+    finite = np.isfinite(y)
+    if not finite.any():
+        return indices
+    positions = np.flatnonzero(finite)
+    extremes = positions[[np.argmin(y[finite]), np.argmax(y[finite])]]
+    return np.union1d(indices, extremes)
+
+
+def _segment_argmax(values: np.ndarray, starts: np.ndarray) -> np.ndarray:
+    """Position du maximum de chaque segment [starts[i], starts[i+1])"""
+    maxima = np.maximum.reduceat(values, starts)
+    bucket = np.repeat(np.arange(len(starts)), np.diff(np.append(starts, len(values))))
+    hits = np.flatnonzero(values == maxima[bucket])
+    _, first = np.unique(bucket[hits], return_index=True)
+    return hits[first]
+
+
+def lttb(x: np.ndarray, y: np.ndarray, n_out: int, passes: int = 2) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets, vectorisé
+
+    Dans chaque seau, le point retenu maximise l'aire du triangle formé
+    avec le point retenu du seau précédent et la moyenne du seau suivant.
+    Le point précédent est pris dans la passe précédente (moyennes des
+    seaux au premier passage), ce qui évite une boucle Python par seau
+    pour un écart négligeable avec la version séquentielle.
+
+    Args:
+        x: Abscisses (float, dans l'ordre de tracé)
+        y: Ordonnées (float)
+        n_out: Nombre de points voulus (premier et dernier compris)
+        passes: Passes d'affinage
+
+    Returns:
+        Positions des points retenus, triées, extrêmes de y compris
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    y_filled = np.where(np.isfinite(y), y, np.nanmean(y) if np.isfinite(y).any() else 0.0)
+
+    # Seaux intermédiaires (le premier et le dernier point sont gardés tels quels)
+    starts = np.unique((np.arange(n_out - 2) * (n - 2) / (n_out - 2)).astype(int) + 1)
+    counts = np.diff(np.append(starts, n - 1))
+    starts, counts = starts[counts > 0], counts[counts > 0]
+    bucket = np.repeat(np.arange(len(starts)), counts)
+    inner = slice(1, n - 1)
+
+    mean_x = np.add.reduceat(x[inner], starts - 1) / counts
+    mean_y = np.add.reduceat(y_filled[inner], starts - 1) / counts
+    next_x = np.append(mean_x[1:], x[-1])
+    next_y = np.append(mean_y[1:], y_filled[-1])
+
+    prev_x = np.append(x[0], mean_x[:-1])
+    prev_y = np.append(y_filled[0], mean_y[:-1])
+    for _ in range(passes):
+        ax, ay = prev_x[bucket], prev_y[bucket]
+        cx, cy = next_x[bucket], next_y[bucket]
+        area = np.abs((ax - cx) * (y_filled[inner] - ay) - (ax - x[inner]) * (cy - ay))
+        area = np.nan_to_num(area, nan=-1.0)
+        chosen = _segment_argmax(area, starts - 1) + 1
+        prev_x = np.append(x[0], x[chosen][:-1])
+        prev_y = np.append(y_filled[0], y_filled[chosen][:-1])
+
+    indices = np.concatenate(([0], chosen, [n - 1]))
+    return _with_extremes(indices, y)
+
+
+def decimate(y: Optional[np.ndarray], n: int, n_out: int) -> np.ndarray:
+    """Points régulièrement espacés (ordre sans signification), extrêmes de y compris"""
+    if n_out >= n:
+        return np.arange(n)
+    indices = np.unique(np.linspace(0, n - 1, n_out).astype(int))
+    return _with_extremes(indices, y) if y is not None else indices
+
+
+def density_trace(x: np.ndarray, y: np.ndarray, bins: int = DENSITY_BINS, name: Optional[str] = None) -> go.Heatmap:
+    """
+    Densité 2D d'un nuage de points (histogram2d NumPy)
+
+    Les cases couvrent toute l'étendue des données: les extrêmes restent
+    visibles; les cases vides sont transparentes.
+    """
+    finite = np.isfinite(x) & np.isfinite(y)
+    x, y = x[finite], y[finite]
+    counts, x_edges, y_edges = np.histogram2d(x, y, bins=bins)
+    z = np.where(counts > 0, counts, np.nan).T
+    return go.Heatmap(
+        x=(x_edges[:-1] + x_edges[1:]) / 2,
+        y=(y_edges[:-1] + y_edges[1:]) / 2,
+        z=z,
+        name=name,
+        colorscale='Blues',
+        colorbar=dict(title='Points'),
+        hovertemplate='x=%{x}<br>y=%{y}<br>%{z} points<extra></extra>',
+    )
+
+
+def histogram_edges(values: np.ndarray, nbins: Optional[int] = None) -> np.ndarray:
+    """Bornes des barres: nbins demandé, sinon règle 'auto' de NumPy (bornée)"""
+    if nbins:
+        return np.histogram_bin_edges(values, bins=min(nbins, MAX_HISTOGRAM_BINS))
+    edges = np.histogram_bin_edges(values, bins='auto')
+    if len(edges) - 1 > MAX_HISTOGRAM_BINS:
+        edges = np.histogram_bin_edges(values, bins=MAX_HISTOGRAM_BINS)
+    return edges
+
+
+def _is_temporal(values: np.ndarray) -> bool:
+    return np.issubdtype(values.dtype, np.datetime64)
+
+
+def _from_float(values: np.ndarray, like: np.ndarray) -> np.ndarray:
+    """Repasse des bornes float en dates si la colonne d'origine en contient"""
+    return values.astype(np.int64).astype('datetime64[ns]') if _is_temporal(like) else values
+
+
+def _trace_props(trace: Any, drop: Tuple[str, ...]) -> Dict[str, Any]:
+    """
+    Propriétés d'une trace, sans copier les tableaux de données
+
+    to_plotly_json() recopie tout en profondeur (plusieurs secondes pour
+    des millions de chaînes): seules les sous-structures sont copiées.
+    """
+    props = {key: dict(value) if isinstance(value, dict) else value
+             for key, value in (trace._props or {}).items()}
+    for key in ('type', 'uid') + drop:
+        props.pop(key, None)
+    return props
+
+
+def _take_points(props: Dict[str, Any], keep: Optional[np.ndarray], n: int, keys: Tuple[str, ...]):
+    """
+    Garde les positions keep des tableaux par point (longueur n) des propriétés
+    et du marker; keep=None retire ces tableaux (points agrégés)
+    """
+    marker = props.get('marker') or {}
+    for source, names in ((props, keys), (marker, MARKER_POINT_PROPS)):
+        for key in names:
+            values = _values(source.get(key))
+            if values is not None and len(values) == n:
+                if keep is None:
+                    source.pop(key)
+                else:
+                    source[key] = values[keep]
+
+
+def _to_webgl(trace: go.Scatter, props: Dict[str, Any]) -> Any:
+    """Scattergl avec les mêmes propriétés, ou Scatter si l'une n'existe pas en WebGL"""
+    try:
+        return go.Scattergl(**props)
+    except ValueError:
+        return go.Scatter(**props)
+
+
+def _reduce_scatter(trace: go.Scatter, budget: int, webgl_threshold: int, single: bool) -> Tuple[Any, Optional[str]]:
+    x, y = _values(trace.x), _values(trace.y)
+    if y is None:
+        return trace, None
+    n = len(y)
+    if x is None or len(x) != n:
+        x = np.arange(n)
+    mode = trace.mode or ('lines' if n >= 20 else 'lines+markers')
+    x_float, y_float = _as_float(x), _as_float(y)
+
+    if n > budget and 'lines' not in mode and single and x_float is not None and y_float is not None:
+        return density_trace(x_float, y_float, name=trace.name), f"nuage de {n} points → densité 2D"
+
+    note = None
+    props = _trace_props(trace, ())
+    if n > budget:
+        if 'lines' in mode and y_float is not None:
+            keep = lttb(x_float if x_float is not None else np.arange(n, dtype=float), y_float, budget)
+            method = "LTTB"
+        else:
+            keep = decimate(y_float, n, budget)
+            method = "échantillon régulier"
+        _take_points(props, keep, n, ('x', 'y', 'text', 'hovertext', 'customdata'))
+        note = f"{n} → {len(keep)} points ({method})"
+        n = len(keep)
+
+    if trace.type == 'scattergl':
+        # Déjà en WebGL (ex: plotly.express au-delà de 1000 lignes)
+        return (go.Scattergl(**props) if note else trace), note
+    if n > webgl_threshold:
+        return _to_webgl(trace, props), note or f"{n} points en WebGL"
+    return (go.Scatter(**props) if note else trace), note
+
+
+def _reduce_bar(trace: go.Bar, budget: int, stacked: bool) -> Tuple[Any, Optional[str]]:
+    """
+    Barres trop nombreuses (souvent une par ligne): une barre par position,
+    puis au plus budget barres, extrêmes compris
+
+    Les barres d'une même position sont additionnées si la figure les
+    empile (barmode stack / relative), sinon seule la plus grande en valeur
+    absolue (celle qui est visible) est gardée. Au-delà du budget: LTTB sur
+    un axe numérique ou temporel, plus grandes valeurs absolues sur un axe
+    de catégories.
+    """
+    horizontal = trace.orientation == 'h'
+    pos_key, val_key = ('y', 'x') if horizontal else ('x', 'y')
+    values = _values(trace[val_key])
+    if values is None or len(values) <= budget:
+        return trace, None
+    n = len(values)
+    v = _as_float(values)
+    if v is None:
+        return trace, None
+    positions = _values(trace[pos_key])
+    if positions is None or len(positions) != n:
+        positions = np.arange(n)
+
+    props = _trace_props(trace, ())
+    props[pos_key], props[val_key] = positions, values
+    point_keys = (pos_key, val_key) + BAR_POINT_PROPS
+    codes, uniques = pd.factorize(positions)
+    if len(uniques) < n:
+        groups = pd.Series(v).groupby(codes)
+        if stacked:
+            totals = groups.sum()
+            _take_points(props, None, n, BAR_POINT_PROPS)
+            props[pos_key] = np.asarray(uniques)[totals.index.to_numpy()]
+            props[val_key] = v = totals.to_numpy()
+        else:
+            visible = np.sort(pd.Series(np.abs(v)).groupby(codes).idxmax().to_numpy())
+            _take_points(props, visible, n, point_keys)
+            v = v[visible]
+    m = len(v)
+
+    method = "une par position"
+    if m > budget:
+        p = _as_float(np.asarray(props[pos_key]))
+        if p is not None:
+            order = np.argsort(p, kind='stable')
+            keep = np.sort(order[lttb(p[order], v[order], budget)])
+            method = "LTTB"
+        else:
+            keep = _with_extremes(np.sort(np.argsort(-np.abs(v), kind='stable')[:budget]), v)
+            method = "plus grandes valeurs"
+        _take_points(props, keep, m, point_keys)
+        m = len(keep)
+    return go.Bar(**props), f"{n} → {m} barres ({method})"
+
+
+def _bar(trace: go.Histogram, props: Dict[str, Any], **data: Any) -> Any:
+    """Barres pré-calculées, ou l'histogramme d'origine si une propriété n'a pas d'équivalent"""
+    try:
+        return go.Bar(**data, **props)
+    except ValueError:
+        return trace
+
+
+def _reduce_histogram(trace: go.Histogram, threshold: int) -> Tuple[Any, Optional[str]]:
+    # Histogramme horizontal, pondéré ou normalisé: laissé au navigateur
+    if trace.y is not None or trace.histfunc not in (None, 'count') or trace.histnorm:
+        return trace, None
+    x = _values(trace.x)
+    if x is None or len(x) <= threshold:
+        return trace, None
+
+    props = _trace_props(trace, ('x', 'nbinsx', 'nbinsy', 'xbins', 'ybins', 'autobinx', 'autobiny',
+                                 'bingroup', 'histfunc', 'histnorm', 'cumulative'))
+    values = _as_float(x)
+    if values is None:
+        # Catégories: comptage direct
+        counts = pd.Series(x).value_counts(sort=False).sort_index()
+        return _bar(trace, props, x=counts.index, y=counts.to_numpy()), f"histogramme de {len(x)} valeurs pré-calculé"
+
+    values = values[np.isfinite(values)]
+    if trace.xbins and trace.xbins.size and not _is_temporal(x):
+        start = trace.xbins.start if trace.xbins.start is not None else values.min()
+        end = trace.xbins.end if trace.xbins.end is not None else values.max()
+        edges = np.arange(start, end + trace.xbins.size, trace.xbins.size)
+    else:
+        edges = histogram_edges(values, trace.nbinsx)
+    counts, edges = np.histogram(values, bins=edges)
+    centers = _from_float((edges[:-1] + edges[1:]) / 2, x)
+    widths = np.diff(edges)
+    if _is_temporal(x):
+        # Largeur des barres en millisecondes sur un axe de dates
+        widths = widths / 1e6
+    return _bar(trace, props, x=centers, y=counts, width=widths), f"histogramme de {len(x)} valeurs pré-calculé"
+
+
+def _reduce_box(trace: go.Box, threshold: int) -> Tuple[List[Any], Optional[str]]:
+    # Boîtes horizontales ou déjà pré-calculées: inchangées
+    y = _values(trace.y)
+    if y is None or trace.orientation == 'h' or trace.q1 is not None or len(y) <= threshold:
+        return [trace], None
+    values = _as_float(y)
+    if values is None:
+        return [trace], None
+
+    x = _values(trace.x)
+    if x is not None and len(x) == len(y):
+        codes, labels = pd.factorize(x, sort=True)
+        labels = np.asarray(labels)
+    else:
+        # Boîte unique: placée sous le nom de la trace
+        codes = np.zeros(len(y), dtype=np.intp)
+        labels = np.array([str(trace.name) if trace.name else 'Valeurs'], dtype=object)
+    valid = (codes >= 0) & np.isfinite(values)
+    frame = pd.DataFrame({'g': codes[valid], 'y': values[valid]})
+    groups = range(len(labels))
+
+    grouped = frame.groupby('g', sort=True)['y']
+    quartiles = grouped.quantile([0.25, 0.5, 0.75]).unstack().reindex(groups)
+    q1, median, q3 = (quartiles[q].to_numpy() for q in (0.25, 0.5, 0.75))
+    iqr = q3 - q1
+    g, v = frame['g'].to_numpy(), frame['y'].to_numpy()
+    inside = (v >= (q1 - 1.5 * iqr)[g]) & (v <= (q3 + 1.5 * iqr)[g])
+    fences = frame[inside].groupby('g')['y']
+    present = ~np.isnan(q1)
+
+    props = _trace_props(trace, ('x', 'y', 'boxpoints', 'jitter', 'pointpos', 'selectedpoints'))
+    box = go.Box(
+        x=labels[present],
+        q1=q1[present], median=median[present], q3=q3[present],
+        lowerfence=fences.min().reindex(groups).to_numpy()[present],
+        upperfence=fences.max().reindex(groups).to_numpy()[present],
+        mean=grouped.mean().reindex(groups).to_numpy()[present],
+        **props
+    )
+
+    # Valeurs aberrantes: extrêmes de chaque groupe toujours affichés, le reste échantillonné
+    outliers = frame[~inside]
+    traces = [box]
+    if len(outliers):
+        by_group = outliers.groupby('g')['y']
+        extremes = outliers.loc[np.union1d(by_group.idxmin(), by_group.idxmax())]
+        sample = outliers.iloc[decimate(None, len(outliers), threshold)]
+        shown = pd.concat([sample, extremes]).drop_duplicates()
+        traces.append(go.Scatter(
+            x=labels[shown['g'].to_numpy()], y=shown['y'], mode='markers', name=trace.name, showlegend=False,
+            marker=dict(size=4, color=trace.marker.color if trace.marker else None),
+            xaxis=trace.xaxis, yaxis=trace.yaxis,
+        ))
+    return traces, f"boîte de {len(y)} valeurs pré-calculée"
+
+
+def _point_count(trace: Any) -> int:
+    values = _values(getattr(trace, 'y', None))
+    if values is None:
+        values = _values(getattr(trace, 'x', None))
+    return 0 if values is None else len(values)
+
+
+def reduce_figure(
+    fig: go.Figure,
+    max_points: Optional[int] = DEFAULT_MAX_POINTS,
+    webgl_threshold: int = WEBGL_THRESHOLD
+) -> go.Figure:
+    """
+    Réduit les traces trop volumineuses d'une figure
+
+    Le budget de points est réparti entre les traces au prorata de leur
+    taille. Les réductions appliquées sont notées dans
+    layout.meta["reduction"] (voir reduction_notes).
+
+    Args:
+        fig: Figure Plotly
+        max_points: Points affichés au maximum (None: pas de réduction)
+        webgl_threshold: Points d'un nuage ou d'une courbe au-delà desquels passer en WebGL
+
+    Returns:
+        Figure réduite (la figure d'origine si rien n'est à réduire)
+    """
+    if not max_points or fig.frames:
+        return fig
+    sizes = [_point_count(trace) for trace in fig.data]
+    total = sum(sizes)
+    if total <= min(max_points, webgl_threshold):
+        return fig
+
+    scatters = sum(1 for trace in fig.data if trace.type in SCATTER_TYPES)
+    traces, notes = [], []
+    for trace, size in zip(fig.data, sizes):
+        budget = max(int(max_points * size / total), 3)
+        if trace.type in SCATTER_TYPES:
+            reduced, note = _reduce_scatter(trace, budget, webgl_threshold, single=scatters == 1)
+            reduced = [reduced]
+        elif trace.type == 'bar':
+            reduced, note = _reduce_bar(trace, budget, stacked=fig.layout.barmode in ('stack', 'relative'))
+            reduced = [reduced]
+        elif trace.type == 'histogram':
+            reduced, note = _reduce_histogram(trace, budget)
+            reduced = [reduced]
+        elif trace.type == 'box':
+            reduced, note = _reduce_box(trace, budget)
+        else:
+            reduced, note = [trace], None
+        traces.extend(reduced)
+        if note:
+            notes.append(note)
+
+    if not notes:
+        return fig
+    reduced_fig = go.Figure(data=traces, layout=fig.layout)
+    meta = reduced_fig.layout.meta if isinstance(reduced_fig.layout.meta, dict) else {}
+    reduced_fig.layout.meta = {**meta, REDUCTION_META: notes}
+    return reduced_fig
+
+
+def reduction_notes(fig: go.Figure) -> List[str]:
+    """Réductions appliquées à une figure (vide si aucune)"""
+    meta = fig.layout.meta if fig is not None else None
+    return list(meta.get(REDUCTION_META, [])) if isinstance(meta, dict) else []
+
+
+def points_trace(
+    x: pd.Series,
+    y: pd.Series,
+    max_points: Optional[int] = DEFAULT_MAX_POINTS,
+    webgl_threshold: int = WEBGL_THRESHOLD,
+    **marker: Any
+) -> Any:
+    """
+    Trace d'un nuage de points construite directement à la bonne taille
+
+    Densité 2D au-delà de max_points (x et y numériques), échantillon
+    régulier extrêmes compris sinon, Scattergl au-delà du seuil WebGL.
+    """
+    n = len(x)
+    x_float, y_float = _as_float(x.to_numpy()), _as_float(y.to_numpy())
+    if max_points and n > max_points:
+        if x_float is not None and y_float is not None:
+            return density_trace(x_float, y_float)
+        keep = decimate(y_float, n, max_points)
+        x, y = x.iloc[keep], y.iloc[keep]
+        n = len(keep)
+    trace_type = go.Scattergl if n > webgl_threshold else go.Scatter
+    return trace_type(x=x, y=y, mode='markers', marker=marker)
@@ -0,0 +1,505 @@
+"""
+Exécution isolée du code de visualisation généré par le LLM
+Pool de processus préchauffés (pandas et plotly déjà importés), limites de
+temps CPU et de mémoire par exécution, DataFrame transmis en Arrow via la
+mémoire partagée et figure renvoyée en JSON
+
+L'isolation protège le serveur Streamlit (boucle infinie, mémoire,
+plantage); les builtins restreints réduisent la surface mais ne
+constituent pas un bac à sable de sécurité au sens strict.
+"""
+
+import atexit
+import builtins
+import hashlib
+import multiprocessing
+import os
+import queue
+import signal
+import sys
+import threading
+import weakref
+from collections import OrderedDict
+from contextlib import contextmanager
+from multiprocessing import shared_memory
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import plotly.io as pio
+
+from .reduction import DEFAULT_MAX_POINTS, reduce_figure
+
+try:
+    import pyarrow as pa
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+try:
+    import resource
+except ImportError:
+    # Windows: seul le délai d'attente s'applique
+    resource = None
+
+
+# Réglage serveur: "0" pour exécuter le code du LLM dans le processus Streamlit
+SANDBOX_ENV = "DATAVIZ_SANDBOX"
+DISABLED_VALUES = {'0', 'false', 'no', 'off', 'non'}
+DEFAULT_WORKERS = 2
+DEFAULT_CPU_SECONDS = 10
+DEFAULT_MEMORY_MB = 1024
+# Délai total d'une exécution (code bloqué sans consommer de CPU compris)
+DEFAULT_TIMEOUT = 30.0
+# DataFrames décodés gardés par processus (les 3 propositions d'un même dataset)
+WORKER_FRAMES = 2
+WORKER_CODES = 64
+
+ALLOWED_MODULES = {
+    'plotly', 'pandas', 'numpy', 'math', 'statistics', 'datetime',
+    'collections', 'itertools', 'functools', 're', 'json',
+}
+SAFE_BUILTINS = [
+    'abs', 'all', 'any', 'bool', 'callable', 'dict', 'divmod', 'enumerate', 'filter',
+    'float', 'format', 'frozenset', 'hasattr', 'int', 'isinstance', 'iter', 'len', 'list',
+    'map', 'max', 'min', 'next', 'pow', 'print', 'range', 'repr', 'reversed', 'round',
+    'set', 'slice', 'sorted', 'str', 'sum', 'tuple', 'zip',
+    'Exception', 'ArithmeticError', 'AttributeError', 'IndexError', 'KeyError',
+    'TypeError', 'ValueError', 'ZeroDivisionError',
+]
+
+
+class SandboxError(RuntimeError):
+    """Échec de l'exécution isolée (erreur du code, processus interrompu)"""
+
+
+class SandboxTimeout(SandboxError):
+    """Temps CPU ou délai d'attente dépassé"""
+
+
+class SandboxMemoryError(SandboxError):
+    """Limite mémoire dépassée"""
+
+
+def _guarded_import(name, globals=None, locals=None, fromlist=(), level=0):
+    if level or name.split('.')[0] not in ALLOWED_MODULES:
+        raise ImportError(f"Import interdit dans le bac à sable: {name}")
+    return __import__(name, globals, locals, fromlist, level)
+
+
+def _safe_builtins() -> Dict[str, Any]:
+    allowed = {name: getattr(builtins, name) for name in SAFE_BUILTINS}
+    allowed['__import__'] = _guarded_import
+    # Définition de classes dans le code généré
+    allowed['__build_class__'] = builtins.__build_class__
+    return allowed
+
+
+# --- Côté processus de travail -------------------------------------------
+
+def _on_cpu_limit(signum, frame):
+    raise SandboxTimeout("Temps CPU dépassé")
+
+
+def _address_space() -> Optional[int]:
+    """Mémoire virtuelle du processus, en octets (None si inconnue)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[0]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+@contextmanager
+def _job_limits(cpu_seconds: int, memory_bytes: int):
+    """
+    Limites d'une exécution, relatives à la consommation courante du processus
+
+    Seules les limites souples sont modifiées: elles sont rétablies après
+    l'exécution (une limite dure abaissée ne peut plus être relevée).
+    """
+    if resource is None:
+        yield
+        return
+
+    saved = {}
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    address_space = _address_space()
+    wanted = {resource.RLIMIT_CPU: int(usage.ru_utime + usage.ru_stime) + cpu_seconds + 1}
+    if address_space is not None:
+        wanted[resource.RLIMIT_AS] = address_space + memory_bytes
+
+    for limit, value in wanted.items():
+        soft, hard = resource.getrlimit(limit)
+        if hard != resource.RLIM_INFINITY:
+            value = min(value, hard)
+        try:
+            resource.setrlimit(limit, (value, hard))
+            saved[limit] = (soft, hard)
+        except (ValueError, OSError):
+            pass
+    try:
+        yield
+    finally:
+        for limit, previous in saved.items():
+            resource.setrlimit(limit, previous)
+
+
+def _load_frame(frame: tuple, frames: "OrderedDict[str, Tuple[Any, pd.DataFrame]]") -> pd.DataFrame:
+    """DataFrame d'une exécution, décodé une fois par segment de mémoire partagée"""
+    kind, payload = frame[0], frame[1:]
+    if kind == 'pickle':
+        return payload[0]
+
+    name, size = payload
+    if name in frames:
+        frames.move_to_end(name)
+        return frames[name][1]
+
+    shm = shared_memory.SharedMemory(name=name)
+    reader = pa.ipc.open_stream(pa.py_buffer(shm.buf)[:size])
+    df = reader.read_all().to_pandas()
+    del reader
+    # Segment gardé ouvert tant que le DataFrame est en cache (conversions sans copie)
+    frames[name] = (shm, df)
+    while len(frames) > WORKER_FRAMES:
+        _close_segment(frames.popitem(last=False)[1][0])
+    return df
+
+
+def _close_segment(shm: shared_memory.SharedMemory):
+    try:
+        shm.close()
+    except BufferError:
+        # DataFrame encore référencé: fermé à sa libération
+        pass
+
+
+def _run_job(job: Dict[str, Any], frames: OrderedDict, codes: Dict[str, Any]) -> Tuple[str, str]:
+    """
+    Exécute un code de visualisation
+
+    Returns:
+        ("ok", figure JSON) ou (timeout | memory | error, message)
+    """
+    namespace: Dict[str, Any] = {}
+    try:
+        key = hashlib.blake2b(job['code'].encode(), digest_size=16).hexdigest()
+        compiled = codes.get(key)
+        if compiled is None:
+            if len(codes) >= WORKER_CODES:
+                codes.clear()
+            compiled = codes[key] = compile(job['code'], "<visualization>", "exec")
+
+        df = _load_frame(job['frame'], frames)
+        namespace.update({
+            'pd': pd,
+            'go': go,
+            'np': np,
+            # Copie légère: le code ne modifie pas le DataFrame partagé entre exécutions
+            'df': df.copy(deep=False),
+            '__builtins__': _safe_builtins(),
+            '__name__': '__sandbox__',
+        })
+        with _job_limits(job['cpu_seconds'], job['memory_bytes']):
+            exec(compiled, namespace)
+            create_figure = namespace.get('create_figure')
+            if not callable(create_figure):
+                raise ValueError("Le code doit définir une fonction create_figure(df)")
+            fig = create_figure(namespace['df'])
+            if not isinstance(fig, go.Figure):
+                raise ValueError(
+                    f"create_figure doit retourner un plotly.graph_objects.Figure, reçu {type(fig)}"
+                )
+            # Réduction avant la sérialisation: le JSON reste borné
+            return "ok", reduce_figure(fig, job['max_points']).to_json()
+    except SandboxTimeout as e:
+        return "timeout", str(e)
+    except MemoryError:
+        return "memory", "Limite mémoire dépassée"
+    except Exception as e:
+        return "error", f"{type(e).__name__}: {e}"
+    finally:
+        # create_figure référence le namespace (cycle): libéré tout de suite
+        namespace.clear()
+
+
+def _worker_main(conn):
+    """Boucle d'un processus de travail: un job à la fois jusqu'à None ou fermeture"""
+    if resource is not None:
+        signal.signal(signal.SIGXCPU, _on_cpu_limit)
+    # Les print du code généré ne remontent pas dans les logs du serveur
+    sys.stdout = open(os.devnull, 'w')
+    # Préchauffage: validateurs plotly, template et sérialisation JSON chargés avant le premier job
+    warm = go.Figure([go.Scatter(x=[0], y=[0]), go.Bar(x=[0], y=[0]), go.Histogram(x=[0]), go.Box(y=[0])])
+    warm.update_layout(title='', xaxis_title='', yaxis_title='', template='plotly_white')
+    warm.to_json()
+    frames: OrderedDict = OrderedDict()
+    codes: Dict[str, Any] = {}
+    while True:
+        try:
+            job = conn.recv()
+        except (EOFError, OSError):
+            break
+        if job is None:
+            break
+        conn.send(_run_job(job, frames, codes))
+    segments = [shm for shm, _ in frames.values()]
+    frames.clear()
+    for shm in segments:
+        _close_segment(shm)
+
+
+# --- Côté processus principal --------------------------------------------
+
+def _context():
+    """forkserver: processus créés depuis un serveur qui a déjà importé pandas et plotly"""
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        ctx = multiprocessing.get_context('forkserver')
+        ctx.set_forkserver_preload(['pandas', 'pyarrow', 'plotly.graph_objects', 'plotly.io', __name__])
+        return ctx
+    return multiprocessing.get_context('spawn')
+
+
+def _write_table(table: "pa.Table", buf: memoryview):
+    """Table au format IPC Arrow, écrite directement dans le segment"""
+    with pa.ipc.new_stream(pa.FixedSizeBufferWriter(pa.py_buffer(buf)), table.schema) as writer:
+        writer.write_table(table)
+
+
+class _Worker:
+    """Processus de travail et son extrémité de pipe"""
+
+    def __init__(self, ctx):
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(target=_worker_main, args=(child_conn,), daemon=True, name="sandbox")
+        self.process.start()
+        child_conn.close()
+
+    def stop(self, kill: bool = False):
+        if not kill:
+            try:
+                self.conn.send(None)
+            except OSError:
+                pass
+            self.process.join(timeout=1.0)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join(timeout=1.0)
+        self.conn.close()
+
+
+class SandboxPool:
+    """
+    Pool de processus préchauffés pour exécuter le code généré
+
+    Chaque exécution a ses limites de temps CPU et de mémoire (limites
+    souples du processus, rétablies ensuite) et un délai total: un
+    processus qui le dépasse est tué et remplacé. Le DataFrame est écrit
+    une fois en Arrow dans un segment de mémoire partagée, relu par les
+    processus sans pickling; la figure revient en JSON.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = DEFAULT_WORKERS,
+        cpu_seconds: int = DEFAULT_CPU_SECONDS,
+        memory_mb: int = DEFAULT_MEMORY_MB,
+        timeout: float = DEFAULT_TIMEOUT
+    ):
+        """
+        Args:
+            max_workers: Processus démarrés (exécutions simultanées)
+            cpu_seconds: Temps CPU maximum par exécution
+            memory_mb: Mémoire supplémentaire maximum par exécution
+            timeout: Délai total d'une exécution, attente d'un processus libre comprise
+        """
+        self.max_workers = max_workers
+        self.cpu_seconds = cpu_seconds
+        self.memory_mb = memory_mb
+        self.timeout = timeout
+        self.runs = 0
+        self.timeouts = 0
+        self.memory_errors = 0
+        self.errors = 0
+        self.restarts = 0
+        self._ctx = _context()
+        self._lock = threading.Lock()
+        # Un seul segment partagé par DataFrame (voir _share)
+        self._share_lock = threading.Lock()
+        self._closed = False
+        # {id(df): (weakref, signature, segment, taille)}
+        self._frames: Dict[int, tuple] = {}
+        self._workers = [_Worker(self._ctx) for _ in range(max_workers)]
+        self._idle: "queue.Queue[_Worker]" = queue.Queue()
+        for worker in self._workers:
+            self._idle.put(worker)
+
+    def _replace(self, worker: _Worker) -> _Worker:
+        """Tue un processus (bloqué ou mort) et en démarre un autre"""
+        worker.stop(kill=True)
+        fresh = _Worker(self._ctx)
+        with self._lock:
+            self._workers = [fresh if w is worker else w for w in self._workers]
+            self.restarts += 1
+        return fresh
+
+    def _release_frame(self, key: int):
+        with self._lock:
+            entry = self._frames.pop(key, None)
+        if entry is not None:
+            shm = entry[2]
+            shm.close()
+            shm.unlink()
+
+    def _share(self, df: pd.DataFrame) -> tuple:
+        """
+        Référence du DataFrame pour les processus
+
+        Returns:
+            ("arrow", nom du segment, taille), ou ("pickle", df) sans pyarrow
+            ou pour des colonnes non convertibles
+        """
+        if not HAS_PYARROW:
+            return ("pickle", df)
+
+        key = id(df)
+        signature = (df.shape, tuple(map(str, df.columns)))
+        # Vérification, création et enregistrement du segment sous un même verrou:
+        # les threads du Pregenerator partagent souvent le même df au même moment
+        with self._share_lock:
+            with self._lock:
+                entry = self._frames.get(key)
+            if entry is not None and entry[0]() is df and entry[1] == signature:
+                return ("arrow", entry[2].name, entry[3])
+            if entry is not None:
+                self._release_frame(key)
+
+            try:
+                table = pa.Table.from_pandas(df)
+            except (pa.ArrowException, TypeError, ValueError):
+                return ("pickle", df)
+
+            sink = pa.MockOutputStream()
+            with pa.ipc.new_stream(sink, table.schema) as writer:
+                writer.write_table(table)
+            size = sink.size()
+
+            shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+            _write_table(table, shm.buf)
+
+            # Segment supprimé quand le DataFrame disparaît
+            ref = weakref.ref(df, lambda _, key=key: self._release_frame(key))
+            with self._lock:
+                self._frames[key] = (ref, signature, shm, size)
+            return ("arrow", shm.name, size)
+
+    def run(self, code: str, df: pd.DataFrame, max_points: Optional[int] = DEFAULT_MAX_POINTS) -> go.Figure:
+        """
+        Exécute un code définissant create_figure(df) dans un processus du pool
+
+        Args:
+            code: Code Python (source)
+            df: DataFrame pandas
+            max_points: Points affichés au maximum (voir visualization.reduction)
+
+        Returns:
+            Figure Plotly
+
+        Raises:
+            SandboxTimeout: Temps CPU ou délai dépassé
+            SandboxMemoryError: Limite mémoire dépassée
+            SandboxError: Erreur du code ou processus interrompu
+        """
+        if self._closed:
+            raise SandboxError("Pool d'exécution arrêté")
+        job = {
+            'code': code,
+            'frame': self._share(df),
+            'cpu_seconds': self.cpu_seconds,
+            'memory_bytes': self.memory_mb * 1024 * 1024,
+            'max_points': max_points,
+        }
+
+        try:
+            worker = self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            with self._lock:
+                self.timeouts += 1
+            raise SandboxTimeout("Aucun processus d'exécution libre")
+
+        try:
+            worker.conn.send(job)
+            if not worker.conn.poll(self.timeout):
+                worker = self._replace(worker)
+                status, message = "timeout", f"Délai de {self.timeout:.0f}s dépassé"
+            else:
+                status, message = worker.conn.recv()
+        except (EOFError, OSError):
+            # Processus tué (limite dure, signal) pendant l'exécution
+            worker = self._replace(worker)
+            status, message = "error", "Processus d'exécution interrompu"
+        finally:
+            self._idle.put(worker)
+
+        with self._lock:
+            self.runs += 1
+            if status == "timeout":
+                self.timeouts += 1
+            elif status == "memory":
+                self.memory_errors += 1
+            elif status != "ok":
+                self.errors += 1
+
+        if status == "ok":
+            return pio.from_json(message)
+        if status == "timeout":
+            raise SandboxTimeout(message)
+        if status == "memory":
+            raise SandboxMemoryError(message)
+        raise SandboxError(message)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns:
+            Dictionnaire runs, timeouts, memory_errors, errors, restarts
+        """
+        with self._lock:
+            return {
+                "runs": self.runs,
+                "timeouts": self.timeouts,
+                "memory_errors": self.memory_errors,
+                "errors": self.errors,
+                "restarts": self.restarts,
+            }
+
+    def shutdown(self):
+        """Arrête les processus et supprime les segments de mémoire partagée"""
+        self._closed = True
+        with self._lock:
+            workers, self._workers = self._workers, []
+            keys = list(self._frames)
+        for worker in workers:
+            worker.stop()
+        for key in keys:
+            self._release_frame(key)
+
+
+_sandbox: Optional[SandboxPool] = None
+_sandbox_lock = threading.Lock()
+
+
+def sandbox_enabled() -> bool:
+    """Isolation activée côté serveur (variable DATAVIZ_SANDBOX, activée par défaut)"""
+    return os.environ.get(SANDBOX_ENV, '1').strip().lower() not in DISABLED_VALUES
+
+
+def get_sandbox() -> SandboxPool:
+    """Pool partagé par le processus, démarré au premier appel"""
+    global _sandbox
+    with _sandbox_lock:
+        if _sandbox is None:
+            _sandbox = SandboxPool()
+            atexit.register(_sandbox.shutdown)
+        return _sandbox